@@ -0,0 +1,196 @@
+# IFCJSON_python - batch.py
+# Convert a folder of IFC SPF files to ifcJSON in parallel
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from time import perf_counter
+import os
+import glob
+import argparse
+import concurrent.futures
+import ifcjson.cli as cli
+
+
+def findIfcFiles(inputPath, exclude=None):
+    """Returns all IFC files in a folder and its subfolders, or matching a glob pattern
+
+    Parameters:
+    inputPath (string): folder or glob pattern, like "../Samples/**/*.ifc"
+    exclude (string): files with a name that ends with this text are skipped, like "_roundtrip"
+
+    Returns:
+    list: sorted ifc file paths
+
+    """
+    if os.path.isdir(inputPath):
+        filePaths = []
+        for root, dirs, files in os.walk(inputPath):
+            for file in files:
+                if os.path.splitext(file)[1].lower() == '.ifc':
+                    filePaths.append(os.path.join(root, file))
+    else:
+        filePaths = [x for x in glob.glob(
+            inputPath, recursive=True) if os.path.isfile(x)]
+    if exclude:
+        filePaths = [x for x in filePaths if not os.path.splitext(x)[
+            0].endswith(exclude)]
+    return sorted(filePaths)
+
+
+def jsonPath(ifcFilePath, inputPath, outputPath=None):
+    """Returns the ifcJSON file path for an IFC file, in the output folder with the
+    same subfolders as in the input folder or glob pattern, or next to the IFC file
+
+    Parameters:
+    ifcFilePath (string): ifc file path
+    inputPath (string): input folder or glob pattern
+    outputPath (string): output folder
+
+    Returns:
+    string
+
+    """
+    filename = os.path.splitext(ifcFilePath)[0] + '.json'
+    if not outputPath:
+        return filename
+    return os.path.join(outputPath, os.path.relpath(filename, baseFolder(inputPath)))
+
+
+def baseFolder(inputPath):
+    """Returns the input folder, or the folder of a glob pattern before the first wildcard"""
+
+    if os.path.isdir(inputPath):
+        return inputPath
+    folder = os.path.dirname(inputPath)
+    while glob.has_magic(folder):
+        folder = os.path.dirname(folder)
+    return folder or os.curdir
+
+
+def isUpToDate(ifcFilePath, jsonFilePath, args):
+    """Checks if all output files exist and are newer than the IFC file"""
+
+    ifcTime = os.path.getmtime(ifcFilePath)
+    for outputFilePath in cli.outputPaths(jsonFilePath, args):
+        if not os.path.isfile(outputFilePath) or os.path.getmtime(outputFilePath) < ifcTime:
+            return False
+    return True
+
+
+def convertFile(ifcFilePath, jsonFilePath, args):
+    """Converts a single file in a worker process
+
+    Returns:
+    tuple: ifc file path, conversion time in seconds and error message or None
+
+    """
+    start = perf_counter()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(jsonFilePath)), exist_ok=True)
+        cli.convert(ifcFilePath, jsonFilePath, args)
+        error = None
+    except Exception as e:
+        error = '%s: %s' % (type(e).__name__, e)
+    return ifcFilePath, perf_counter() - start, error
+
+
+def convertFiles(conversions, args, workers=None, force=False):
+    """Converts IFC files to ifcJSON using a pool of worker processes,
+    files with up-to-date output are skipped
+
+    Parameters:
+    conversions (list): tuples of ifc file path and json file path
+    args (argparse.Namespace): parsed writer options, see cli.addConversionArguments
+    workers (int): number of worker processes, default is the number of processors
+    force (boolean): if True then up-to-date files are converted as well
+
+    Returns:
+    dict: conversion time in seconds or error message by ifc file path
+
+    """
+    results = {}
+    todo = []
+    for ifcFilePath, jsonFilePath in conversions:
+        if not force and isUpToDate(ifcFilePath, jsonFilePath, args):
+            print('Skipped   ' + ifcFilePath)
+        else:
+            todo.append((ifcFilePath, jsonFilePath))
+    if not todo:
+        return results
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(convertFile, ifcFilePath, jsonFilePath, args)
+                   for ifcFilePath, jsonFilePath in todo]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                ifcFilePath, seconds, error = future.result()
+            except Exception as e:
+
+                # The worker process itself failed, for example by running out of memory
+                ifcFilePath = todo[futures.index(future)][0]
+                seconds, error = 0.0, '%s: %s' % (type(e).__name__, e)
+            if error:
+                print('Failed    %s: %s' % (ifcFilePath, error))
+                results[ifcFilePath] = error
+            else:
+                print('Converted %s in %.2f seconds' % (ifcFilePath, seconds))
+                results[ifcFilePath] = seconds
+    return results
+
+
+def printSummary(results, seconds):
+    failures = [x for x in results if isinstance(results[x], str)]
+    print('%d converted, %d failed in %.2f seconds' %
+          (len(results) - len(failures), len(failures), seconds))
+    for ifcFilePath in failures:
+        print('  ' + ifcFilePath + ': ' + results[ifcFilePath])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Convert a folder of IFC SPF files to ifcJSON in parallel')
+    parser.add_argument('-i', type=str, required=True,
+                        help='input folder or glob pattern, like "../Samples/**/*.ifc"')
+    parser.add_argument('-o', type=str,
+                        help='output folder, default is next to the ifc files')
+    parser.add_argument('--workers', type=int,
+                        help='Number of worker processes, default is the number of processors')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='Also convert files for which the json file is newer than the ifc file, default is False')
+    parser.add_argument('--exclude', type=str,
+                        help='Skip ifc files with a name that ends with this text, like "_roundtrip"')
+    cli.addConversionArguments(parser)
+    args = parser.parse_args()
+
+    if args.v and not args.v in cli.VERSIONS:
+        print('Version ' + args.v + ' is not supported')
+    else:
+        start = perf_counter()
+        conversions = [(x, jsonPath(x, args.i, args.o))
+                       for x in findIfcFiles(args.i, args.exclude)]
+        if conversions:
+            results = convertFiles(conversions, args, args.workers, args.force)
+            printSummary(results, perf_counter() - start)
+        else:
+            print(str(args.i) + ' does not contain ifc files')
@@ -0,0 +1,648 @@
+"""
+IFCJSON_python - benchmark.py
+Measure the conversion performance of the ifcJSON writers and readers
+https://github.com/IFCJSON-Team
+"""
+
+from time import perf_counter
+import os
+import sys
+import json
+import argparse
+import datetime
+import platform
+import subprocess
+import tempfile
+import ifcopenshell
+import ifcjson
+import ifcjson.cli as cli
+import ifcjson.serialization as serialization
+import generate
+from batch import findIfcFiles
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SCRIPT_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SAMPLES_FOLDER = os.path.join(SCRIPT_FOLDER, '..', 'Samples')
+SCHEMA_PATH = os.path.join(SCRIPT_FOLDER, '..', 'Schema', 'IFC4.json')
+
+# Sample folders that are benchmarked by default, relative to the Samples folder
+SAMPLE_FOLDERS = ('IFC_2x3', 'IFC_4.0', 'IFC_4.3')
+
+# Synthetic model sizes of the scale series, storeys x elements per storey
+SCALE_SERIES = ('1x100', '2x250', '4x500', '8x1000')
+
+# Stages in order of execution, the read, json2ifc and validate stages use the ifc2json4 output
+STAGES = ('ifc2json4', 'ifc2json5a', 'read', 'json2ifc', 'validate')
+
+# Stages that need the ifcJSON-4 output
+JSON4_STAGES = ('read', 'json2ifc', 'validate')
+
+# Stages that are repeated for every serialization backend when comparing backends
+BACKEND_STAGES = ('ifc2json4', 'ifc2json5a', 'read', 'json2ifc')
+
+# Changes in time below this number of seconds are not reported as regression
+MIN_DIFFERENCE = 0.01
+
+
+# Prints the ifcJSON-4 writer time per entity in microseconds, runs in a new python process
+# with the ifcjson package folder and the ifc file path as arguments
+WRITER_COST = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from time import perf_counter
+import ifcopenshell
+import ifcjson
+ifcModel = ifcopenshell.open(sys.argv[2])
+writer = ifcjson.IFC2JSON4(ifcModel)
+start = perf_counter()
+writer.spf2Json()
+print((perf_counter() - start) / sum(1 for _ in ifcModel) * 1000000)
+"""
+
+
+def entityConversionCost(sourceFolder, ifcFilePath):
+    """Returns the ifcJSON-4 conversion time per entity in microseconds, of the ifcjson
+    package in a source folder
+
+    Parameters:
+    sourceFolder (string): folder that contains the ifcjson package
+    ifcFilePath (string): input ifc file path
+
+    Returns:
+    float: microseconds per entity
+
+    """
+    output = subprocess.check_output([sys.executable, '-c', WRITER_COST, sourceFolder, ifcFilePath],
+                                     cwd=sourceFolder, universal_newlines=True)
+    return float(output.strip().splitlines()[-1])
+
+
+def compareRevision(revision, ifcFilePath, repeat):
+    """Compares the ifcJSON-4 conversion time per entity of the working tree with a git revision,
+    the revision is checked out in a temporary git worktree
+
+    Parameters:
+    revision (string): git revision, like HEAD or a commit hash
+    ifcFilePath (string): input ifc file path
+    repeat (int): number of conversions per source folder, the fastest is reported
+
+    Returns:
+    tuple: microseconds per entity of the revision and of the working tree
+
+    """
+    root = subprocess.check_output(['git', 'rev-parse', '--show-toplevel'], cwd=SCRIPT_FOLDER,
+                                   universal_newlines=True).strip()
+    with tempfile.TemporaryDirectory() as folder:
+        worktree = os.path.join(folder, 'worktree')
+        subprocess.check_call(['git', 'worktree', 'add', '--quiet', '--detach', worktree, revision],
+                              cwd=SCRIPT_FOLDER, stdout=subprocess.DEVNULL)
+        try:
+            revisionFolder = os.path.join(
+                worktree, os.path.relpath(SCRIPT_FOLDER, root))
+
+            # Both source folders are run in turns so changes in machine load affect both
+            revisionCost = currentCost = float('inf')
+            for i in range(repeat):
+                revisionCost = min(revisionCost, entityConversionCost(
+                    revisionFolder, ifcFilePath))
+                currentCost = min(currentCost, entityConversionCost(
+                    SCRIPT_FOLDER, ifcFilePath))
+        finally:
+            subprocess.check_call(['git', 'worktree', 'remove', '--force', worktree],
+                                  cwd=SCRIPT_FOLDER)
+    return revisionCost, currentCost
+
+
+def serializationCost(data, repeat):
+    """Returns the best encoding and decoding time of every installed json backend
+
+    Parameters:
+    data: ifcJSON document
+    repeat (int): number of runs per backend
+
+    Returns:
+    dict: tuple of compact encoding, indented encoding and decoding seconds by backend name
+
+    """
+    results = {}
+    try:
+        for name in serialization.availableBackends():
+            serialization.setBackend(name)
+            timings = []
+            for i in range(repeat):
+                start = perf_counter()
+                text = serialization.dumps(data)
+                compact = perf_counter()
+                serialization.dumps(data, 2)
+                indented = perf_counter()
+                serialization.loads(text)
+                timings.append((compact - start, indented - compact,
+                                perf_counter() - indented))
+            results[name] = tuple(map(min, zip(*timings)))
+    finally:
+        serialization.setBackend()
+    return results
+
+
+def peakMemory():
+    """Returns the peak resident set size of the current process in bytes,
+    or None when the resource module is not available
+
+    Returns:
+    int
+
+    """
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == 'darwin':
+        return maxrss
+    return maxrss * 1024
+
+
+def fileSize(filePath):
+    if os.path.isfile(filePath):
+        return os.path.getsize(filePath)
+    return None
+
+
+def stagePaths(workFolder):
+    """Returns the ifcJSON-4, ifcJSON-5a and roundtrip IFC file paths in the work folder"""
+
+    return (os.path.join(workFolder, 'model4.json'),
+            os.path.join(workFolder, 'model5a.json'),
+            os.path.join(workFolder, 'model_roundtrip.ifc'))
+
+
+def runStage(stage, ifcFilePath, workFolder):
+    """Runs a single benchmark stage in the current process
+
+    Parameters:
+    stage (string): one of STAGES
+    ifcFilePath (string): input ifc file path
+    workFolder (string): folder for the files that are written by the stages
+
+    Returns:
+    dict: stage result with the number of entities and output bytes,
+        or the reason why the stage was skipped
+
+    """
+    json4Path, json5aPath, roundtripPath = stagePaths(workFolder)
+    if stage == 'ifc2json4' or stage == 'ifc2json5a':
+        parser = argparse.ArgumentParser()
+        cli.addConversionArguments(parser)
+        if stage == 'ifc2json4':
+            args = parser.parse_args([])
+            jsonFilePath = json4Path
+        else:
+            args = parser.parse_args(['-v', '5a'])
+            jsonFilePath = json5aPath
+        writer = cli.convert(ifcFilePath, jsonFilePath, args)
+        return {'entities': sum(1 for _ in writer.ifcModel),
+                'outputBytes': fileSize(jsonFilePath)}
+    if not os.path.isfile(json4Path):
+        return {'skipped': 'no ifcJSON-4 output'}
+    if stage == 'read':
+        reader = ifcjson.IFCJSON.from_file(json4Path)
+        return {'entities': len(reader.data), 'outputBytes': None}
+    if stage == 'json2ifc':
+        ifcModel = ifcjson.JSON2IFC(json4Path).ifcModel()
+        ifcModel.write(roundtripPath)
+        return {'entities': sum(1 for _ in ifcModel),
+                'outputBytes': fileSize(roundtripPath)}
+    if stage == 'validate':
+        try:
+            import jsonschema
+        except ImportError:
+            return {'skipped': 'jsonschema is not installed'}
+        with open(json4Path, 'rb') as jsonFile:
+            instance = serialization.load(jsonFile)
+        if instance.get('schemaIdentifier') != 'IFC4':
+            return {'skipped': 'no json schema for ' + str(instance.get('schemaIdentifier'))}
+        with open(SCHEMA_PATH, 'rb') as schemaFile:
+            schema = serialization.load(schemaFile)
+        jsonschema.validate(instance, schema)
+        return {'entities': len(instance['data']), 'outputBytes': None}
+    raise ValueError('Unknown stage ' + stage)
+
+
+def measureStage(stage, ifcFilePath, workFolder, resultPath, backend=None):
+    """Runs a stage and writes the wall time and peak memory to a result file,
+    this is the entry point of the benchmark subprocess
+
+    Parameters:
+    stage (string): one of STAGES
+    ifcFilePath (string): input ifc file path
+    workFolder (string): folder for the files that are written by the stages
+    resultPath (string): json file the result is written to
+    backend (string): serialization backend, None for the fastest installed backend
+
+    """
+    if backend:
+        serialization.setBackend(backend)
+    start = perf_counter()
+    try:
+        result = runStage(stage, ifcFilePath, workFolder)
+    except Exception as e:
+        result = {'error': type(e).__name__ + ': ' + str(e)}
+    result['seconds'] = perf_counter() - start
+    result['peakRss'] = peakMemory()
+    result['backend'] = '/'.join(serialization.backendName())
+    with open(resultPath, 'w') as resultFile:
+        json.dump(result, resultFile)
+
+
+def benchmarkStage(stage, ifcFilePath, workFolder, backend=None, timeout=None):
+    """Runs a stage in a new python process, so the peak memory of every stage
+    is measured separately
+
+    Parameters:
+    stage (string): one of STAGES
+    ifcFilePath (string): input ifc file path
+    workFolder (string): folder for the files that are written by the stages
+    backend (string): serialization backend, None for the fastest installed backend
+    timeout (float): maximum number of seconds for the stage
+
+    Returns:
+    dict: stage result
+
+    """
+    resultPath = os.path.join(workFolder, stage + '.result.json')
+    if os.path.isfile(resultPath):
+        os.remove(resultPath)
+    command = [sys.executable, os.path.abspath(__file__), '--stage', stage,
+               ifcFilePath, workFolder, resultPath]
+    if backend:
+        command += ['--backend', backend]
+    try:
+        process = subprocess.run(command, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, timeout=timeout,
+                                 universal_newlines=True)
+    except subprocess.TimeoutExpired:
+        return {'error': 'Timeout after %s seconds' % timeout}
+    if not os.path.isfile(resultPath):
+        lines = process.stderr.strip().splitlines()
+        return {'error': lines[-1] if lines else 'Exit code %d' % process.returncode}
+    with open(resultPath) as resultFile:
+        result = json.load(resultFile)
+    if result.get('entities') and result['seconds'] > 0:
+        result['entitiesPerSecond'] = result['entities'] / result['seconds']
+    return result
+
+
+def bestResult(results):
+    """Returns the fastest result of repeated runs, errors are returned directly"""
+
+    for result in results:
+        if 'error' in result or 'skipped' in result:
+            return result
+    return min(results, key=lambda x: x['seconds'])
+
+
+def gitCommit():
+    """Returns the current commit hash and whether the working tree has local changes
+
+    Returns:
+    tuple: commit hash or None when git is not available, and dirty flag
+
+    """
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=SCRIPT_FOLDER,
+            stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+        status = subprocess.check_output(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SCRIPT_FOLDER,
+            stderr=subprocess.DEVNULL, universal_newlines=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(status.strip())
+
+
+def sampleFiles(folders):
+    """Returns the ifc files in the sample folders, roundtrip files are skipped
+
+    Parameters:
+    folders (list): folder paths, relative paths are resolved against the Samples folder
+
+    Returns:
+    list: ifc file paths
+
+    """
+    filePaths = []
+    for folder in folders:
+        if not os.path.isabs(folder) and not os.path.isdir(folder):
+            folder = os.path.join(SAMPLES_FOLDER, folder)
+        filePaths.extend(findIfcFiles(folder, exclude='_roundtrip'))
+    return filePaths
+
+
+def resultName(ifcFilePath):
+    """Returns the name of a file in the results, the path relative to the Samples folder
+    for sample files and the file name for other files"""
+
+    relativePath = os.path.relpath(
+        os.path.abspath(ifcFilePath), os.path.abspath(SAMPLES_FOLDER))
+    if relativePath.startswith(os.pardir):
+        return os.path.basename(ifcFilePath)
+    return relativePath
+
+
+def scaleFiles(sizes, folder, seed=0):
+    """Writes a synthetic model for every size
+
+    Parameters:
+    sizes (list): model sizes like "4x500", storeys x elements per storey
+    folder (string): output folder
+    seed (int): seed of the synthetic models
+
+    Returns:
+    list: ifc file paths
+
+    """
+    filePaths = []
+    for size in sizes:
+        storeys, elements = [int(x) for x in size.lower().split('x')]
+        filePath = os.path.join(
+            folder, generate.modelName(storeys, elements) + '.ifc')
+        generate.writeModel(storeys, elements, filePath, seed=seed)
+        filePaths.append(filePath)
+    return filePaths
+
+
+def plotResults(document, plotPath):
+    """Plots the time and peak memory of every stage against the number of entities
+    in the model, requires matplotlib
+
+    Parameters:
+    document (dict): results document
+    plotPath (string): image file path
+
+    """
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as pyplot
+    except ImportError:
+        print('matplotlib is not installed, no plot is created')
+        return
+    results = [x for x in document['results']
+               if not 'error' in x and not 'skipped' in x]
+
+    # The model size is the number of entities in the ifc file
+    sizes = {x['file']: x['entities']
+             for x in results if x['stage'] == 'ifc2json4'}
+    series = {}
+    for result in results:
+        if result['file'] in sizes:
+            series.setdefault((result['stage'], result['backend']), []).append(
+                (sizes[result['file']], result['seconds'], (result.get('peakRss') or 0) / 1048576))
+    backends = {backend for stage, backend in series}
+    figure, (timeAxes, memoryAxes) = pyplot.subplots(1, 2, figsize=(12, 5))
+    for (stage, backend), points in sorted(series.items(), key=lambda x: stageOrder((x[0], None))):
+        points.sort()
+        label = stage if len(backends) == 1 else stage + ' ' + backend
+        timeAxes.plot([x[0] for x in points], [x[1] for x in points],
+                      marker='o', label=label)
+        memoryAxes.plot([x[0] for x in points], [x[2] for x in points],
+                        marker='o', label=label)
+    timeAxes.set_xlabel('Entities')
+    timeAxes.set_ylabel('Seconds')
+    memoryAxes.set_xlabel('Entities')
+    memoryAxes.set_ylabel('Peak memory (MB)')
+    timeAxes.legend()
+    figure.suptitle('Commit %s' % document['commit'])
+    figure.savefig(plotPath)
+    print('Plot written to ' + plotPath)
+
+
+def benchmarkSuite(filePaths, stages=STAGES, repeat=1, backends=None, timeout=None):
+    """Runs the benchmark stages for all files
+
+    Parameters:
+    filePaths (list): ifc file paths
+    stages (list): stages to run, the ifc2json4 stage is always run first
+        when one of the stages depends on its output
+    repeat (int): number of runs per stage, the fastest is reported
+    backends (list): serialization backends that are compared for the BACKEND_STAGES,
+        None for only the fastest installed backend
+    timeout (float): maximum number of seconds per stage
+
+    Returns:
+    dict: results document with the environment and a result per file and stage
+
+    """
+    commit, dirty = gitCommit()
+    document = {
+        'commit': commit,
+        'dirty': dirty,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'ifcopenshell': getattr(ifcopenshell, 'version', None),
+        'repeat': repeat,
+        'results': []
+    }
+    for ifcFilePath in filePaths:
+        fileName = resultName(ifcFilePath)
+        with tempfile.TemporaryDirectory() as workFolder:
+            for stage in STAGES:
+                if not stage in stages and not (stage == 'ifc2json4' and set(stages) & set(JSON4_STAGES)):
+                    continue
+                if backends and stage in BACKEND_STAGES:
+                    stageBackends = backends
+                else:
+                    stageBackends = [None]
+                for backend in stageBackends:
+                    result = bestResult([benchmarkStage(
+                        stage, ifcFilePath, workFolder, backend, timeout) for i in range(repeat)])
+                    result['file'] = fileName
+                    result['stage'] = stage
+                    document['results'].append(result)
+                    printResult(result)
+    return document
+
+
+def printResult(result):
+    name = '%-10s %-60s' % (result['stage'], result['file'])
+    if 'error' in result:
+        print(name + ' ERROR ' + result['error'])
+    elif 'skipped' in result:
+        print(name + ' skipped, ' + result['skipped'])
+    else:
+        rss = result.get('peakRss')
+        print(name + ' %8.3f s %8s MB %10s entities/s %s' % (
+            result['seconds'],
+            '%.1f' % (rss / 1048576) if rss else '-',
+            '%.0f' % result['entitiesPerSecond'] if result.get(
+                'entitiesPerSecond') else '-',
+            result.get('backend', '')))
+
+
+def stageTotals(results):
+    """Returns the total time and maximum peak memory per stage and backend
+    of the successful results
+
+    Returns:
+    dict: (stage, backend) tuple to dict with seconds, peakRss and files
+
+    """
+    totals = {}
+    for result in results:
+        if 'error' in result or 'skipped' in result:
+            continue
+        key = (result['stage'], result.get('backend'))
+        total = totals.setdefault(
+            key, {'seconds': 0.0, 'peakRss': 0, 'files': 0})
+        total['seconds'] += result['seconds']
+        total['peakRss'] = max(total['peakRss'], result.get('peakRss') or 0)
+        total['files'] += 1
+    return totals
+
+
+def stageOrder(item):
+    """Sort key for stageTotals items, in order of execution"""
+
+    (stage, backend), total = item
+    return STAGES.index(stage), backend or ''
+
+
+def printSummary(document):
+    results = document['results']
+    print('\nCommit %s%s' % (document['commit'],
+                             ' (with local changes)' if document['dirty'] else ''))
+    for (stage, backend), total in sorted(stageTotals(results).items(), key=stageOrder):
+        print('%-10s %-16s %4d files %9.3f s, peak %.1f MB' % (
+            stage, backend, total['files'], total['seconds'], total['peakRss'] / 1048576))
+    errors = sum(1 for x in results if 'error' in x)
+    if errors:
+        print('%d stages failed' % errors)
+
+
+def compareResults(base, current, threshold):
+    """Prints the change in time and memory between two benchmark results documents,
+    only results that exist in both documents are compared
+
+    Parameters:
+    base (dict): results document of the reference commit
+    current (dict): results document of the new commit
+    threshold (float): relative change in time above which a file is reported, like 0.1 for 10%
+
+    Returns:
+    int: number of regressions above the threshold
+
+    """
+    print('Comparing %s with %s' % (current['commit'], base['commit']))
+    baseResults = {(x['file'], x['stage'], x.get('backend')): x for x in base['results']
+                   if not 'error' in x and not 'skipped' in x}
+    currentResults = {(x['file'], x['stage'], x.get('backend')): x for x in current['results']
+                      if not 'error' in x and not 'skipped' in x}
+    keys = sorted(set(baseResults) & set(currentResults),
+                  key=lambda x: (x[0], x[1], x[2] or ''))
+    baseTotals = stageTotals([baseResults[x] for x in keys])
+    currentTotals = stageTotals([currentResults[x] for x in keys])
+    for key, total in sorted(currentTotals.items(), key=stageOrder):
+        baseTotal = baseTotals[key]
+        print('%-10s %-16s %9.3f s -> %9.3f s (%+6.1f%%), peak %.1f MB -> %.1f MB' % (
+            key[0], key[1], baseTotal['seconds'], total['seconds'],
+            (total['seconds'] / baseTotal['seconds'] - 1) * 100,
+            baseTotal['peakRss'] / 1048576, total['peakRss'] / 1048576))
+    regressions = 0
+    for key in keys:
+        baseSeconds = baseResults[key]['seconds']
+        seconds = currentResults[key]['seconds']
+        if seconds > baseSeconds * (1 + threshold) and seconds - baseSeconds > MIN_DIFFERENCE:
+            regressions += 1
+            print('Slower: %-10s %s %.3f s -> %.3f s' %
+                  (key[1], key[0], baseSeconds, seconds))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Measure the performance of the ifcJSON writers and readers')
+    parser.add_argument('-i', type=str,
+                        help='input ifc file path, compares the per-entity cost of the ifcJSON-4 writer in the working tree with --revision')
+    parser.add_argument('--revision', type=str, default='HEAD',
+                        help='git revision the working tree is compared with by -i, default is HEAD')
+    parser.add_argument('--serialization', action='store_true',
+                        help='Compare the encoding and decoding time of every installed json backend with the standard json module for the ifcJSON-4 output of -i')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='Number of runs per writer or stage, the fastest is reported, default is 3')
+    parser.add_argument('--suite', action='store_true',
+                        help='Run all stages for the sample files and store the results as json')
+    parser.add_argument('--scale', type=str, nargs='*',
+                        help='Run all stages for synthetic models of increasing size, like 4x500 for 4 storeys of 500 elements, default is ' + ' '.join(SCALE_SERIES))
+    parser.add_argument('--plot', type=str,
+                        help='Plot the time and memory per stage against the model size to this image file, requires matplotlib')
+    parser.add_argument('--samples', type=str, nargs='+', default=list(SAMPLE_FOLDERS),
+                        help='Sample folders relative to the Samples folder, or folder paths, default is ' + ' '.join(SAMPLE_FOLDERS))
+    parser.add_argument('--stages', type=str, nargs='+', default=list(STAGES), choices=STAGES,
+                        help='Stages to run, default is all stages')
+    parser.add_argument('--backends', action='store_true',
+                        help='Repeat the ' + ', '.join(BACKEND_STAGES) + ' stages for every installed json backend')
+    parser.add_argument('--timeout', type=float, default=600,
+                        help='Maximum number of seconds per stage, default is 600')
+    parser.add_argument('-o', type=str,
+                        help='results json file path, default is benchmark_<commit>.json')
+    parser.add_argument('--compare', type=str, nargs=2, metavar=('BASE', 'CURRENT'),
+                        help='Compare two results json files')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative slowdown per file that is reported by --compare, default is 0.1')
+    parser.add_argument('--stage', type=str, nargs=4, help=argparse.SUPPRESS)
+    parser.add_argument('--backend', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.stage:
+        measureStage(*args.stage, backend=args.backend)
+    elif args.compare:
+        with open(args.compare[0]) as baseFile, open(args.compare[1]) as currentFile:
+            regressions = compareResults(
+                json.load(baseFile), json.load(currentFile), args.threshold)
+        sys.exit(1 if regressions else 0)
+    elif args.suite or args.scale is not None:
+        if args.backends:
+            backends = serialization.availableBackends()
+        else:
+            backends = None
+        if args.scale is not None:
+            with tempfile.TemporaryDirectory() as modelFolder:
+                document = benchmarkSuite(scaleFiles(args.scale or SCALE_SERIES, modelFolder),
+                                          args.stages, args.repeat, backends, args.timeout)
+            prefix = 'benchmark_scale_'
+        else:
+            document = benchmarkSuite(sampleFiles(args.samples), args.stages,
+                                      args.repeat, backends, args.timeout)
+            prefix = 'benchmark_'
+        printSummary(document)
+        if args.o:
+            resultsPath = args.o
+        else:
+            resultsPath = prefix + \
+                '%s.json' % (document['commit'] or 'unknown')[:8]
+        with open(resultsPath, 'w') as resultsFile:
+            json.dump(document, resultsFile, indent=2)
+        print('Results written to ' + resultsPath)
+        if args.plot:
+            plotResults(document, args.plot)
+    elif args.i and os.path.isfile(args.i) and args.serialization:
+        data = ifcjson.IFC2JSON4(args.i).spf2Json()
+        results = serializationCost(data, args.repeat)
+        base = results['json']
+        print('%-10s %15s %15s %15s' % ('backend', 'dumps', 'dumps indent', 'loads'))
+        for name, seconds in results.items():
+            print('%-10s' % name + ''.join(' %7.3f s %4.1fx' % (x, b / x if x else 0)
+                                             for x, b in zip(seconds, base)))
+    elif args.i and os.path.isfile(args.i):
+        ifcFilePath = os.path.abspath(args.i)
+        revisionCost, currentCost = compareRevision(
+            args.revision, ifcFilePath, args.repeat)
+        print("%-14s %.2f us per entity" % (args.revision + ':', revisionCost))
+        print("%-14s %.2f us per entity" % ('Working tree:', currentCost))
+        print("Speedup: %.2fx" % (revisionCost / currentCost))
+    else:
+        print(str(args.i) + ' is not a valid file')
@@ -0,0 +1,282 @@
+# IFCJSON_python - generate.py
+# Generate synthetic IFC models of a configurable size for scale testing
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Models contain a site and building with a number of storeys, every storey
+contains the same number of elements on a grid. Every element has a placement
+relative to its storey, its own tessellated box geometry, a property set and a
+material, so all parts of the converters are exercised. Elements in the same grid
+cell on different storeys share the location of their placement, as in real
+models. Models with the same size and seed are identical.
+"""
+
+import math
+import uuid
+import random
+import argparse
+import ifcopenshell
+import ifcopenshell.guid as guid
+import ifcopenshell.template
+import ifcjson.cli as cli
+
+# Element types with the box dimensions and elevation above the storey
+ELEMENT_TYPES = (
+    ('IfcWall', (4.0, 0.2, 3.0), 0.0),
+    ('IfcColumn', (0.4, 0.4, 3.0), 0.0),
+    ('IfcBeam', (4.0, 0.3, 0.5), 2.5),
+    ('IfcSlab', (4.0, 4.0, 0.2), -0.2)
+)
+
+MATERIALS = ('Concrete', 'Steel', 'Timber')
+
+STOREY_HEIGHT = 3.0
+GRID_SIZE = 5.0
+
+# Triangles of a box with the corners numbered as in boxPoints, 1 based
+BOX_TRIANGLES = (
+    (1, 3, 2), (1, 4, 3), (5, 6, 7), (5, 7, 8),
+    (1, 2, 6), (1, 6, 5), (2, 3, 7), (2, 7, 6),
+    (3, 4, 8), (3, 8, 7), (4, 1, 5), (4, 5, 8)
+)
+
+
+class ModelGenerator:
+    def __init__(self, seed=0):
+        """Creates synthetic IFC4 models
+
+        parameters:
+        seed (int): seed of the random GlobalIds and dimension variations
+
+        """
+        self.random = random.Random(seed)
+        self.model = None
+
+    def newGuid(self):
+        return guid.compress(uuid.UUID(int=self.random.getrandbits(128)).hex)
+
+    def createModel(self, storeys, elements):
+        """Creates a model with the given number of storeys and elements per storey
+
+        Parameters:
+        storeys (int): number of building storeys
+        elements (int): number of elements per storey
+
+        Returns:
+        ifcopenshell model instance
+
+        """
+        self.model = ifcopenshell.template.create(
+            schema_identifier='IFC4',
+            project_globalid=self.newGuid(),
+            project_name='Synthetic model %d x %d' % (storeys, elements),
+            timestamp=0,
+            timestring='1970-01-01T00:00:00')
+        model = self.model
+        self.ownerHistory = model.by_type('IfcOwnerHistory')[0]
+        project = model.by_type('IfcProject')[0]
+        context = model.by_type('IfcGeometricRepresentationContext')[0]
+        self.bodyContext = model.createIfcGeometricRepresentationSubContext(
+            'Body', 'Model', None, None, None, None, context, None, 'MODEL_VIEW', None)
+
+        # Directions are shared by all placements, and the axis placement by all
+        # placements at the same location, like elements in the same grid cell
+        self.zAxis = model.createIfcDirection((0., 0., 1.))
+        self.xAxis = model.createIfcDirection((1., 0., 0.))
+        self.axisPlacements = {}
+
+        sitePlacement = self.createPlacement(None, (0., 0., 0.))
+        site = self.createRoot('IfcSite', 'Site', ObjectPlacement=sitePlacement,
+                               CompositionType='ELEMENT')
+        buildingPlacement = self.createPlacement(sitePlacement, (0., 0., 0.))
+        building = self.createRoot('IfcBuilding', 'Building', ObjectPlacement=buildingPlacement,
+                                   CompositionType='ELEMENT')
+        self.createRoot('IfcRelAggregates', None,
+                        RelatingObject=project, RelatedObjects=[site])
+        self.createRoot('IfcRelAggregates', None,
+                        RelatingObject=site, RelatedObjects=[building])
+
+        materialElements = {}
+        for name in MATERIALS:
+            materialElements[model.createIfcMaterial(name, None, None)] = []
+
+        storeyEntities = []
+        columns = int(math.ceil(math.sqrt(elements)))
+        for storeyIndex in range(storeys):
+            elevation = storeyIndex * STOREY_HEIGHT
+            storeyPlacement = self.createPlacement(
+                buildingPlacement, (0., 0., elevation))
+            storey = self.createRoot('IfcBuildingStorey', 'Level %d' % storeyIndex,
+                                     ObjectPlacement=storeyPlacement,
+                                     CompositionType='ELEMENT', Elevation=elevation)
+            storeyEntities.append(storey)
+            products = []
+            for elementIndex in range(elements):
+                number = storeyIndex * elements + elementIndex
+                location = ((elementIndex % columns) * GRID_SIZE,
+                            (elementIndex // columns) * GRID_SIZE)
+                element = self.createElement(
+                    number, storeyPlacement, location)
+                products.append(element)
+                materialElements[list(materialElements)[
+                    number % len(MATERIALS)]].append(element)
+            self.createRoot('IfcRelContainedInSpatialStructure', None,
+                            RelatingStructure=storey, RelatedElements=products)
+        if storeyEntities:
+            self.createRoot('IfcRelAggregates', None,
+                            RelatingObject=building, RelatedObjects=storeyEntities)
+        for material, products in materialElements.items():
+            if products:
+                self.createRoot('IfcRelAssociatesMaterial', None,
+                                RelatedObjects=products, RelatingMaterial=material)
+        return model
+
+    def createRoot(self, entityType, name, **attributes):
+        return self.model.create_entity(entityType, GlobalId=self.newGuid(),
+                                        OwnerHistory=self.ownerHistory, Name=name, **attributes)
+
+    def createPlacement(self, relativeTo, location):
+        if not location in self.axisPlacements:
+            point = self.model.createIfcCartesianPoint(location)
+            self.axisPlacements[location] = self.model.createIfcAxis2Placement3D(
+                point, self.zAxis, self.xAxis)
+        return self.model.createIfcLocalPlacement(relativeTo, self.axisPlacements[location])
+
+    def createElement(self, number, storeyPlacement, location):
+        """Creates an element with a placement, box geometry and property set
+
+        Parameters:
+        number (int): element number, determines the element type
+        storeyPlacement: IfcLocalPlacement of the storey
+        location (tuple): x and y coordinate on the storey
+
+        Returns:
+        ifcopenshell IfcElement instance
+
+        """
+        entityType, size, elevation = ELEMENT_TYPES[number % len(ELEMENT_TYPES)]
+
+        # Vary the dimensions so the meshes are not all the same
+        size = tuple(x * self.random.uniform(0.9, 1.1) for x in size)
+        placement = self.createPlacement(
+            storeyPlacement, (location[0], location[1], elevation))
+        representation = self.model.createIfcShapeRepresentation(
+            self.bodyContext, 'Body', 'Tessellation', [self.createBox(size)])
+        element = self.createRoot(entityType, '%s %d' % (entityType[3:], number),
+                                  ObjectPlacement=placement,
+                                  Representation=self.model.createIfcProductDefinitionShape(
+                                      None, None, [representation]),
+                                  Tag=str(number))
+        properties = [
+            self.model.createIfcPropertySingleValue(
+                'Reference', None, self.model.create_entity('IfcIdentifier', '%s-%d' % (entityType[3:], number)), None),
+            self.model.createIfcPropertySingleValue(
+                'IsExternal', None, self.model.create_entity('IfcBoolean', number % 2 == 0), None),
+            self.model.createIfcPropertySingleValue(
+                'LoadBearing', None, self.model.create_entity('IfcBoolean', entityType != 'IfcWall'), None)
+        ]
+        propertySet = self.createRoot('IfcPropertySet', 'Pset_%sCommon' % entityType[3:],
+                                      HasProperties=properties)
+        self.createRoot('IfcRelDefinesByProperties', None,
+                        RelatedObjects=[element], RelatingPropertyDefinition=propertySet)
+        return element
+
+    def createBox(self, size):
+        points = self.model.createIfcCartesianPointList3D(boxPoints(size))
+        return self.model.createIfcTriangulatedFaceSet(points, None, True, BOX_TRIANGLES, None)
+
+
+def boxPoints(size):
+    """Returns the corner points of a box, bottom corners first
+
+    Parameters:
+    size (tuple): x, y and z dimension
+
+    Returns:
+    tuple: 8 points
+
+    """
+    x, y, z = size
+    return ((0., 0., 0.), (x, 0., 0.), (x, y, 0.), (0., y, 0.),
+            (0., 0., z), (x, 0., z), (x, y, z), (0., y, z))
+
+
+def createModel(storeys, elements, seed=0):
+    """Creates a synthetic IFC4 model
+
+    Parameters:
+    storeys (int): number of building storeys
+    elements (int): number of elements per storey
+    seed (int): seed of the random GlobalIds and dimension variations
+
+    Returns:
+    ifcopenshell model instance
+
+    """
+    return ModelGenerator(seed).createModel(storeys, elements)
+
+
+def modelName(storeys, elements):
+    return 'synthetic_%dx%d' % (storeys, elements)
+
+
+def writeModel(storeys, elements, ifcFilePath, jsonFilePath=None, seed=0):
+    """Writes a synthetic model as IFC SPF and optionally as ifcJSON-4
+
+    Parameters:
+    storeys (int): number of building storeys
+    elements (int): number of elements per storey
+    ifcFilePath (string): output ifc file path
+    jsonFilePath (string): output json file path, None to only write the ifc file
+    seed (int): seed of the random GlobalIds and dimension variations
+
+    """
+    createModel(storeys, elements, seed).write(ifcFilePath)
+    if jsonFilePath:
+        parser = argparse.ArgumentParser()
+        cli.addConversionArguments(parser)
+        cli.convert(ifcFilePath, jsonFilePath, parser.parse_args([]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generate a synthetic IFC model of a configurable size for scale testing')
+    parser.add_argument('-s', '--storeys', type=int, default=10,
+                        help='Number of building storeys, default is 10')
+    parser.add_argument('-e', '--elements', type=int, default=100,
+                        help='Number of elements per storey, default is 100')
+    parser.add_argument('-o', type=str,
+                        help='output ifc file path, default is synthetic_<storeys>x<elements>.ifc')
+    parser.add_argument('-j', '--json', type=str,
+                        help='Also write the model as ifcJSON-4 to this json file path')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the random GlobalIds and dimension variations, default is 0')
+    args = parser.parse_args()
+    if args.o:
+        ifcFilePath = args.o
+    else:
+        ifcFilePath = modelName(args.storeys, args.elements) + '.ifc'
+    writeModel(args.storeys, args.elements,
+               ifcFilePath, args.json, args.seed)
+    print('Model written to ' + ifcFilePath)
@@ -27,8 +27,7 @@
 from time import perf_counter
 import os
 import argparse
-import json
-import ifcjson
+import ifcjson.cli as cli
 
 t1_start = perf_counter()
 
@@ -37,62 +36,23 @@ if __name__ == '__main__':
         description='Convert IFC SPF file to ifcJSON')
     parser.add_argument('-i', type=str, help='input ifc file path')
     parser.add_argument('-o', type=str, help='output json file path')
-    parser.add_argument(
-        '-v', type=str, help='ifcJSON version, options: "4"(default), "5a"')
-    parser.add_argument('-c', '--compact', action='store_true',
-                        help='Pretty print is turned off and references are created without informative "type" property')
-    parser.add_argument('-n', '--no_inverse', action='store_true',
-                        help='Inverse relationships will be explicitly added to entities for version 4, default is True')
-    parser.add_argument('-e', '--empty_properties', action='store_true',
-                        help='Include empty properties, default is False')
-    parser.add_argument('-w', '--no_ownerhistory', action='store_true',
-                        help='Remove IfcOwnerHistory for version 4, default is False. WARNING: THIS BREAKS THE IFC SCHEMA!')
-    parser.add_argument('-g', '--geometry', type=str,
-                        help='Set geometry output type: "none", "tessellate", "unchanged"(default) WARNING: SETTING TO NONE MIGHT BREAK THE IFC SCHEMA!')
+    cli.addConversionArguments(parser)
+    cli.addProfileArguments(parser)
     # parser.add_argument('NO_GEOMETRY', action='store_true')
     args = parser.parse_args()
-    if args.i:
-        ifcFilePath = args.i
-    if args.compact:
-        indent = None
-        COMPACT = True
-    else:
-        indent = 2
-        COMPACT = False
-    if args.geometry:
-        if args.geometry == "none":
-            GEOMETRY = False
-        elif args.geometry == "tessellate":
-            GEOMETRY = "tessellate"
-        else:
-            GEOMETRY = True
-    else:
-        GEOMETRY = True
 
-    if os.path.isfile(ifcFilePath):
+    if args.i and os.path.isfile(args.i):
+        ifcFilePath = args.i
         if args.o:
             jsonFilePath = args.o
         else:
             jsonFilePath = os.path.splitext(ifcFilePath)[0] + '.json'
-        if not args.v or args.v == "4":
-            jsonData = ifcjson.IFC2JSON4(ifcFilePath,
-                                         COMPACT,
-                                         NO_INVERSE=args.no_inverse,
-                                         EMPTY_PROPERTIES=args.empty_properties,
-                                         NO_OWNERHISTORY=args.no_ownerhistory,
-                                         GEOMETRY=GEOMETRY
-                                         ).spf2Json()
-            with open(jsonFilePath, 'w') as outfile:
-                json.dump(jsonData, outfile, indent=indent)
-        elif args.v == "5a":
-            jsonData = ifcjson.IFC2JSON5a(ifcFilePath,
-                                          COMPACT,
-                                          EMPTY_PROPERTIES=args.empty_properties
-                                          ).spf2Json()
-            with open(jsonFilePath, 'w') as outfile:
-                json.dump(jsonData, outfile, indent=indent)
-        else:
+        if args.v and not args.v in cli.VERSIONS:
             print('Version ' + args.v + ' is not supported')
+        else:
+            instrumentation = cli.startInstrumentation(args)
+            cli.convert(ifcFilePath, jsonFilePath, args, instrumentation)
+            cli.finishInstrumentation(instrumentation, args)
     else:
         print(str(args.i) + ' is not a valid file')
 t1_stop = perf_counter()
@@ -1,4 +1,6 @@
 from ifcjson.ifc2json4 import IFC2JSON4
 from ifcjson.ifc2json5a import IFC2JSON5a
 from ifcjson.reader import IFCJSON
-# from ifcjson.to_ifcopenshell import JSON2IFC
+from ifcjson.buffer import BinaryBuffer
+from ifcjson.cache import TessellationCache
+from ifcjson.to_ifcopenshell import JSON2IFC
@@ -0,0 +1,179 @@
+# IFCJSON_python - buffer.py
+# Binary buffers for numeric geometry data
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Large numeric lists like tessellation coordinates and indices can be stored in
+a separate binary file instead of as JSON numbers. The JSON value is replaced by
+an accessor object, similar to glTF, that refers to a part of the binary file:
+
+    {
+        "type": "bufferAccessor",
+        "buffer": "model.bin",
+        "byteOffset": 0,
+        "byteLength": 96,
+        "componentType": "float64",
+        "count": 4,
+        "itemSize": 3
+    }
+
+Values are stored little endian, and every accessor starts at a multiple of
+8 bytes so the values can be read directly from a memory mapped file.
+
+Values are appended to the binary file while the ifcJSON file is written, only
+the size of the file is kept in memory.
+"""
+
+import array
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+
+ACCESSOR_TYPE = 'bufferAccessor'
+
+# Python array typecodes by accessor component type
+COMPONENT_TYPES = {
+    'float64': 'd',
+    'float32': 'f',
+    'int32': 'i'
+}
+
+ALIGNMENT = 8
+
+
+def isAccessor(value):
+    """Checks if a JSON value is a buffer accessor"""
+
+    return type(value) is dict and value.get('type') == ACCESSOR_TYPE
+
+
+class BinaryBuffer:
+    def __init__(self, uri, filePath=None):
+        """Binary buffer that collects numeric lists while an ifcJSON file is written
+
+        parameters:
+        uri (string): binary file path relative to the ifcJSON file, used in the accessors
+        filePath (string): file the values are written to, if not set then the values are
+            written to a temporary file that is copied by save()
+
+        """
+        self.uri = uri
+        self.filePath = filePath
+        if filePath is None:
+            self.file = tempfile.TemporaryFile()
+        else:
+            self.file = open(filePath, 'wb')
+
+        # Number of bytes written
+        self.size = 0
+
+    def addAccessor(self, values, componentType, itemSize=3):
+        """Appends a list of numbers to the buffer
+
+        Parameters:
+        values: flat list of numbers or list of items with itemSize numbers each
+        componentType (string): 'float64', 'float32' or 'int32'
+        itemSize (int): number of values per item, 3 for points and triangles
+
+        Returns:
+        dict: accessor object that replaces the values in the JSON
+
+        """
+        if len(values) and isinstance(values[0], (list, tuple)):
+            values = itertools.chain.from_iterable(values)
+        values = array.array(COMPONENT_TYPES[componentType], values)
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        # Pad the buffer so the values are aligned
+        padding = -self.size % ALIGNMENT
+        if padding:
+            self.file.write(bytes(padding))
+            self.size += padding
+
+        accessor = {
+            'type': ACCESSOR_TYPE,
+            'buffer': self.uri,
+            'byteOffset': self.size,
+            'byteLength': len(values) * values.itemsize,
+            'componentType': componentType,
+            'count': len(values) // itemSize,
+            'itemSize': itemSize
+        }
+        values.tofile(self.file)
+        self.size += accessor['byteLength']
+        return accessor
+
+    def close(self):
+        self.file.close()
+
+    def save(self, filePath=None):
+        """Completes the binary file and closes the buffer
+
+        Parameters:
+        filePath (string): binary file path, the temporary file is copied to this path,
+            not needed when the buffer was created with a file path
+
+        """
+        if filePath is None or (self.filePath is not None and
+                                os.path.abspath(filePath) == os.path.abspath(self.filePath)):
+            self.close()
+            return
+        self.file.flush()
+        self.file.seek(0)
+        with open(filePath, 'wb') as bufferFile:
+            shutil.copyfileobj(self.file, bufferFile)
+        self.close()
+
+
+def accessorValues(data, accessor):
+    """Returns the flat list of values of an accessor, without copying
+    when possible
+
+    Parameters:
+    data: bytes, mmap or other buffer containing the binary file
+    accessor (dict): accessor object
+
+    Returns:
+    memoryview or array: values in the accessor component type
+
+    """
+    componentType = accessor['componentType']
+    if not componentType in COMPONENT_TYPES:
+        raise ValueError('Unsupported component type "%s"' % componentType)
+    start = accessor['byteOffset']
+    end = start + accessor['byteLength']
+    view = memoryview(data)[start:end]
+    if len(view) != accessor['byteLength']:
+        raise ValueError('Buffer accessor exceeds the length of ' + accessor['buffer'])
+    typecode = COMPONENT_TYPES[componentType]
+
+    # Values are stored little endian and need to be converted on big endian systems
+    if sys.byteorder == 'big':
+        values = array.array(typecode, view.tobytes())
+        values.byteswap()
+        return values
+    return view.cast(typecode)
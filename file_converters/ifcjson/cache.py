@@ -0,0 +1,193 @@
+# IFCJSON_python - cache.py
+# Persistent cache for tessellated product geometry
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Every cached mesh is stored in its own file, named after the hash of the
+product geometry. The least recently used files are removed when the total size
+of the cache exceeds its maximum size, the file modification time is used to
+track usage so the cache can be shared between runs and processes.
+"""
+
+import array
+import os
+import struct
+import sys
+import tempfile
+
+CACHE_VERSION = 1
+
+# Magic, version, number of vertex coordinates and number of face indices
+HEADER = struct.Struct('<4sIII')
+MAGIC = b'IFCT'
+
+# Column major 4x4 placement matrix
+MATRIX_SIZE = 16
+
+EXTENSION = '.mesh'
+
+# Default maximum cache size in bytes
+DEFAULT_SIZE = 1024 * 1024 * 1024
+
+# Fraction of the maximum size the cache is reduced to when it is full
+PRUNE_FRACTION = 0.9
+
+
+class TessellationCache:
+    def __init__(self, directory, maxSize=DEFAULT_SIZE):
+        """On disk cache of tessellated meshes
+
+        parameters:
+        directory (string): cache folder, created when it does not exist
+        maxSize (int): maximum total size of the cache in bytes
+
+        """
+        self.directory = directory
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self.size = self.totalSize()
+
+    def path(self, key):
+        # Subfolders keep the number of files per folder small
+        return os.path.join(self.directory, key[:2], key + EXTENSION)
+
+    def cacheFiles(self):
+        """Returns path, size and modification time of all cached meshes
+
+        Returns:
+        list
+
+        """
+        files = []
+        for folder in os.scandir(self.directory):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith(EXTENSION):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((entry.path, stat.st_size, stat.st_mtime_ns))
+        return files
+
+    def totalSize(self):
+        return sum(size for path, size, mtime in self.cacheFiles())
+
+    def get(self, key):
+        """Returns the cached mesh for a key
+
+        Parameters:
+        key (string): hexadecimal hash of the product geometry and settings
+
+        Returns:
+        tuple: flat vertex list, flat face list and placement matrix, or None if not cached
+
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as meshFile:
+                data = meshFile.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            magic, version, vertexCount, faceCount = HEADER.unpack_from(data)
+            if magic != MAGIC or version != CACHE_VERSION:
+                raise ValueError('Unknown cache file format')
+            offset = HEADER.size
+            values = []
+            for typecode, count in (('d', MATRIX_SIZE), ('d', vertexCount), ('i', faceCount)):
+                value = array.array(typecode)
+                end = offset + count * value.itemsize
+                value.frombytes(data[offset:end])
+                if sys.byteorder == 'big':
+                    value.byteswap()
+                values.append(value)
+                offset = end
+            if offset != len(data):
+                raise ValueError('Invalid cache file length')
+        except (ValueError, struct.error):
+
+            # Damaged or outdated cache files are replaced
+            self.misses += 1
+            return None
+
+        # Mark the mesh as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        matrix, verts, faces = values
+        return verts.tolist(), faces.tolist(), tuple(matrix)
+
+    def put(self, key, verts, faces, matrix):
+        """Adds a mesh to the cache, failing to write is not an error
+
+        Parameters:
+        key (string): hexadecimal hash of the product geometry and settings
+        verts (tuple): flat list of vertex coordinates
+        faces (tuple): flat list of triangle vertex indices
+        matrix (tuple): column major 4x4 placement matrix
+
+        """
+        values = [array.array('d', matrix), array.array(
+            'd', verts), array.array('i', faces)]
+        if sys.byteorder == 'big':
+            for value in values:
+                value.byteswap()
+        data = HEADER.pack(MAGIC, CACHE_VERSION, len(verts), len(faces)) + \
+            b''.join(value.tobytes() for value in values)
+        path = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Files are written completely before they are visible to other processes
+            fd, temporaryPath = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as meshFile:
+                meshFile.write(data)
+            os.replace(temporaryPath, path)
+        except OSError as e:
+            print(str(e) + ': Unable to write tessellation cache ' + path)
+            return
+        self.size += len(data)
+        if self.size > self.maxSize:
+            self.prune()
+
+    def prune(self):
+        """Removes the least recently used meshes until the cache is below its maximum size"""
+
+        files = sorted(self.cacheFiles(), key=lambda x: x[2])
+        self.size = sum(size for path, size, mtime in files)
+        for path, size, mtime in files:
+            if self.size <= self.maxSize * PRUNE_FRACTION:
+                break
+            try:
+                os.remove(path)
+                self.size -= size
+            except OSError:
+                pass
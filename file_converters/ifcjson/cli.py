@@ -0,0 +1,244 @@
+# IFCJSON_python - cli.py
+# Command line options shared by the conversion scripts
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import tempfile
+import ifcjson
+import ifcjson.serialization as serialization
+from ifcjson.instrumentation import Instrumentation
+
+# Supported ifcJSON versions
+VERSIONS = ('4', '5a')
+
+
+def addConversionArguments(parser):
+    """Adds the ifcJSON writer options to a command line parser
+
+    Parameters:
+    parser (argparse.ArgumentParser)
+
+    """
+    parser.add_argument(
+        '-v', type=str, help='ifcJSON version, options: "4"(default), "5a"')
+    parser.add_argument('-c', '--compact', action='store_true',
+                        help='Pretty print is turned off and references are created without informative "type" property')
+    parser.add_argument('-n', '--no_inverse', action='store_true',
+                        help='Inverse relationships will be explicitly added to entities for version 4, default is True')
+    parser.add_argument('-e', '--empty_properties', action='store_true',
+                        help='Include empty properties, default is False')
+    parser.add_argument('-w', '--no_ownerhistory', action='store_true',
+                        help='Remove IfcOwnerHistory for version 4, default is False. WARNING: THIS BREAKS THE IFC SCHEMA!')
+    parser.add_argument('-g', '--geometry', type=str,
+                        help='Set geometry output type: "none", "tessellate", "unchanged"(default) WARNING: SETTING TO NONE MIGHT BREAK THE IFC SCHEMA!')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of geometry worker threads used for tessellation and OBJ generation, default is 1')
+    parser.add_argument('-d', '--deduplicate', action='store_true',
+                        help='Write entities without GlobalId that are referenced more than once as separate objects for version 4, default is False')
+    parser.add_argument('-p', '--precision', type=int,
+                        help='Number of decimals of OBJ vertex coordinates for version 5a, default is full precision')
+    parser.add_argument('-b', '--binary', action='store_true',
+                        help='Write tessellated geometry and OBJ meshes to a binary buffer file next to the json file, default is False')
+    parser.add_argument('-s', '--share_meshes', action='store_true',
+                        help='Products with the same tessellated geometry share a single mesh, default is False')
+    parser.add_argument('--cache', type=str,
+                        help='Tessellation cache folder, tessellated geometry is reused from earlier conversions')
+    parser.add_argument('--cache_size', type=int, default=1024,
+                        help='Maximum size of the tessellation cache in MB, least recently used geometry is removed, default is 1024')
+
+
+def addProfileArguments(parser):
+    """Adds the instrumentation options to a command line parser
+
+    Parameters:
+    parser (argparse.ArgumentParser)
+
+    """
+    parser.add_argument('--profile', action='store_true',
+                        help='Print the time per conversion phase, entity counters, the slowest functions and the largest memory allocations after the conversion, this slows down the conversion')
+    parser.add_argument('--report', type=str,
+                        help='Write the time per conversion phase and entity counters to this json file')
+
+
+def startInstrumentation(args):
+    """Returns a started instrumentation for the parsed profile options
+
+    Parameters:
+    args (argparse.Namespace): parsed options, see addProfileArguments
+
+    Returns:
+    instrumentation.Instrumentation
+
+    """
+    instrumentation = Instrumentation(profile=args.profile)
+    instrumentation.start()
+    return instrumentation
+
+
+def finishInstrumentation(instrumentation, args):
+    """Prints and writes the instrumentation report as requested by the parsed profile options
+
+    Parameters:
+    instrumentation (instrumentation.Instrumentation)
+    args (argparse.Namespace): parsed options, see addProfileArguments
+
+    """
+    instrumentation.stop()
+    if args.profile:
+        instrumentation.printReport()
+    if args.report:
+        with open(args.report, 'w') as reportFile:
+            serialization.dump(instrumentation.report(), reportFile, indent=2)
+
+
+def bufferPath(jsonFilePath):
+    """Returns the binary buffer file path for an ifcJSON file path"""
+
+    return os.path.splitext(jsonFilePath)[0] + '.bin'
+
+
+def outputPaths(jsonFilePath, args):
+    """Returns all files that are written for an ifcJSON file
+
+    Parameters:
+    jsonFilePath (string): ifcJSON file path
+    args (argparse.Namespace): parsed writer options
+
+    Returns:
+    list: file paths
+
+    """
+    if args.binary:
+        return [jsonFilePath, bufferPath(jsonFilePath)]
+    return [jsonFilePath]
+
+
+def convert(ifcFilePath, jsonFilePath, args, instrumentation=None):
+    """Converts an IFC SPF file to an ifcJSON file
+
+    Parameters:
+    ifcFilePath (string): input ifc file path
+    jsonFilePath (string): output json file path
+    args (argparse.Namespace): parsed writer options, see addConversionArguments
+    instrumentation (instrumentation.Instrumentation): collects phase timings and entity counters
+
+    Returns:
+    IFC2JSON4 or IFC2JSON5a: the writer that was used
+
+    """
+    if args.compact:
+        indent = None
+        COMPACT = True
+    else:
+        indent = 2
+        COMPACT = False
+    if args.geometry:
+        if args.geometry == "none":
+            GEOMETRY = False
+        elif args.geometry == "tessellate":
+            GEOMETRY = "tessellate"
+        else:
+            GEOMETRY = True
+    else:
+        GEOMETRY = True
+
+    if args.v and not args.v in VERSIONS:
+        raise ValueError('Version ' + args.v + ' is not supported')
+    if args.cache:
+        cache = ifcjson.TessellationCache(
+            args.cache, args.cache_size * 1024 * 1024)
+    else:
+        cache = None
+
+    # Output is written to temporary files that replace the output files only when
+    # the conversion succeeds, so a failed conversion never leaves a partial file
+    temporaryPaths = {}
+    binaryBuffer = None
+    try:
+        if args.binary:
+            fd, temporaryPaths[bufferPath(jsonFilePath)] = temporaryFile(
+                bufferPath(jsonFilePath))
+            os.close(fd)
+            binaryBuffer = ifcjson.BinaryBuffer(
+                os.path.basename(bufferPath(jsonFilePath)), temporaryPaths[bufferPath(jsonFilePath)])
+
+        if not args.v or args.v == "4":
+            writer = ifcjson.IFC2JSON4(ifcFilePath,
+                                       COMPACT,
+                                       NO_INVERSE=args.no_inverse,
+                                       EMPTY_PROPERTIES=args.empty_properties,
+                                       NO_OWNERHISTORY=args.no_ownerhistory,
+                                       GEOMETRY=GEOMETRY,
+                                       JOBS=args.jobs,
+                                       DEDUPLICATE=args.deduplicate,
+                                       SHARE_OBJECTS=True,
+                                       BINARY_BUFFER=binaryBuffer,
+                                       SHARE_MESHES=args.share_meshes,
+                                       CACHE=cache,
+                                       INSTRUMENTATION=instrumentation
+                                       )
+        else:
+            writer = ifcjson.IFC2JSON5a(ifcFilePath,
+                                        COMPACT,
+                                        EMPTY_PROPERTIES=args.empty_properties,
+                                        JOBS=args.jobs,
+                                        SHARE_OBJECTS=True,
+                                        PRECISION=args.precision,
+                                        BINARY_BUFFER=binaryBuffer,
+                                        SHARE_MESHES=args.share_meshes,
+                                        CACHE=cache,
+                                        INSTRUMENTATION=instrumentation
+                                        )
+
+        fd, temporaryPaths[jsonFilePath] = temporaryFile(jsonFilePath)
+        with open(fd, 'w', encoding='utf-8') as outfile:
+            writer.spf2JsonStream(outfile, indent=indent)
+        if binaryBuffer is not None:
+            with writer.instrumentation.phase('buffer'):
+                binaryBuffer.save()
+        for filePath, temporaryPath in temporaryPaths.items():
+            os.replace(temporaryPath, filePath)
+    except BaseException:
+        if binaryBuffer is not None:
+            binaryBuffer.close()
+        for temporaryPath in temporaryPaths.values():
+            if os.path.isfile(temporaryPath):
+                os.remove(temporaryPath)
+        raise
+    return writer
+
+
+def temporaryFile(filePath):
+    """Creates a temporary file next to an output file, so it can be moved in place
+
+    Parameters:
+    filePath (string): output file path
+
+    Returns:
+    tuple: open file descriptor and temporary file path
+
+    """
+    return tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filePath)),
+                            prefix=os.path.basename(filePath) + '.', suffix='.tmp')
@@ -23,8 +23,59 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import array
+import hashlib
+import re
+import uuid
 import ifcopenshell
-import ifcopenshell.guid as guid
+import ifcopenshell.geom
+import ifcopenshell.ifcopenshell_wrapper as ifcopenshell_wrapper
+import ifcjson.globalid as globalid
+import ifcjson.serialization as serialization
+
+
+# Entity references in STEP lines
+REFERENCE = re.compile(r'#(\d+)')
+
+# Geometry settings that change the tessellation
+SETTINGS_OPTIONS = ('USE_WORLD_COORDS', 'EXCLUDE_SOLIDS_AND_SURFACES', 'WELD_VERTICES',
+                    'DISABLE_OPENING_SUBTRACTIONS', 'APPLY_DEFAULT_MATERIALS')
+
+
+def settingKey(settings, name):
+    """Returns the key of a geometry setting by its IfcOpenShell 0.6 constant name,
+    later versions name settings in lower case with dashes
+
+    Parameters:
+    settings: ifcopenshell.geom.settings instance
+    name (string): setting constant name, like USE_WORLD_COORDS
+
+    Returns:
+    setting key, or None if this IfcOpenShell version does not have the setting
+
+    """
+    try:
+        return getattr(settings, name)
+    except AttributeError:
+        key = name.lower().replace('_', '-')
+        if key in settings.setting_names():
+            return key
+        return None
+
+
+def setSetting(settings, name, value):
+    """Sets a geometry setting by its IfcOpenShell 0.6 constant name, settings that
+    this IfcOpenShell version does not have are skipped
+
+    Parameters:
+    settings: ifcopenshell.geom.settings instance
+    name (string): setting constant name, like USE_WORLD_COORDS
+    value: setting value
+
+    """
+    key = settingKey(settings, name)
+    if key is not None:
+        settings.set(key, value)
 
 
 class IFC2JSON:
@@ -67,6 +118,559 @@ class IFC2JSON:
         'OTHERWISE': (0, 0, 0, 0, 0, 0, 0)
     }
 
+    # Numeric list attributes that are written to the binary buffer, by entity type
+    BUFFER_ATTRIBUTES = {
+        'IfcCartesianPointList3D': {'CoordList': 'float64'},
+        'IfcTriangulatedFaceSet': {'CoordIndex': 'int32', 'Normals': 'float64'}
+    }
+
+    def spf2JsonStream(self, fp, indent=None):
+        """Writes the ifcJSON model structure to a file object while the entities
+        are being created, so only a single entity is kept in memory at a time.
+        With the standard library json backend the output is identical to
+        json.dump of the spf2Json result
+
+        Parameters:
+        fp: writable text file object
+        indent (int): json indentation, None for compact output
+
+        """
+
+        phase = self.instrumentation.phase
+
+        # Strip closing bracket from the header to append the data list
+        header = serialization.dumps(
+            self.header(), indent).rstrip()[:-1].rstrip()
+        if indent is None:
+            fp.write(header + ', "data": [')
+            separator = ''
+            for entity in self.entities():
+                with phase('dump'):
+                    fp.write(separator + serialization.dumps(entity))
+                separator = ', '
+            fp.write(']}')
+        else:
+            prefix = ' ' * indent
+            entityPrefix = '\n' + prefix * 2
+            fp.write(header + ',\n' + prefix + '"data": [')
+            separator = entityPrefix
+            for entity in self.entities():
+                with phase('dump'):
+                    fp.write(separator + serialization.dumps(entity,
+                             indent).replace('\n', entityPrefix))
+                separator = ',' + entityPrefix
+            if separator != entityPrefix:
+                fp.write('\n' + prefix)
+            fp.write(']\n}')
+
+    def addRootObjects(self, entities):
+        """Adds entities with a GlobalId to the root objects, converting all
+        GlobalIds to UUIDs at once
+
+        Parameters:
+        entities (list): ifcopenshell IfcRoot instances
+
+        """
+        self.rootObjects.update(zip(
+            [entity.id() for entity in entities],
+            globalid.toUuids([entity.GlobalId for entity in entities])))
+
+    def iterateShapes(self, products):
+        """Tessellates products in parallel using the ifcopenshell geometry iterator
+
+        Parameters:
+        products (list): ifcopenshell IfcProduct instances
+
+        Returns:
+        dict: tuple of flat vertex list, face list and placement matrix by product id
+
+        """
+        shapes = {}
+
+        # The iterator only tessellates Body representations, products without one
+        # are left to createShape so both use the same representation
+        products = [product for product in products
+                    if self.bodyRepresentation(product) is not None]
+        if not products:
+            return shapes
+        iterator = ifcopenshell.geom.iterator(
+            self.settings, self.ifcModel, self.JOBS, include=products)
+        if iterator.initialize():
+            while True:
+                shape = iterator.get()
+                shapes[shape.id] = (shape.geometry.verts,
+                                    shape.geometry.faces,
+                                    self.shapeMatrix(shape))
+                if not iterator.next():
+                    break
+        return shapes
+
+    def productShapes(self, products):
+        """Tessellates products up front, meshes in the tessellation cache are reused
+        and the other products are tessellated in parallel and added to the cache
+
+        Parameters:
+        products (list): ifcopenshell IfcProduct instances
+
+        Returns:
+        dict: tuple of flat vertex list, face list and placement matrix by product id,
+            products that are missing must be tessellated with createShape, see cachedShape
+            for the placement matrix of cached meshes
+
+        """
+        if self.CACHE is None:
+            return self.iterateShapes(products)
+        shapes = {}
+        cacheKeys = {}
+        uncachedProducts = []
+        for product in products:
+            cacheKey = self.cacheKey(product)
+            shape = self.cachedShape(cacheKey)
+            if shape:
+                shapes[product.id()] = shape
+            else:
+                cacheKeys[product.id()] = cacheKey
+                uncachedProducts.append(product)
+        newShapes = self.iterateShapes(uncachedProducts)
+        for productId in newShapes:
+            self.CACHE.put(cacheKeys[productId], *newShapes[productId])
+        shapes.update(newShapes)
+        return shapes
+
+    def bodyRepresentation(self, product):
+        """Returns the representation that is tessellated for a product, the first
+        Body representation like the geometry iterator uses
+
+        Parameters:
+        product: ifcopenshell IfcProduct instance
+
+        Returns:
+        IfcShapeRepresentation, or None if the product has no Body representation
+
+        """
+        for representation in product.Representation.Representations:
+            if representation.RepresentationIdentifier == 'Body':
+                return representation
+        return None
+
+    def createShape(self, product):
+        """Tessellates a single product, using the tessellation cache when available
+
+        Parameters:
+        product: ifcopenshell IfcProduct instance
+
+        Returns:
+        tuple: flat vertex list, face list and placement matrix, see cachedShape
+            for the placement matrix of cached meshes
+
+        """
+        cacheKey = None
+        if self.CACHE is not None:
+            cacheKey = self.cacheKey(product)
+            shape = self.cachedShape(cacheKey)
+            if shape:
+                return shape
+        shape = self.tessellateShape(product)
+        if cacheKey is not None:
+            self.CACHE.put(cacheKey, *shape)
+        return shape
+
+    def tessellateShape(self, product):
+        """Tessellates a single product, without the tessellation cache
+
+        Parameters:
+        product: ifcopenshell IfcProduct instance
+
+        Returns:
+        tuple: flat vertex list, face list and placement matrix
+
+        """
+        representation = self.bodyRepresentation(product)
+        if representation is None:
+            shape = ifcopenshell.geom.create_shape(self.settings, product)
+        else:
+            shape = ifcopenshell.geom.create_shape(
+                self.settings, product, representation)
+        return (shape.geometry.verts, shape.geometry.faces,
+                self.shapeMatrix(shape))
+
+    def cachedShape(self, cacheKey):
+        """Returns a mesh from the tessellation cache. Meshes in object coordinates are
+        shared by products with different placements, so their placement matrix is None.
+
+        Parameters:
+        cacheKey (string): hexadecimal hash, see cacheKey
+
+        Returns:
+        tuple: flat vertex list, face list and placement matrix, or None if not cached
+
+        """
+        shape = self.CACHE.get(cacheKey)
+        if shape and not self.worldCoordinates():
+            return shape[0], shape[1], None
+        return shape
+
+    def worldCoordinates(self):
+        """Returns True if meshes are tessellated in world coordinates"""
+
+        return bool(self.settings.get(settingKey(self.settings, 'USE_WORLD_COORDS')))
+
+    def settingsKey(self):
+        """Returns a description of the geometry settings and IfcOpenShell version,
+        meshes are only reused from the tessellation cache for the same description
+
+        Returns:
+        string
+
+        """
+        values = [ifcopenshell.version, self.__class__.__name__]
+        for option in SETTINGS_OPTIONS:
+            try:
+                values.append(
+                    (option, self.settings.get(settingKey(self.settings, option))))
+            except Exception:
+                values.append((option, None))
+        return repr(values)
+
+    def cacheKey(self, product):
+        """Returns the tessellation cache key of a product, a hash of all entities the
+        mesh is created from: the representation, openings and, for meshes in world
+        coordinates, the placement.
+
+        Parameters:
+        product: ifcopenshell IfcProduct instance
+
+        Returns:
+        string: hexadecimal hash
+
+        """
+        if self.settingsDescription is None:
+            self.settingsDescription = self.settingsKey()
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(self.settingsDescription.encode())
+        digest.update(product.is_a().encode())
+
+        # Meshes in object coordinates do not change when the product is moved,
+        # openings are always included because they are cut at their own placement
+        roots = [product.Representation]
+        if self.worldCoordinates():
+            roots.append(product.ObjectPlacement)
+        if product.is_a('IfcElement'):
+            for relationship in product.HasOpenings:
+                opening = relationship.RelatedOpeningElement
+                roots += [opening.Representation, opening.ObjectPlacement]
+        for root in roots:
+            if root is None:
+                digest.update(b'$;')
+            else:
+                digest.update(self.subgraphDigest(root))
+        return digest.hexdigest()
+
+    def subgraphDigest(self, root):
+        """Returns a hash of an entity and all entities it references. Entity ids are
+        replaced by their position in the graph, so the hash does not change when the
+        model is renumbered. Representations and placements are shared by many products,
+        so the hash is only calculated once per entity id.
+
+        Parameters:
+        root: ifcopenshell entity instance
+
+        Returns:
+        bytes
+
+        """
+        rootId = root.id()
+        if rootId in self.subgraphDigests:
+            return self.subgraphDigests[rootId]
+        digest = hashlib.blake2b(digest_size=20)
+        positions = {}
+        visited = set()
+        for entity in self.ifcModel.traverse(root):
+            entityId = entity.id()
+            if not entityId in positions:
+                positions[entityId] = len(positions)
+            digest.update(b'#%d=' % positions[entityId])
+            if entityId in visited:
+                digest.update(b';')
+                continue
+            visited.add(entityId)
+            line = str(entity)
+            line = line[line.index('=') + 1:]
+            digest.update(REFERENCE.sub(lambda m: '#%d' % positions.setdefault(
+                int(m.group(1)), len(positions)), line).encode())
+            digest.update(b';')
+        self.subgraphDigests[rootId] = digest.digest()
+        return self.subgraphDigests[rootId]
+
+    def shapeMatrix(self, shape):
+        """Returns the placement of a tessellated shape
+
+        Parameters:
+        shape: ifcopenshell tessellated shape
+
+        Returns:
+        tuple: column major 4x4 matrix
+
+        """
+        matrix = shape.transformation.matrix
+        matrix = tuple(getattr(matrix, 'data', matrix))
+
+        # Older IfcOpenShell versions only return the upper 3 rows
+        if len(matrix) == 12:
+            matrix = matrix[0:3] + (0.0,) + matrix[3:6] + (0.0,) + \
+                matrix[6:9] + (0.0,) + matrix[9:12] + (1.0,)
+        return matrix
+
+    def meshKey(self, product):
+        """Returns a key for the body geometry of a product that is equal for all products
+        with the same mesh in object coordinates, so the mesh only needs to be created once.
+        This is the case for products that share a representation, or that contain a single
+        mapped item of the same IfcRepresentationMap with the same transformation.
+
+        Parameters:
+        product: ifcopenshell IfcProduct instance
+
+        Returns:
+        tuple: key, or None if the geometry can not be shared
+        """
+
+        # Openings are subtracted from the mapped geometry
+        if product.is_a('IfcElement') and product.HasOpenings:
+            return None
+        bodies = [x for x in product.Representation.Representations
+                  if x.RepresentationIdentifier == 'Body']
+        if len(bodies) != 1:
+            return None
+        items = bodies[0].Items
+        if len(items) == 1 and items[0].is_a('IfcMappedItem'):
+            return ('IfcMappedItem', items[0].MappingSource.id(), items[0].MappingTarget.id())
+        return ('IfcShapeRepresentation', bodies[0].id())
+
+    def meshHash(self, verts, faces):
+        """Returns a key for a mesh that is equal for all meshes with the same content
+
+        Parameters:
+        verts (tuple): flat list of vertex coordinates
+        faces (tuple): flat list of triangle vertex indices
+
+        Returns:
+        tuple: key
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(array.array('d', verts).tobytes())
+        digest.update(array.array('i', faces).tobytes())
+        return ('mesh', digest.hexdigest())
+
+    def collectSharedObjects(self):
+        """Adds all entities without GlobalId that are referenced more than once
+        to the root objects, so they are written only once and referenced everywhere else
+        """
+        for entity in self.ifcModel:
+            if entity.id() in self.rootObjects:
+                continue
+            if self.ifcModel.get_total_inverses(entity) < 2:
+                continue
+
+            # Empty properties are removed and should not be written separately
+            if entity.is_a('IfcProperty'):
+                if not self.EMPTY_PROPERTIES:
+                    if self.empty_property(entity):
+                        continue
+            self.rootObjects[entity.id()] = str(uuid.uuid4())
+            self.sharedObjects.add(entity.id())
+
+    def conversionPlan(self, entity):
+        """Returns the conversion plan for the type of the given entity,
+        the plan is created once per entity type from the schema declaration
+
+        Parameters:
+        entity: ifcopenshell entity instance
+
+        Returns:
+        dict: conversion plan containing
+            isProperty (boolean): entity is an IfcProperty
+            isSiUnit (boolean): entity is an IfcSIUnit
+            jsonKeys (dict): ifcJSON key by IFC attribute name
+            simpleAttributes (set): attributes that never contain an entity or aggregate
+            entityAttributes (tuple): attributes that can contain an entity or aggregate
+            inverseAttributes (tuple): inverse attribute names
+            inverseReferences (dict): relationship type and attribute by inverse attribute name,
+                for inverse attributes that refer to an IfcRelationship
+            bufferAttributes (dict): component type by attribute name, for attributes
+                that are written to the binary buffer
+
+        """
+        entityType = entity.is_a()
+        if entityType in self.plans:
+            return self.plans[entityType]
+
+        if self.schema is None:
+            self.schema = ifcopenshell_wrapper.schema_by_name(
+                self.ifcModel.schema)
+        declaration = self.schema.declaration_by_name(entityType).as_entity()
+
+        plan = {
+            'isProperty': entity.is_a('IfcProperty'),
+            'isSiUnit': entity.is_a('IfcSIUnit'),
+            'jsonKeys': {'type': 'type'},
+            'simpleAttributes': {'type'},
+            'entityAttributes': (),
+            'inverseAttributes': (),
+            'inverseReferences': {},
+            'bufferAttributes': {}
+        }
+
+        # Types like IfcLabel only have a wrappedValue
+        if declaration:
+            for attribute in declaration.all_attributes():
+                attr = attribute.name()
+                plan['jsonKeys'][attr] = self.jsonKey(attr)
+                if self.isSimpleType(attribute.type_of_attribute()):
+                    plan['simpleAttributes'].add(attr)
+            plan['entityAttributes'] = tuple(
+                x for x in plan['jsonKeys'] if not x in plan['simpleAttributes'])
+            plan['inverseAttributes'] = tuple(
+                x.name() for x in declaration.all_inverse_attributes())
+            for attribute in declaration.all_inverse_attributes():
+                relationshipType = attribute.entity_reference().name()
+                if self.isSubtypeOf(relationshipType, 'IfcRelationship'):
+                    plan['inverseReferences'][attribute.name()] = (
+                        relationshipType, attribute.attribute_reference().name())
+            for bufferType in self.BUFFER_ATTRIBUTES:
+                if self.isSubtypeOf(entityType, bufferType):
+                    plan['bufferAttributes'].update(
+                        self.BUFFER_ATTRIBUTES[bufferType])
+
+        self.plans[entityType] = plan
+        return plan
+
+    def isSubtypeOf(self, entityType, supertype):
+        """Checks if an entity type is equal to or a subtype of another entity type
+
+        Parameters:
+        entityType (string): IFC entity type name
+        supertype (string): IFC entity type name
+
+        Returns:
+        boolean
+
+        """
+        key = (entityType, supertype)
+        if not key in self.subtypes:
+            declaration = self.schema.declaration_by_name(
+                entityType).as_entity()
+            while declaration and declaration.name() != supertype:
+                declaration = declaration.supertype()
+            self.subtypes[key] = declaration is not None
+        return self.subtypes[key]
+
+    def collectInverses(self, relationships):
+        """Builds the inverse relationships of all entities in a single pass
+        over the relationship entities
+
+        Parameters:
+        relationships (list): ifcopenshell IfcRelationship instances
+
+        """
+        if not relationships:
+            return
+        self.conversionPlan(relationships[0])
+
+        # Only relationship attributes that are referred to by an inverse attribute
+        inverseTargets = {attribute.attribute_reference().name(
+        ) for declaration in self.schema.entities() for attribute in declaration.inverse_attributes()}
+
+        for relationship in relationships:
+            relationshipType = relationship.is_a()
+            plan = self.conversionPlan(relationship)
+            for attr in plan['entityAttributes']:
+                if not attr in inverseTargets:
+                    continue
+                for entity in self.referencedEntities(getattr(relationship, attr)):
+                    key = (entity.id(), attr)
+                    if not key in self.inverses:
+                        self.inverses[key] = []
+                    self.inverses[key].append(
+                        (relationshipType, relationship))
+
+    def referencedEntities(self, value):
+        """Generator that yields all entities in an attribute value
+
+        Parameters:
+        value: attribute value
+
+        Yields:
+        ifcopenshell entity instance
+
+        """
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                yield value
+
+            # Defined types like IfcPropertySetDefinitionSet wrap an aggregate of entities
+            elif hasattr(value, 'wrappedValue'):
+                yield from self.referencedEntities(value.wrappedValue)
+        elif isinstance(value, tuple):
+            for item in value:
+                yield from self.referencedEntities(item)
+
+    def getInverseAttribute(self, entity, plan, attr):
+        """Returns the entities referring to the given entity through an inverse attribute,
+        using the inverses collected from the relationships where possible
+
+        Parameters:
+        entity: ifcopenshell entity instance
+        plan (dict): conversion plan of the entity
+        attr (string): inverse attribute name
+
+        Returns:
+        tuple: ifcopenshell entity instances
+
+        """
+        if attr in plan['inverseReferences']:
+            relationshipType, relationshipAttr = plan['inverseReferences'][attr]
+            return tuple(relationship for entityType, relationship in self.inverses.get(
+                (entity.id(), relationshipAttr), ()) if self.isSubtypeOf(entityType, relationshipType))
+        return getattr(entity, attr)
+
+    def isSimpleType(self, parameterType):
+        """Checks if an attribute type always results in a plain python value
+
+        Parameters:
+        parameterType: ifcopenshell schema parameter type
+
+        Returns:
+        boolean
+
+        """
+        while parameterType.as_named_type():
+            declaredType = parameterType.as_named_type().declared_type()
+            if declaredType.as_type_declaration():
+                parameterType = declaredType.as_type_declaration().declared_type()
+            else:
+                return declaredType.as_enumeration_type() is not None
+        return parameterType.as_simple_type() is not None
+
+    def jsonKey(self, attr):
+        """Returns the ifcJSON key for an IFC attribute name
+
+        Parameters:
+        attr (string): IFC attribute name
+
+        Returns:
+        string: lower camelCase key, wrappedValue is replaced by value
+
+        """
+        if attr in self.jsonKeys:
+            return self.jsonKeys[attr]
+        attrKey = self.toLowerCamelcase(attr)
+
+        # Replace wrappedvalue key names to value
+        if attrKey == 'wrappedValue':
+            attrKey = 'value'
+        self.jsonKeys[attr] = attrKey
+        return attrKey
+
     def toLowerCamelcase(self, string):
         """Convert string from upper to lower camelCase"""
 
@@ -106,40 +710,97 @@ class IFC2JSON:
         attribute data converted to ifcJSON-4 model structure
 
         """
-        if value == None or value == '':
-            jsonValue = None
-        elif isinstance(value, ifcopenshell.entity_instance):
+        # Entity instances are checked first, comparing them to None or '' is slow
+        if isinstance(value, ifcopenshell.entity_instance):
             entity = value
-            entityAttributes = entity.__dict__
-
-            # Remove empty properties
-            if entity.is_a('IfcProperty'):
-                if not self.EMPTY_PROPERTIES:
-                    if self.empty_property(entity):
-                        return None
+            entityId = entity.id()
 
-            # Add unit dimensions https://standards.buildingsmart.org/IFC/DEV/IFC4_2/FINAL/HTML/schema/ifcmeasureresource/lexical/ifcdimensionsforsiunit.htm
-            if entity.is_a('IfcSIUnit'):
-                entityAttributes['dimensions'] = self.getDimensionsForSiUnit(
-                    entity)
+            # Entities that are referenced more than once are converted only
+            # once and kept until their last reference has been written
+            if entityId in self.objectCache:
+                self.instrumentation.count('reused')
+                cached = self.objectCache[entityId]
+                cached[1] -= 1
+                if cached[1] < 1:
+                    del self.objectCache[entityId]
+                if self.SHARE_OBJECTS:
+                    return cached[0]
+                return self.copyValue(cached[0])
 
-            # All objects with a GlobalId must be referenced, all others nested
-            if entity.id() in self.rootObjects:
-                entityAttributes["GlobalId"] = self.rootObjects[entity.id()]
-                return self.createReferenceObject(entityAttributes, self.COMPACT)
-            else:
-                if 'GlobalId' in entityAttributes:
-                    entityAttributes["GlobalId"] = guid.split(
-                        guid.expand(entity.GlobalId))[1:-1]
-
-            return self.createFullObject(entityAttributes)
+            jsonValue = self.getEntityValue(entity)
+            if entityId and entityId not in self.rootObjects:
+                references = self.ifcModel.get_total_inverses(entity)
+                if references > 1:
+                    self.objectCache[entityId] = [jsonValue, references - 1]
+            return jsonValue
         elif isinstance(value, tuple):
             jsonValue = tuple(x for x in map(
                 self.getAttributeValue, value) if x is not None)
+        elif value is None or value == '':
+            jsonValue = None
         else:
             jsonValue = value
         return jsonValue
 
+    def copyValue(self, value):
+        """Copies the dicts, lists and tuples of a converted value, leaving
+        strings and numbers shared
+
+        Parameters:
+        value: converted attribute value
+
+        Returns:
+        copy of value
+
+        """
+        if isinstance(value, dict):
+            return {key: self.copyValue(item) for key, item in value.items()}
+        if isinstance(value, tuple):
+            return tuple(map(self.copyValue, value))
+        if isinstance(value, list):
+            return list(map(self.copyValue, value))
+        return value
+
+    def getEntityValue(self, entity):
+        """Converts a single entity into a nested ifcJSON object or a reference object
+
+        Parameters:
+        entity: ifcopenshell entity instance
+
+        Returns:
+        dict: ifcJSON object, reference object or None for removed entities
+
+        """
+        # All objects with a GlobalId must be referenced, all others nested
+        if entity.id() in self.rootObjects:
+            self.instrumentation.count('referenced')
+            return self.createReferenceObject({
+                'type': entity.is_a(),
+                'GlobalId': self.rootObjects[entity.id()]
+            }, self.COMPACT)
+
+        plan = self.conversionPlan(entity)
+
+        # Remove empty properties
+        if plan['isProperty']:
+            if not self.EMPTY_PROPERTIES:
+                if self.empty_property(entity):
+                    self.instrumentation.count('skipped')
+                    return None
+
+        entityAttributes = entity.__dict__
+
+        # Add unit dimensions https://standards.buildingsmart.org/IFC/DEV/IFC4_2/FINAL/HTML/schema/ifcmeasureresource/lexical/ifcdimensionsforsiunit.htm
+        if plan['isSiUnit']:
+            entityAttributes['dimensions'] = self.getDimensionsForSiUnit(
+                entity)
+
+        if 'GlobalId' in entityAttributes:
+            entityAttributes["GlobalId"] = globalid.toUuid(entity.GlobalId)
+
+        self.instrumentation.count('inlined')
+        return self.createFullObject(entityAttributes)
+
     def empty_property(self, entity):
 
         # IfcPropertySingleValue
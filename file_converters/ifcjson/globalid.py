@@ -0,0 +1,106 @@
+# IFCJSON_python - globalid.py
+# Conversion between IFC GlobalId and UUID strings
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""The IFC GlobalId is the 128 bit UUID written with 22 characters of a base64
+alphabet in a different order than RFC 4648. By translating the characters to the
+standard alphabet and prefixing two zero characters, the 22 characters become a
+multiple of 24 bits so the conversion can be done by the base64 module in C.
+"""
+
+import base64
+import functools
+import uuid
+
+IFC_CHARACTERS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_$'
+BASE64_CHARACTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+TO_BASE64 = str.maketrans(IFC_CHARACTERS, BASE64_CHARACTERS)
+FROM_BASE64 = str.maketrans(BASE64_CHARACTERS, IFC_CHARACTERS)
+
+# Maximum number of conversions kept in memory for each direction
+CACHE_SIZE = 65536
+
+
+def formatUuid(hexString):
+    """Format 32 hexadecimal characters as UUID string"""
+
+    return '%s-%s-%s-%s-%s' % (hexString[:8], hexString[8:12], hexString[12:16], hexString[16:20], hexString[20:32])
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def toUuid(globalId):
+    """Convert IFC GlobalId to UUID string
+
+    Parameters:
+    globalId (string): 22 character IFC GlobalId
+
+    Returns:
+    string: lowercase UUID string
+
+    """
+    if len(globalId) != 22:
+        raise ValueError('Not a valid GlobalId: ' + str(globalId))
+    raw = base64.b64decode(
+        ('AA' + globalId).translate(TO_BASE64), validate=True)
+    return formatUuid(raw[2:].hex())
+
+
+def toUuids(globalIds):
+    """Convert a list of IFC GlobalIds to UUID strings in a single decoding step
+
+    Parameters:
+    globalIds (list): 22 character IFC GlobalIds
+
+    Returns:
+    list: lowercase UUID strings
+
+    """
+    globalIds = list(globalIds)
+    if not globalIds:
+        return []
+    for globalId in globalIds:
+        if len(globalId) != 22:
+            raise ValueError('Not a valid GlobalId: ' + str(globalId))
+    hexString = base64.b64decode(
+        ('AA' + 'AA'.join(globalIds)).translate(TO_BASE64), validate=True).hex()
+
+    # Every GlobalId decodes to 18 bytes, of which the first 2 are the zero prefix
+    return [formatUuid(hexString[i + 4:i + 36]) for i in range(0, len(hexString), 36)]
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def toGlobalId(uuidString):
+    """Convert UUID string to IFC GlobalId
+
+    Parameters:
+    uuidString (string): UUID string in any format accepted by uuid.UUID
+
+    Returns:
+    string: 22 character IFC GlobalId
+
+    """
+    raw = b'\x00\x00' + uuid.UUID(uuidString).bytes
+    return base64.b64encode(raw).decode()[2:].translate(FROM_BASE64)
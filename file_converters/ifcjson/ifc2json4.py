@@ -24,21 +24,19 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import os
 import uuid
 import ifcopenshell
 import ifcopenshell.geom
-import ifcopenshell.guid as guid
 import ifcjson.common as common
+from ifcjson.instrumentation import Instrumentation
 from datetime import datetime
-from ifcopenshell.entity_instance import entity_instance
 
 
 class IFC2JSON4(common.IFC2JSON):
     SCHEMA_VERSION = '0.0.1'
 
     settings = ifcopenshell.geom.settings()
-    settings.set(settings.USE_WORLD_COORDS, False)
+    common.setSetting(settings, 'USE_WORLD_COORDS', False)
 
     def __init__(self,
                  ifcModel,
@@ -46,28 +44,79 @@ class IFC2JSON4(common.IFC2JSON):
                  NO_INVERSE=False,
                  EMPTY_PROPERTIES=False,
                  NO_OWNERHISTORY=False,
-                 GEOMETRY=True):
+                 GEOMETRY=True,
+                 JOBS=1,
+                 DEDUPLICATE=False,
+                 SHARE_OBJECTS=False,
+                 BINARY_BUFFER=None,
+                 SHARE_MESHES=False,
+                 CACHE=None,
+                 INSTRUMENTATION=None):
         """IFC SPF to ifcJSON-4 writer
 
         parameters:
         ifcModel: IFC filePath or ifcopenshell model instance
         COMPACT (boolean): if True then pretty print is turned off and references are created without informative "type" property
         NO_INVERSE (boolean): if True then inverse relationships will be explicitly added to entities
+        JOBS (int): number of geometry worker threads used for tessellation
+        DEDUPLICATE (boolean): if True then entities without GlobalId that are referenced more than once are written as separate referenced objects
+        SHARE_OBJECTS (boolean): if True then entities that are converted once are reused as the same dict object instead of a copy
+        BINARY_BUFFER (buffer.BinaryBuffer): if set then tessellation coordinates and indices are written to this buffer instead of the JSON
+        SHARE_MESHES (boolean): if True then products with the same tessellated geometry share a single IfcShapeRepresentation
+        CACHE (cache.TessellationCache): if set then tessellated meshes are read from and added to this cache
+        INSTRUMENTATION (instrumentation.Instrumentation): collects phase timings and entity counters, a new one is created if not set
 
         """
 
         self.COMPACT = COMPACT
         self.NO_INVERSE = NO_INVERSE
         self.EMPTY_PROPERTIES = EMPTY_PROPERTIES
+        self.JOBS = JOBS
+        self.SHARE_OBJECTS = SHARE_OBJECTS
+        self.DEDUPLICATE = DEDUPLICATE
+        self.BINARY_BUFFER = BINARY_BUFFER
+        self.SHARE_MESHES = SHARE_MESHES
+        self.CACHE = CACHE
+
+        if INSTRUMENTATION is None:
+            self.instrumentation = Instrumentation()
+        else:
+            self.instrumentation = INSTRUMENTATION
 
         if isinstance(ifcModel, ifcopenshell.file):
             self.ifcModel = ifcModel
         else:
-            self.ifcModel = ifcopenshell.open(ifcModel)
+            with self.instrumentation.phase('open'):
+                self.ifcModel = ifcopenshell.open(ifcModel)
 
         # Dictionary referencing all objects with a GlobalId that are already created
         self.rootObjects = {}
 
+        # Ids of entities without GlobalId that are written separately because they are shared
+        self.sharedObjects = set()
+
+        # Converted entities that are referenced more than once, by entity id,
+        # with the number of references still to be written
+        self.objectCache = {}
+
+        # Conversion plans by entity type and ifcJSON keys by attribute name
+        self.schema = None
+        self.plans = {}
+        self.jsonKeys = {}
+        self.subtypes = {}
+
+        # Relationships by related entity id and relationship attribute
+        self.inverses = {}
+
+        # Tessellated IfcShapeRepresentations by mesh key
+        self.meshes = {}
+
+        # Geometry settings description used in tessellation cache keys
+        self.settingsDescription = None
+
+        # Tessellation cache key hashes of representations and placements by entity id
+        self.subgraphDigests = {}
+
         # input(dir(self.ifcModel.wrapped_data.header))
         # input(self.ifcModel.wrapped_data.header)
         # print(dir(self.ifcModel.wrapped_data.header.file_description))
@@ -80,7 +129,8 @@ class IFC2JSON4(common.IFC2JSON):
 
         # adjust GEOMETRY type
         if GEOMETRY == 'tessellate':
-            self.tessellate()
+            with self.instrumentation.phase('tessellation'):
+                self.tessellate()
         elif GEOMETRY == False:
             self.remove_geometry()
 
@@ -95,60 +145,103 @@ class IFC2JSON4(common.IFC2JSON):
 
         """
 
-        jsonObjects = []
-        relationships = []
-
-        # Collect all entity types that already have a GlobalId
-        for entity in self.ifcModel.by_type('IfcRoot'):
-            if entity.is_a('IfcRelationship'):
-                relationships.append(entity)
-            else:
-                self.rootObjects[entity.id()] = guid.split(
-                    guid.expand(entity.GlobalId))[1:-1]
-
-        # seperately collect all entity types where a GlobalId needs to be added
-        # for entity in self.ifcModel.by_type('IfcMaterialDefinition'):
-        #     self.rootObjects[entity.id()] = str(uuid.uuid4())
-        for entity in self.ifcModel.by_type('IfcShapeRepresentation'):
-            self.rootObjects[entity.id()] = str(uuid.uuid4())
-        for entity in self.ifcModel.by_type('IfcOwnerHistory'):
-            self.rootObjects[entity.id()] = str(uuid.uuid4())
-        for entity in self.ifcModel.by_type('IfcGeometricRepresentationContext'):
-            self.rootObjects[entity.id()] = str(uuid.uuid4())
+        jsonData = self.header()
+        jsonData['data'] = list(self.entities())
+        return jsonData
 
-        # Seperately add all IfcRelationship entities so they appear at the end of the list
-        for entity in relationships:
-            self.rootObjects[entity.id()] = guid.split(
-                guid.expand(entity.GlobalId))[1:-1]
+    def header(self):
+        """Returns the ifcJSON-4 header, the model structure without the data list
 
-        for key in self.rootObjects:
-            entity = self.ifcModel.by_id(key)
-            entityAttributes = entity.__dict__
-            entityType = entityAttributes['type']
-            if not entityType == 'IfcOwnerHistory':
-                if not self.NO_INVERSE:
-                    for attr in entity.wrapped_data.get_inverse_attribute_names():
-                        inverseAttribute = getattr(entity, attr)
-                        attrValue = self.getAttributeValue(inverseAttribute)
-                        if not attrValue and attrValue is not False:
-                            continue
-                        else:
-                            entityAttributes[attr] = attrValue
-
-            entityAttributes["GlobalId"] = self.rootObjects[entity.id()]
-            jsonObjects.append(self.createFullObject(entityAttributes))
+        Returns:
+        dict: ifcJSON-4 header attributes
 
+        """
         return {
             'type': 'ifcJSON',
             'version': self.SCHEMA_VERSION,
             # 'schemaIdentifiers': self.ifcModel.wrapped_data.header.file_schema.schema_identifiers,
-            'schemaIdentifier': self.ifcModel.wrapped_data.schema,
+            'schemaIdentifier': self.ifcModel.schema,
             'originatingSystem': 'IFC2JSON_python Version ' + self.VERSION,
             'preprocessorVersion': 'IfcOpenShell ' + ifcopenshell.version,
-            'timeStamp': datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-            'data': jsonObjects
+            'timeStamp': datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
         }
 
+    def entities(self):
+        """Generator that yields the ifcJSON-4 objects for all root objects one at a time
+        also including inverse attributes (except for the IfcOwnerHistory type)
+
+        Yields:
+        dict: complete ifcJSON-4 object
+
+        """
+
+        instrumentation = self.instrumentation
+        objects = []
+        relationships = []
+
+        with instrumentation.phase('roots'):
+
+            # Collect all entity types that already have a GlobalId
+            for entity in self.ifcModel.by_type('IfcRoot'):
+                if entity.is_a('IfcRelationship'):
+                    relationships.append(entity)
+                else:
+                    objects.append(entity)
+            self.addRootObjects(objects)
+
+            # seperately collect all entity types where a GlobalId needs to be added
+            # for entity in self.ifcModel.by_type('IfcMaterialDefinition'):
+            #     self.rootObjects[entity.id()] = str(uuid.uuid4())
+            for entity in self.ifcModel.by_type('IfcShapeRepresentation'):
+                self.rootObjects[entity.id()] = str(uuid.uuid4())
+            for entity in self.ifcModel.by_type('IfcOwnerHistory'):
+                self.rootObjects[entity.id()] = str(uuid.uuid4())
+            for entity in self.ifcModel.by_type('IfcGeometricRepresentationContext'):
+                self.rootObjects[entity.id()] = str(uuid.uuid4())
+
+            # Seperately add all IfcRelationship entities so they appear at the end of the list
+            self.addRootObjects(relationships)
+
+            # Shared entities are written once instead of nested at every reference,
+            # after the relationships so the order of the other objects does not change
+            if self.DEDUPLICATE:
+                self.collectSharedObjects()
+
+        # Inverse attributes that refer to relationships are collected at once
+        if not self.NO_INVERSE:
+            with instrumentation.phase('inverses'):
+                self.collectInverses(relationships)
+
+        for key in self.rootObjects:
+            with instrumentation.phase('attributes'):
+                entity = self.ifcModel.by_id(key)
+                entityAttributes = entity.__dict__
+                entityType = entityAttributes['type']
+                plan = self.conversionPlan(entity)
+
+                # Add unit dimensions for shared units
+                if plan['isSiUnit']:
+                    entityAttributes['dimensions'] = self.getDimensionsForSiUnit(
+                        entity)
+
+                # Shared entities get the same attributes as when they are nested
+                if not entityType == 'IfcOwnerHistory' and not key in self.sharedObjects:
+                    if not self.NO_INVERSE:
+                        for attr in plan['inverseAttributes']:
+                            inverseAttribute = self.getInverseAttribute(
+                                entity, plan, attr)
+                            attrValue = self.getAttributeValue(
+                                inverseAttribute)
+                            if not attrValue and attrValue is not False:
+                                continue
+                            else:
+                                entityAttributes[attr] = attrValue
+
+                entityAttributes["GlobalId"] = self.rootObjects[entity.id()]
+                fullObject = self.createFullObject(entityAttributes)
+            instrumentation.count('converted')
+            yield fullObject
+
     def createFullObject(self, entityAttributes):
         """Returns complete ifcJSON-4 object
 
@@ -160,6 +253,13 @@ class IFC2JSON4(common.IFC2JSON):
 
         """
         fullObject = {}
+        plan = self.plans.get(entityAttributes['type'])
+        if plan:
+            simpleAttributes = plan['simpleAttributes']
+            bufferAttributes = plan['bufferAttributes']
+        else:
+            simpleAttributes = ()
+            bufferAttributes = {}
 
         for attr in entityAttributes:
 
@@ -167,13 +267,25 @@ class IFC2JSON4(common.IFC2JSON):
             if attr == 'id':
                 continue
 
-            attrKey = self.toLowerCamelcase(attr)
+            attrKey = self.jsonKey(attr)
 
-            # Replace wrappedvalue key names to value
-            if attrKey == 'wrappedValue':
-                attrKey = 'value'
+            # Values of simple attributes are used as is
+            value = entityAttributes[attr]
 
-            jsonValue = self.getAttributeValue(entityAttributes[attr])
+            # Numeric lists are replaced by a reference to the binary buffer
+            if attr in bufferAttributes and self.BINARY_BUFFER is not None:
+                if value:
+                    fullObject[attrKey] = self.BINARY_BUFFER.addAccessor(
+                        value, bufferAttributes[attr])
+                continue
+
+            if attr in simpleAttributes:
+                if value is None or value == '':
+                    continue
+                fullObject[attrKey] = value
+                continue
+
+            jsonValue = self.getAttributeValue(value)
             if jsonValue is not None:
                 fullObject[attrKey] = jsonValue
         return fullObject
@@ -198,37 +310,93 @@ class IFC2JSON4(common.IFC2JSON):
     def tessellate(self):
         """Converts all IfcProduct representations to IfcTriangulatedFaceSet
         """
-        for product in self.ifcModel.by_type('IfcProduct'):
-            if product.Representation:
-                try:
-                    representation = product.Representation
-                    old_shapes = representation.Representations
-                    context = old_shapes[0].ContextOfItems
+        products = [product for product in self.ifcModel.by_type(
+            'IfcProduct') if product.Representation]
+
+        # Products with shared geometry are only tessellated once
+        meshKeys = {}
+        if self.SHARE_MESHES:
+            for product in products:
+                meshKeys[product.id()] = self.meshKey(product)
+
+        # Tessellate all products up front using multiple threads
+        if self.JOBS > 1:
+            uniqueProducts = []
+            keys = set()
+            for product in products:
+                key = meshKeys.get(product.id())
+                if key is None or not key in keys:
+                    keys.add(key)
+                    uniqueProducts.append(product)
+            shapes = self.productShapes(uniqueProducts)
+
+        for product in products:
+            try:
+                key = meshKeys.get(product.id())
+                if key in self.meshes:
+                    self.addTessellation(product, None, None, self.meshes[key])
+                    continue
+
+                if self.JOBS > 1 and product.id() in shapes:
+                    verts, faces, matrix = shapes[product.id()]
+                else:
+                    verts, faces, matrix = self.createShape(product)
+
+                # Products with different representations can still have the same mesh
+                if self.SHARE_MESHES:
+                    meshHash = self.meshHash(verts, faces)
+                    if meshHash in self.meshes:
+                        representation = self.addTessellation(
+                            product, None, None, self.meshes[meshHash])
+                    else:
+                        representation = self.addTessellation(
+                            product, verts, faces)
+                        self.meshes[meshHash] = representation
+                    if key is not None:
+                        self.meshes[key] = representation
+                else:
+                    self.addTessellation(product, verts, faces)
+
+            except Exception as e:
+                print(str(e) + ': Unable to generate OBJ data for ' +
+                      str(product))
+
+    def addTessellation(self, product, verts, faces, bodyRepresentation=None):
+        """Replaces the product representation by an IfcTriangulatedFaceSet
 
-                    tessellated_shape = ifcopenshell.geom.create_shape(
-                        self.settings, product)
+        Parameters:
+        product: ifcopenshell IfcProduct instance
+        verts (tuple): flat list of vertex coordinates
+        faces (tuple): flat list of triangle vertex indices
+        bodyRepresentation: existing IfcShapeRepresentation with the same mesh, used instead of verts and faces
+
+        Returns:
+        IfcShapeRepresentation containing the IfcTriangulatedFaceSet
 
-                    verts = tessellated_shape.geometry.verts
-                    vertsList = [verts[i:i+3] for i in range(0, len(verts), 3)]
+        """
+        if bodyRepresentation is None:
+            representation = product.Representation
+            old_shapes = representation.Representations
+            context = old_shapes[0].ContextOfItems
 
-                    faces = tessellated_shape.geometry.faces
-                    facesList = [faces[i:i+3] for i in range(0, len(faces), 3)]
+            vertsList = [verts[i:i+3] for i in range(0, len(verts), 3)]
 
-                    pointlist = self.ifcModel.createIfcCartesianPointList3D(
-                        vertsList)
-                    shape = self.ifcModel.createIfcTriangulatedFaceSet(pointlist,
-                        None, None, facesList, None)
+            # IFC coordinate indices start at 1
+            facesList = [(faces[i] + 1, faces[i+1] + 1, faces[i+2] + 1)
+                         for i in range(0, len(faces), 3)]
 
-                    body_representation = self.ifcModel.createIfcShapeRepresentation(
-                        context, "Body", "Tessellation", [shape])
-                    new_representation = self.ifcModel.createIfcProductDefinitionShape(
-                        None, None, [body_representation])
+            pointlist = self.ifcModel.createIfcCartesianPointList3D(
+                vertsList)
+            shape = self.ifcModel.createIfcTriangulatedFaceSet(pointlist,
+                None, None, facesList, None)
 
-                    representation = tuple(new_representation)
+            bodyRepresentation = self.ifcModel.createIfcShapeRepresentation(
+                context, "Body", "Tessellation", [shape])
+        new_representation = self.ifcModel.createIfcProductDefinitionShape(
+            None, None, [bodyRepresentation])
 
-                except Exception as e:
-                    print(str(e) + ': Unable to generate OBJ data for ' +
-                          str(product))
+        product.Representation = new_representation
+        return bodyRepresentation
 
     def remove_ownerhistory(self):
         for entity in self.ifcModel.by_type('IfcOwnerHistory'):
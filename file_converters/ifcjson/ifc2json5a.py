@@ -24,14 +24,14 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import os
+import math
 import uuid
 import ifcopenshell
 import ifcopenshell.geom
-import ifcopenshell.guid as guid
 import ifcjson.common as common
+import ifcjson.obj as obj
+from ifcjson.instrumentation import Instrumentation
 from datetime import datetime
-from ifcopenshell.entity_instance import entity_instance
 
 
 class IFC2JSON5a(common.IFC2JSON):
@@ -77,34 +77,95 @@ class IFC2JSON5a(common.IFC2JSON):
 
     settings = ifcopenshell.geom.settings()
     settings.USE_PYTHON_OPENCASCADE = True
-    settings.set(settings.USE_WORLD_COORDS, True)
-    settings.set(settings.EXCLUDE_SOLIDS_AND_SURFACES, False)
+    common.setSetting(settings, 'USE_WORLD_COORDS', True)
+    common.setSetting(settings, 'EXCLUDE_SOLIDS_AND_SURFACES', False)
 
     def __init__(self, ifcModel,
                  COMPACT=False,
-                 EMPTY_PROPERTIES=False):
+                 EMPTY_PROPERTIES=False,
+                 JOBS=1,
+                 SHARE_OBJECTS=False,
+                 PRECISION=None,
+                 BINARY_BUFFER=None,
+                 SHARE_MESHES=False,
+                 CACHE=None,
+                 INSTRUMENTATION=None):
         """IFC SPF to ifcJSON-5a writer
 
         parameters:
         ifcModel: IFC filePath or ifcopenshell model instance
         COMPACT (boolean): if True then pretty print is turned off and references are created without informative "type" property
+        JOBS (int): number of geometry worker threads used for OBJ generation
+        SHARE_OBJECTS (boolean): if True then entities that are converted once are reused as the same dict object instead of a copy
+        PRECISION (int): number of decimals of OBJ vertex coordinates, None for full precision
+        BINARY_BUFFER (buffer.BinaryBuffer): if set then OBJ meshes are written to this buffer instead of as OBJ strings
+        SHARE_MESHES (boolean): if True then meshes are written in object coordinates and products with the same mesh
+            share a single shape representation, with the placement of each product in its representation reference
+        CACHE (cache.TessellationCache): if set then tessellated meshes are read from and added to this cache
+        INSTRUMENTATION (instrumentation.Instrumentation): collects phase timings and entity counters, a new one is created if not set
 
         """
 
         self.COMPACT = COMPACT
         self.EMPTY_PROPERTIES = EMPTY_PROPERTIES
+        self.PRECISION = PRECISION
+        self.BINARY_BUFFER = BINARY_BUFFER
+        self.SHARE_MESHES = SHARE_MESHES
+        self.CACHE = CACHE
+        self.JOBS = JOBS
+        self.SHARE_OBJECTS = SHARE_OBJECTS
+
+        if INSTRUMENTATION is None:
+            self.instrumentation = Instrumentation()
+        else:
+            self.instrumentation = INSTRUMENTATION
 
         if isinstance(ifcModel, ifcopenshell.file):
             self.ifcModel = ifcModel
         else:
-            self.ifcModel = ifcopenshell.open(ifcModel)
+            with self.instrumentation.phase('open'):
+                self.ifcModel = ifcopenshell.open(ifcModel)
 
         # Dictionary referencing all objects with a GlobalId that are already created
         self.rootObjects = {}
 
+        # Converted entities that are referenced more than once, by entity id,
+        # with the number of references still to be written
+        self.objectCache = {}
+
+        # Conversion plans by entity type and ifcJSON keys by attribute name
+        self.schema = None
+        self.plans = {}
+        self.jsonKeys = {}
+        self.subtypes = {}
+
         # Representations are kept seperate to be added to the end of the list
         self.representations = {}
 
+        # Product meshes that are tessellated up front, by product id
+        self.shapes = None
+
+        # Shape representation ids by mesh key
+        self.meshes = {}
+
+        # Column major placement matrices in model units by IfcObjectPlacement id
+        self.placements = {}
+
+        # Scale from model units to the units of the tessellated meshes, see setPlacementScale
+        self.placementScale = None
+
+        # Geometry settings description used in tessellation cache keys
+        self.settingsDescription = None
+
+        # Tessellation cache key hashes of representations and placements by entity id
+        self.subgraphDigests = {}
+
+        # Shared meshes are created in object coordinates
+        if SHARE_MESHES:
+            self.settings = ifcopenshell.geom.settings()
+            common.setSetting(self.settings, 'USE_WORLD_COORDS', False)
+            common.setSetting(self.settings, 'EXCLUDE_SOLIDS_AND_SURFACES', False)
+
     def spf2Json(self):
         """
         Create json dictionary structure for all attributes of the objects in the root list
@@ -116,61 +177,93 @@ class IFC2JSON5a(common.IFC2JSON):
 
         """
 
-        jsonObjects = []
+        jsonData = self.header()
+        jsonData['data'] = list(self.entities())
+        return jsonData
 
-        for entity in self.ifcModel.by_type('IfcObjectDefinition'):
-            self.rootObjects[entity.id()] = guid.split(
-                guid.expand(entity.GlobalId))[1:-1]
+    def header(self):
+        """Returns the ifcJSON-5a header, the model structure without the data list
 
-        for key in self.rootObjects:
-            entity = self.ifcModel.by_id(key)
-            entityAttributes = entity.__dict__
-            entityType = entityAttributes['type']
-            if not entityType in ['IfcGeometricRepresentationContext', 'IfcOwnerHistory']:
-                for attr in entity.wrapped_data.get_inverse_attribute_names():
-                    inverseAttribute = getattr(entity, attr)
-                    entityAttributes[attr] = self.getAttributeValue(
-                        inverseAttribute)
-            entityAttributes["GlobalId"] = self.rootObjects[entity.id()]
-
-            # Convert representations to OBJ
-            if 'Representation' in entityAttributes:
-                obj = self.toObj(entity)
-
-                if obj:
-                    id = guid.split(guid.expand(guid.new()))[1:-1]
-                    ref = {}
-                    if not self.COMPACT:
-                        ref['type'] = "shapeRepresentation"
-                    ref['ref'] = id
-                    entityAttributes['representations'] = [ref]
-                    self.representations[id] = {
-                        "type": "shapeRepresentation",
-                        "globalId": id,
-                        "representationIdentifier": "Body",
-                        "representationType": "OBJ",
-                        "items": [
-                            obj
-                        ]
-                    }
-
-                # (!) delete original representation, even if OBJ generation fails
-                del entityAttributes['Representation']
-
-            jsonObjects.append(self.createFullObject(entityAttributes))
-
-        jsonObjects = jsonObjects + list(self.representations.values())
+        Returns:
+        dict: ifcJSON-5a header attributes
 
+        """
         return {
             'type': 'ifcJSON-5a',
             'version': self.SCHEMA_VERSION,
-            'schemaIdentifier': self.ifcModel.wrapped_data.schema,
+            'schemaIdentifier': self.ifcModel.schema,
             'originatingSystem': 'IFC2JSON_python Version ' + self.VERSION,
             'preprocessorVersion': 'IfcOpenShell ' + ifcopenshell.version,
-            'timeStamp': datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-            'data': jsonObjects
+            'timeStamp': datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
         }
 
+    def entities(self):
+        """Generator that yields the ifcJSON-5a objects for all root objects one at a time,
+        followed by the OBJ shape representations
+
+        Yields:
+        dict: complete ifcJSON-5a object
+
+        """
+
+        instrumentation = self.instrumentation
+        with instrumentation.phase('roots'):
+            self.addRootObjects(self.ifcModel.by_type('IfcObjectDefinition'))
+
+        # Tessellate all products before the attribute walk using multiple threads
+        if self.JOBS > 1:
+            with instrumentation.phase('tessellation'):
+                products = [product for product in self.ifcModel.by_type(
+                    'IfcProduct') if product.Representation]
+
+                # Products with shared geometry are only tessellated once
+                if self.SHARE_MESHES:
+                    uniqueProducts = []
+                    keys = set()
+                    for product in products:
+                        key = self.meshKey(product)
+                        if key is None or not key in keys:
+                            keys.add(key)
+                            uniqueProducts.append(product)
+                    products = uniqueProducts
+                self.shapes = self.productShapes(products)
+
+        for key in self.rootObjects:
+            with instrumentation.phase('attributes'):
+                entity = self.ifcModel.by_id(key)
+                entityAttributes = entity.__dict__
+                entityType = entityAttributes['type']
+                if not entityType in ['IfcGeometricRepresentationContext', 'IfcOwnerHistory']:
+                    for attr in self.conversionPlan(entity)['inverseAttributes']:
+                        inverseAttribute = getattr(entity, attr)
+                        entityAttributes[attr] = self.getAttributeValue(
+                            inverseAttribute)
+                entityAttributes["GlobalId"] = self.rootObjects[entity.id()]
+
+                # Convert representations to OBJ
+                if 'Representation' in entityAttributes:
+                    id, matrix = self.productRepresentation(entity)
+
+                    if id is not None:
+                        ref = {}
+                        if not self.COMPACT:
+                            ref['type'] = "shapeRepresentation"
+                        ref['ref'] = id
+                        if self.SHARE_MESHES:
+                            ref['transformation'] = matrix
+                        entityAttributes['representations'] = [ref]
+
+                    # (!) delete original representation, even if OBJ generation fails
+                    del entityAttributes['Representation']
+
+                fullObject = self.createFullObject(entityAttributes)
+            instrumentation.count('converted')
+            yield fullObject
+
+        for representation in self.representations.values():
+            instrumentation.count('converted')
+            yield representation
+
     def createFullObject(self, entityAttributes):
         """Returns complete ifcJSON-5a object
 
@@ -216,11 +309,7 @@ class IFC2JSON5a(common.IFC2JSON):
                         if attrName in relObject:
                             entityAttributes[attr] = relObject[attrName]
 
-            attrKey = self.toLowerCamelcase(attr)
-
-            # Replace wrappedvalue key names to value
-            if attrKey == 'wrappedValue':
-                attrKey = 'value'
+            attrKey = self.jsonKey(attr)
 
             jsonValue = self.getAttributeValue(entityAttributes[attr])
             if jsonValue is not None:
@@ -251,32 +340,219 @@ class IFC2JSON5a(common.IFC2JSON):
         ref['ref'] = entityAttributes['GlobalId']
         return ref
 
-    def toObj(self, product):
-        """Convert IfcProduct to OBJ mesh
+    def productRepresentation(self, product):
+        """Creates the OBJ shape representation of a product, products with the same
+        mesh share a representation when SHARE_MESHES is set
 
         parameters:
         product: ifcopenshell ifcProduct instance
 
         Returns:
-        string: OBJ string
+        tuple: shape representation id and the column major placement matrix of the product,
+            both None if the product has no geometry
         """
+        meshKey = None
+        if self.SHARE_MESHES and product.Representation:
+            meshKey = self.meshKey(product)
+
+            # Products with the same mapped or shared representation are only tessellated once
+            if meshKey in self.meshes:
+                matrix = self.productPlacement(product)
+                if matrix is not None:
+                    return self.meshes[meshKey], matrix
+
+        shape = self.productShape(product)
+        if not shape:
+            return None, None
+        verts, faces, matrix = shape
+        meshHash = None
+        if self.SHARE_MESHES:
+            meshHash = self.meshHash(verts, faces)
+
+            # Meshes from the tessellation cache have no placement matrix
+            if matrix is None:
+                matrix = self.productPlacement(product)
+            if matrix is None:
+                with self.instrumentation.phase('tessellation'):
+                    matrix = self.tessellateShape(product)[2]
+            self.setPlacementScale(product, matrix)
+        if meshHash in self.meshes:
+            id = self.meshes[meshHash]
+        else:
+            id = str(uuid.uuid4())
+            self.representations[id] = {
+                "type": "shapeRepresentation",
+                "globalId": id,
+                "representationIdentifier": "Body",
+                "representationType": "OBJ",
+                "items": [
+                    self.meshItem(verts, faces)
+                ]
+            }
+            if meshHash is not None:
+                self.meshes[meshHash] = id
+        if meshKey is not None:
+            self.meshes[meshKey] = id
+        return id, matrix
+
+    def productPlacement(self, product):
+        """Returns the placement of a product in the units of the tessellated meshes
 
-        if product.Representation:
-            try:
-                shape = ifcopenshell.geom.create_shape(self.settings, product)
+        parameters:
+        product: ifcopenshell ifcProduct instance
+
+        Returns:
+        tuple: column major 4x4 matrix, or None if the placement can not be calculated
+        """
+        if self.placementScale is None:
+            return None
+        matrix = self.placementMatrix(product.ObjectPlacement)
+        if matrix is None:
+            return None
+        return matrix[:12] + tuple(x * self.placementScale for x in matrix[12:15]) + (1.0,)
+
+    def setPlacementScale(self, product, matrix):
+        """IfcOpenShell versions differ in whether meshes are converted from model units
+        to meters, the scale is taken once from the placement of a tessellated product
+
+        parameters:
+        product: ifcopenshell ifcProduct instance
+        matrix (tuple): column major placement matrix of the tessellated product
+        """
+        if self.placementScale is not None:
+            return
+        placement = self.placementMatrix(product.ObjectPlacement)
+        if placement is None:
+            return
+        length = math.sqrt(sum(x * x for x in placement[12:15]))
+        if length:
+            self.placementScale = math.sqrt(
+                sum(x * x for x in matrix[12:15])) / length
+
+    def placementMatrix(self, placement):
+        """Returns the matrix of an object placement relative to the world coordinate system
+
+        parameters:
+        placement: ifcopenshell IfcObjectPlacement instance or None
 
-                verts = shape.geometry.verts
-                vertsList = [' '.join(map(str, verts[x:x+3]))
-                             for x in range(0, len(verts), 3)]
-                vertString = 'v ' + '\nv '.join(vertsList) + '\n'
+        Returns:
+        tuple: column major 4x4 matrix in model units, or None for placements
+            other than IfcLocalPlacement
+        """
+        if placement is None:
+            return (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0,
+                    0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+        if placement.id() in self.placements:
+            return self.placements[placement.id()]
+        matrix = None
+        if placement.is_a('IfcLocalPlacement'):
+            matrix = self.axisPlacementMatrix(placement.RelativePlacement)
+            if placement.PlacementRelTo:
+                parent = self.placementMatrix(placement.PlacementRelTo)
+                if parent is None:
+                    matrix = None
+                else:
+                    matrix = tuple(sum(parent[k * 4 + row] * matrix[column * 4 + k] for k in range(4))
+                                   for column in range(4) for row in range(4))
+        self.placements[placement.id()] = matrix
+        return matrix
+
+    def axisPlacementMatrix(self, axisPlacement):
+        """Returns the matrix of an IfcAxis2Placement2D or IfcAxis2Placement3D
+
+        parameters:
+        axisPlacement: ifcopenshell IfcAxis2Placement instance
+
+        Returns:
+        tuple: column major 4x4 matrix in model units
+        """
+        location = tuple(axisPlacement.Location.Coordinates)
+        location += (0.0,) * (3 - len(location))
+        zAxis = (0.0, 0.0, 1.0)
+        xAxis = (1.0, 0.0, 0.0)
+        if axisPlacement.is_a('IfcAxis2Placement3D') and axisPlacement.Axis:
+            zAxis = normalize(axisPlacement.Axis.DirectionRatios)
+        if axisPlacement.RefDirection:
+            xAxis = tuple(axisPlacement.RefDirection.DirectionRatios)
+            xAxis += (0.0,) * (3 - len(xAxis))
+
+        # The X axis is projected on the plane perpendicular to the Z axis
+        dot = sum(x * z for x, z in zip(xAxis, zAxis))
+        xAxis = normalize([x - dot * z for x, z in zip(xAxis, zAxis)])
+        yAxis = (zAxis[1] * xAxis[2] - zAxis[2] * xAxis[1],
+                 zAxis[2] * xAxis[0] - zAxis[0] * xAxis[2],
+                 zAxis[0] * xAxis[1] - zAxis[1] * xAxis[0])
+        return xAxis + (0.0,) + yAxis + (0.0,) + zAxis + (0.0,) + location + (1.0,)
+
+    def productShape(self, product):
+        """Tessellate IfcProduct
 
-                faces = shape.geometry.faces
-                facesList = [' '.join(map(str, faces[x:x+3]))
-                             for x in range(0, len(faces), 3)]
-                faceString = 'f ' + '\nf '.join(map(str, facesList)) + '\n'
+        parameters:
+        product: ifcopenshell ifcProduct instance
 
-                return vertString + faceString
+        Returns:
+        tuple: flat lists of vertex coordinates and triangle vertex indices and the
+            column major placement matrix, or None if the product has no geometry.
+            The matrix is None for cached meshes in object coordinates
+        """
+
+        if product.Representation:
+            try:
+                if self.shapes is not None and product.id() in self.shapes:
+                    shape = self.shapes[product.id()]
+                else:
+                    with self.instrumentation.phase('tessellation'):
+                        shape = self.createShape(product)
             except Exception as e:
                 print(str(e) + ': Unable to generate OBJ data for ' +
                       str(product))
                 return None
+
+            # The shape representation is still written, with an empty OBJ mesh
+            if not shape[1]:
+                print('No triangles in the geometry: Empty OBJ data for ' +
+                      str(product))
+            return shape
+
+    def toObj(self, product):
+        """Convert IfcProduct to OBJ mesh
+
+        parameters:
+        product: ifcopenshell ifcProduct instance
+
+        Returns:
+        string: OBJ string, an empty string for geometry without triangles, or None
+            if the product has no geometry
+        """
+
+        shape = self.productShape(product)
+        if shape is not None:
+            verts, faces, matrix = shape
+            return obj.formatObj(verts, faces, self.PRECISION)
+
+    def meshItem(self, verts, faces):
+        """Returns the shape representation item for a mesh, an OBJ string or
+        a mesh in the binary buffer
+
+        parameters:
+        verts (tuple): flat list of vertex coordinates
+        faces (tuple): flat list of triangle vertex indices
+
+        Returns:
+        string or dict: OBJ string, or mesh object with vertices and faces buffer accessors
+        """
+
+        if self.BINARY_BUFFER is None:
+            return obj.formatObj(verts, faces, self.PRECISION)
+        return {
+            'type': 'mesh',
+            'vertices': self.BINARY_BUFFER.addAccessor(verts, 'float64'),
+            'faces': self.BINARY_BUFFER.addAccessor(faces, 'int32')
+        }
+
+
+def normalize(vector):
+    """Returns a vector scaled to length 1"""
+
+    length = math.sqrt(sum(x * x for x in vector))
+    return tuple(x / length for x in vector)
@@ -0,0 +1,213 @@
+# IFCJSON_python - instrumentation.py
+# Phase timers, counters and optional profiling of conversions
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Phases are timed exclusively, time spent in a nested phase is not counted
+for the enclosing phase, so the phase times add up to the total instrumented time.
+
+Phases of the writers: open, tessellation, roots, inverses, attributes, dump and buffer.
+Phases of JSON2IFC: load, create, fill and write.
+
+Counters of the writers:
+converted: root objects written to the data list
+inlined: entities converted to nested objects
+referenced: root entities converted to a reference object, once per entity
+reused: conversions that were taken from the object cache
+skipped: empty properties that were removed
+
+Counters of JSON2IFC:
+created: entities in the data list
+nested: entities created from nested objects
+referenced: references resolved to an entity
+"""
+
+from time import perf_counter
+import contextlib
+import cProfile
+import pstats
+import sys
+import tracemalloc
+
+# Number of functions and allocation sites in the profile and memory report
+TOP = 20
+
+
+class Instrumentation:
+    def __init__(self, profile=False):
+        """Collects the time spent per conversion phase and counters of converted entities
+
+        parameters:
+        profile (boolean): if True then start() also captures a cProfile profile
+            and tracemalloc allocations, which slows down the conversion
+
+        """
+        self.profile = profile
+
+        # Seconds and number of calls by phase name
+        self.phases = {}
+
+        # Counted events by name
+        self.counters = {}
+
+        # Names of the phases that are currently running, innermost last
+        self.stack = []
+        self.started = None
+
+        self.profiler = None
+        self.memory = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager that adds the time spent in the block to a phase
+
+        Parameters:
+        name (string): phase name, like "open" or "dump"
+
+        """
+        now = perf_counter()
+        if self.stack:
+            self.addTime(self.stack[-1], now - self.started, 0)
+        self.stack.append(name)
+        self.started = now
+        try:
+            yield
+        finally:
+            now = perf_counter()
+            self.addTime(self.stack.pop(), now - self.started, 1)
+            self.started = now
+
+    def addTime(self, name, seconds, calls):
+        if name in self.phases:
+            timing = self.phases[name]
+            timing[0] += seconds
+            timing[1] += calls
+        else:
+            self.phases[name] = [seconds, calls]
+
+    def count(self, name, amount=1):
+        """Increases a counter
+
+        Parameters:
+        name (string): counter name, like "converted" or "inlined"
+        amount (int): number to add
+
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def start(self):
+        """Starts the profiler and memory tracing when profiling is enabled"""
+
+        if self.profile and self.profiler is None:
+            tracemalloc.start()
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self):
+        """Stops the profiler and memory tracing, and keeps their results for the report"""
+
+        if self.profiler is None or self.memory is not None:
+            return
+        self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.memory = {
+            'current': current,
+            'peak': peak,
+            'top': [{
+                'location': '%s:%d' % (x.traceback[0].filename, x.traceback[0].lineno),
+                'size': x.size,
+                'count': x.count
+            } for x in snapshot.statistics('lineno')[:TOP]]
+        }
+
+    def profileStats(self):
+        """Returns the functions with the highest cumulative time
+
+        Returns:
+        list: dict per function with the number of calls, own time and cumulative time
+
+        """
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler).stats
+        functions = sorted(stats.items(), key=lambda x: x[1][3], reverse=True)
+        return [{
+            'function': '%s:%d(%s)' % key,
+            'calls': value[1],
+            'seconds': value[2],
+            'cumulativeSeconds': value[3]
+        } for key, value in functions[:TOP]]
+
+    def report(self):
+        """Returns the collected measurements, stops profiling when it is running
+
+        Returns:
+        dict: phases, counters and, when profiling is enabled, profile and memory
+
+        """
+        self.stop()
+        report = {
+            'phases': {name: {'seconds': timing[0], 'calls': timing[1]}
+                       for name, timing in self.phases.items()},
+            'counters': dict(self.counters)
+        }
+        if self.profiler is not None:
+            report['profile'] = self.profileStats()
+            report['memory'] = self.memory
+        return report
+
+    def printReport(self, fp=sys.stdout):
+        """Writes the report as readable text
+
+        Parameters:
+        fp: writable text file object
+
+        """
+        report = self.report()
+        phases = report['phases']
+        total = sum(x['seconds'] for x in phases.values())
+        fp.write('%-24s %10s %8s %10s\n' % ('Phase', 'Seconds', '%', 'Calls'))
+        for name, timing in sorted(phases.items(), key=lambda x: x[1]['seconds'], reverse=True):
+            fp.write('%-24s %10.3f %8.1f %10d\n' % (
+                name, timing['seconds'], timing['seconds'] / total * 100 if total else 0, timing['calls']))
+        fp.write('%-24s %10.3f\n' % ('total', total))
+        if report['counters']:
+            fp.write('\n%-24s %10s\n' % ('Counter', 'Count'))
+            for name, value in sorted(report['counters'].items()):
+                fp.write('%-24s %10d\n' % (name, value))
+        if 'profile' in report:
+            fp.write('\n%-72s %10s %10s %10s\n' % (
+                'Function', 'Calls', 'Seconds', 'Cumulative'))
+            for function in report['profile']:
+                fp.write('%-72s %10d %10.3f %10.3f\n' % (
+                    function['function'][-72:], function['calls'],
+                    function['seconds'], function['cumulativeSeconds']))
+            memory = report['memory']
+            fp.write('\nPeak traced memory %.1f MB, still allocated %.1f MB\n' % (
+                memory['peak'] / 1048576, memory['current'] / 1048576))
+            for allocation in memory['top']:
+                fp.write('%-72s %10.1f KB %8d blocks\n' % (
+                    allocation['location'][-72:], allocation['size'] / 1024, allocation['count']))
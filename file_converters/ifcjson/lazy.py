@@ -0,0 +1,629 @@
+# IFCJSON_python - lazy.py
+# Lazy ifcJSON file access, entities are only parsed when requested
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import bisect
+import collections.abc
+import hashlib
+import mmap
+import os
+import re
+import struct
+import ifcjson.serialization as serialization
+
+WHITESPACE = re.compile(rb'[ \t\n\r]*')
+
+# Strings are matched unrolled, runs of plain characters are consumed in one step
+STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+# Everything up to the next bracket, including complete strings, unrolled as well
+# so a failing match does not backtrack
+CONTENT = re.compile(
+    rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.DOTALL)
+
+# Arrays and objects without nested arrays or objects, like coordinate lists
+FLAT = re.compile(
+    rb'[\[{][^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*[\]}]', re.DOTALL)
+SCALAR = re.compile(rb'[^ \t\n\r,\]}]+')
+
+# Entity keys that are needed to index an entity
+ENTITY_KEYS = {b'type', b'globalId', b'representationType'}
+
+# Sidecar index file name is the ifcJSON file path with this extension added
+SIDECAR_EXTENSION = '.index'
+SIDECAR_VERSION = 2
+
+# Sidecar layout, all numbers are little endian and every table starts at a multiple of 8 bytes:
+# header, header attributes and type names as JSON, data spans (start, end),
+# entries (globalId offset, globalId length, data position), entry numbers sorted by
+# globalId for the index and for the geometry, index entry numbers by type, globalIds
+SIDECAR_MAGIC = b'IFCJSONX'
+SIDECAR_HEADER = struct.Struct('<8sIQq16sQQQQQ')
+SPAN = struct.Struct('<QQ')
+ENTRY = struct.Struct('<QII')
+
+# Number of bytes at the start and end of the file that are hashed to validate the sidecar
+SIDECAR_SAMPLE_SIZE = 1048576
+
+
+class Scanner:
+    def __init__(self, buffer):
+        """Tokenizer that walks through JSON text without building python objects,
+        nested values are skipped using regular expressions
+
+        parameters:
+        buffer: bytes or mmap containing JSON text
+
+        """
+        self.buffer = buffer
+        self.position = 0
+
+    def skipWhitespace(self):
+        self.position = WHITESPACE.match(self.buffer, self.position).end()
+
+    def peek(self):
+        """Returns the next non whitespace character"""
+
+        self.skipWhitespace()
+        return self.buffer[self.position:self.position + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError('Not a valid ifcJSON file, expected %s at position %d' % (
+                char.decode(), self.position))
+        self.position += 1
+
+    def skipString(self):
+        match = STRING.match(self.buffer, self.position)
+        if not match:
+            raise ValueError(
+                'Not a valid ifcJSON file, unterminated string at position %d' % self.position)
+        self.position = match.end()
+
+    def skipValue(self):
+        """Moves past the next value
+
+        Returns:
+        tuple: start and end position of the value
+
+        """
+        char = self.peek()
+        start = self.position
+        if char == b'"':
+            self.skipString()
+        elif char == b'{' or char == b'[':
+            match = FLAT.match(self.buffer, self.position)
+            if match:
+                self.position = match.end()
+                return start, self.position
+
+            # Only brackets are visited, the content between them is skipped at once
+            buffer = self.buffer
+            position = self.position
+            depth = 0
+            while True:
+                position = CONTENT.match(buffer, position).end()
+                char = buffer[position:position + 1]
+
+                # Content only ends at a quote when the string is not terminated
+                if char == b'"':
+                    self.position = position
+                    self.skipString()
+                if char == b'{' or char == b'[':
+                    depth += 1
+                elif char == b'}' or char == b']':
+                    depth -= 1
+                    if depth == 0:
+                        position += 1
+                        break
+                elif not char:
+                    raise ValueError(
+                        'Not a valid ifcJSON file, unexpected end of file')
+                position += 1
+            self.position = position
+        else:
+            match = SCALAR.match(self.buffer, self.position)
+            if not match:
+                raise ValueError(
+                    'Not a valid ifcJSON file, expected value at position %d' % self.position)
+            self.position = match.end()
+        return start, self.position
+
+    def members(self):
+        """Generator over the members of the object at the current position,
+        the value of each member must be consumed before the next iteration
+
+        Yields:
+        bytes: raw member key
+
+        """
+        self.expect(b'{')
+        if self.peek() == b'}':
+            self.position += 1
+            return
+        while True:
+            self.peek()
+            start = self.position
+            self.skipString()
+            key = self.buffer[start + 1:self.position - 1]
+            self.expect(b':')
+            yield key
+            if self.peek() == b'}':
+                self.position += 1
+                return
+            self.expect(b',')
+
+    def elements(self):
+        """Generator over the items of the array at the current position,
+        each item must be consumed before the next iteration
+
+        Yields:
+        int: start position of the item
+
+        """
+        self.expect(b'[')
+        if self.peek() == b']':
+            self.position += 1
+            return
+        while True:
+            yield self.position
+            if self.peek() == b']':
+                self.position += 1
+                return
+            self.expect(b',')
+
+    def readEntity(self):
+        """Moves past the next entity, only decoding the values needed for indexing
+
+        Returns:
+        tuple: start and end position, and dict of the decoded index values
+
+        """
+        values = {}
+        if self.peek() != b'{':
+            start, end = self.skipValue()
+            return start, end, values
+        start = self.position
+        for key in self.members():
+            if key in ENTITY_KEYS and self.peek() == b'"':
+                valueStart, valueEnd = self.skipValue()
+                values[key.decode()] = serialization.loads(
+                    self.buffer[valueStart:valueEnd])
+            else:
+                self.skipValue()
+        return start, self.position, values
+
+
+class LazyDocument:
+    def __init__(self, filePath, sidecar=False):
+        """ifcJSON file that is indexed without parsing the entities,
+        the file is memory mapped and entities are decoded when they are requested.
+        Only the entities in the 'data' list are indexed, not nested objects.
+
+        parameters:
+        filePath (string): ifcJSON file path
+        sidecar (boolean): if True then the index is stored next to the ifcJSON file
+            and reused on the next open, as long as the file is unchanged
+
+        """
+        self.filePath = filePath
+        self.file = open(filePath, 'rb')
+        try:
+            self.buffer = mmap.mmap(
+                self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError("Not a valid ifcJSON file")
+
+        # Header attributes
+        self.header = {}
+
+        # Start and end positions of all entities in the data list
+        self.dataSpans = []
+
+        # Start and end positions by globalId
+        self.indexSpans = {}
+        self.geometrySpans = {}
+
+        # GlobalIds by entity type
+        self.entityTypes = {}
+
+        # Memory mapped sidecar index
+        self.sidecar = None
+
+        if sidecar:
+            if not self.readSidecar():
+                self.scan()
+                self.writeSidecar()
+        else:
+            self.scan()
+        self.createContainers()
+
+    def scan(self):
+        """Records the position of all entities in the data list"""
+
+        scanner = Scanner(self.buffer)
+        char = scanner.peek()
+
+        # When ifcJson data is a complete filestructure including header
+        if char == b'{':
+            hasData = False
+            for key in scanner.members():
+                if key == b'data':
+                    hasData = True
+                    self.scanData(scanner)
+                else:
+                    start, end = scanner.skipValue()
+                    self.header[serialization.loads(b'"' + key + b'"')] = serialization.loads(
+                        self.buffer[start:end])
+            if not hasData:
+                raise ValueError("Not a valid ifcJSON file")
+
+        # When json data is just a list of objects
+        elif char == b'[':
+            self.scanData(scanner)
+        else:
+            raise ValueError("Not a valid ifcJSON file")
+
+    def scanData(self, scanner):
+        if scanner.peek() != b'[':
+            raise ValueError(
+                "Not a valid ifcJSON file, data object must contain a list of entities.")
+        for _ in scanner.elements():
+            start, end, values = scanner.readEntity()
+            self.dataSpans.append((start, end))
+            if 'type' in values and 'globalId' in values:
+                self.addToIndex(values, (start, end))
+
+    def addToIndex(self, values, span):
+        """Adds the entity position to one of the indexes, following IFCJSON.addToIndex
+        """
+        globalId = values['globalId']
+
+        # Seperately store mesh geometry (OBJ and Tessellation)
+        if values.get('representationType') in ('OBJ', 'Tessellation'):
+            self.geometrySpans[globalId] = span
+        else:
+            self.indexSpans[globalId] = span
+            entityType = values['type']
+            if not entityType in self.entityTypes:
+                self.entityTypes[entityType] = []
+            self.entityTypes[entityType].append(globalId)
+
+    def sidecarPath(self):
+        return self.filePath + SIDECAR_EXTENSION
+
+    def signature(self):
+        """Returns the file size, modification time and a hash of the start and
+        end of the file, used to check if the sidecar index is still valid
+
+        Returns:
+        tuple
+
+        """
+        stat = os.fstat(self.file.fileno())
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.buffer[:SIDECAR_SAMPLE_SIZE])
+        digest.update(self.buffer[-SIDECAR_SAMPLE_SIZE:])
+        return stat.st_size, stat.st_mtime_ns, digest.digest()
+
+    def readSidecar(self):
+        """Memory maps the index from the sidecar file, only the header attributes
+        and type names are decoded
+
+        Returns:
+        boolean: True if a valid sidecar index was read
+
+        """
+        try:
+            with open(self.sidecarPath(), 'rb') as sidecarFile:
+                sidecar = mmap.mmap(
+                    sidecarFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        try:
+            magic, version, size, mtime, digest, metaLength, dataCount, indexCount, \
+                geometryCount, keysLength = SIDECAR_HEADER.unpack_from(sidecar)
+        except struct.error:
+            sidecar.close()
+            return False
+        if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION or \
+                (size, mtime, digest) != self.signature():
+            sidecar.close()
+            return False
+        entryCount = indexCount + geometryCount
+        metaPosition = align(SIDECAR_HEADER.size)
+        spansPosition = align(metaPosition + metaLength)
+        entriesPosition = align(spansPosition + dataCount * SPAN.size)
+        orderPosition = align(entriesPosition + entryCount * ENTRY.size)
+        try:
+            meta = serialization.loads(
+                sidecar[metaPosition:metaPosition + metaLength])
+        except ValueError:
+            sidecar.close()
+            return False
+        orderCount = entryCount + sum(count for _, count in meta['types'])
+        keysPosition = align(orderPosition + orderCount * 4)
+        if keysPosition + keysLength != len(sidecar):
+            sidecar.close()
+            return False
+        spans = SidecarSpans(sidecar, spansPosition, dataCount)
+        entries = SidecarEntries(
+            sidecar, entriesPosition, keysPosition, spans)
+        order = memoryview(sidecar)[
+            orderPosition:orderPosition + orderCount * 4].cast('I')
+        self.sidecar = sidecar
+        self.header = meta['header']
+        self.dataSpans = spans
+        self.indexSpans = SidecarIndex(entries, 0, order[:indexCount])
+        self.geometrySpans = SidecarIndex(
+            entries, indexCount, order[indexCount:entryCount])
+        self.entityTypes = SidecarTypes(
+            entries, order[entryCount:], meta['types'])
+        return True
+
+    def writeSidecar(self):
+        """Writes the index to the sidecar file, failing to write is not an error"""
+
+        positions = {span: i for i, span in enumerate(self.dataSpans)}
+        indexNumbers = {globalId: i for i,
+                        globalId in enumerate(self.indexSpans)}
+        indexCount = len(self.indexSpans)
+        keys = []
+        keyBytes = bytearray()
+        entryTable = bytearray()
+        for spans in (self.indexSpans, self.geometrySpans):
+            for globalId, span in spans.items():
+                key = globalId.encode('utf-8')
+                entryTable += ENTRY.pack(len(keyBytes),
+                                         len(key), positions[span])
+                keyBytes += key
+                keys.append(key)
+        order = sorted(range(indexCount), key=keys.__getitem__) + \
+            sorted(range(indexCount, len(keys)), key=keys.__getitem__)
+        for globalIds in self.entityTypes.values():
+            order.extend(indexNumbers[globalId] for globalId in globalIds)
+
+        meta = serialization.dumps({
+            'header': self.header,
+            'types': [[entityType, len(globalIds)] for entityType, globalIds in self.entityTypes.items()]
+        }).encode('utf-8')
+        size, mtime, digest = self.signature()
+        temporaryPath = self.sidecarPath() + '.tmp'
+        try:
+            with open(temporaryPath, 'wb') as sidecarFile:
+                sidecarFile.write(pad(SIDECAR_HEADER.pack(
+                    SIDECAR_MAGIC, SIDECAR_VERSION, size, mtime, digest, len(meta),
+                    len(self.dataSpans), indexCount, len(self.geometrySpans), len(keyBytes))))
+                sidecarFile.write(pad(meta))
+                sidecarFile.write(pad(b''.join(
+                    SPAN.pack(*span) for span in self.dataSpans)))
+                sidecarFile.write(pad(bytes(entryTable)))
+                sidecarFile.write(pad(struct.pack('<%dI' % len(order), *order)))
+                sidecarFile.write(bytes(keyBytes))
+            os.replace(temporaryPath, self.sidecarPath())
+        except OSError as e:
+            print(str(e) + ': Unable to write index for ' + self.filePath)
+
+    def createContainers(self):
+        self.data = LazyList(self, self.dataSpans)
+        self.index = LazyDict(self, self.indexSpans)
+        self.geometry = LazyDict(self, self.geometrySpans)
+
+    def entityAt(self, span):
+        """Decodes the entity at the given position
+
+        Parameters:
+        span (tuple): start and end position
+
+        Returns:
+        dict
+
+        """
+        return serialization.loads(self.buffer[span[0]:span[1]])
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+        if self.sidecar is not None:
+            self.indexSpans.order.release()
+            self.geometrySpans.order.release()
+            self.entityTypes.order.release()
+            self.dataSpans.values.release()
+            self.sidecar.close()
+
+
+class LazyList(collections.abc.Sequence):
+    """Read only list of entities that are decoded on access"""
+
+    def __init__(self, document, spans):
+        self.document = document
+        self.spans = spans
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.document.entityAt(x) for x in self.spans[index]]
+        return self.document.entityAt(self.spans[index])
+
+    def __len__(self):
+        return len(self.spans)
+
+
+class LazyDict(collections.abc.Mapping):
+    """Read only dictionary of entities by globalId that are decoded on access"""
+
+    def __init__(self, document, spans):
+        self.document = document
+        self.spans = spans
+
+    def __getitem__(self, globalId):
+        return self.document.entityAt(self.spans[globalId])
+
+    def __contains__(self, globalId):
+        return globalId in self.spans
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+
+def align(position):
+    """Returns the position rounded up to a multiple of 8 bytes"""
+
+    return (position + 7) // 8 * 8
+
+
+def pad(data):
+    """Returns the bytes padded with zeros to a multiple of 8 bytes"""
+
+    return data + bytes(align(len(data)) - len(data))
+
+
+class SidecarSpans(collections.abc.Sequence):
+    """Read only list of (start, end) data spans in a memory mapped sidecar index"""
+
+    def __init__(self, buffer, position, count):
+        self.values = memoryview(buffer)[
+            position:position + count * SPAN.size].cast('Q')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('span index out of range')
+        return self.values[index * 2], self.values[index * 2 + 1]
+
+    def __len__(self):
+        return len(self.values) // 2
+
+
+class SidecarEntries:
+    def __init__(self, buffer, position, keysPosition, spans):
+        """Fixed width globalId entries in a memory mapped sidecar index
+
+        parameters:
+        buffer: memory mapped sidecar file
+        position (int): position of the entry table
+        keysPosition (int): position of the globalId bytes
+        spans (SidecarSpans): data spans the entries refer to
+
+        """
+        self.buffer = buffer
+        self.position = position
+        self.keysPosition = keysPosition
+        self.spans = spans
+
+    def entry(self, number):
+        return ENTRY.unpack_from(self.buffer, self.position + number * ENTRY.size)
+
+    def key(self, number):
+        keyStart, keyLength, dataPosition = self.entry(number)
+        start = self.keysPosition + keyStart
+        return self.buffer[start:start + keyLength]
+
+    def globalId(self, number):
+        return self.key(number).decode('utf-8')
+
+    def span(self, number):
+        return self.spans[self.entry(number)[2]]
+
+
+class SidecarIndex(collections.abc.Mapping):
+    """Read only dictionary of data spans by globalId in a memory mapped sidecar index,
+    globalIds are found with a binary search"""
+
+    def __init__(self, entries, first, order):
+        self.entries = entries
+        self.first = first
+        self.order = order
+
+    def find(self, globalId):
+        """Returns the entry number of a globalId, or None if it is not in the index"""
+
+        if not isinstance(globalId, str):
+            return None
+        key = globalId.encode('utf-8')
+        keys = KeyView(self.entries, self.order)
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return self.order[i]
+        return None
+
+    def __getitem__(self, globalId):
+        number = self.find(globalId)
+        if number is None:
+            raise KeyError(globalId)
+        return self.entries.span(number)
+
+    def __contains__(self, globalId):
+        return self.find(globalId) is not None
+
+    def __iter__(self):
+        for number in range(self.first, self.first + len(self.order)):
+            yield self.entries.globalId(number)
+
+    def __len__(self):
+        return len(self.order)
+
+
+class KeyView(collections.abc.Sequence):
+    """Sorted globalId bytes of a sidecar index, used for binary search"""
+
+    def __init__(self, entries, order):
+        self.entries = entries
+        self.order = order
+
+    def __getitem__(self, index):
+        return self.entries.key(self.order[index])
+
+    def __len__(self):
+        return len(self.order)
+
+
+class SidecarTypes(collections.abc.Mapping):
+    """Read only dictionary of globalId lists by entity type in a memory mapped sidecar index"""
+
+    def __init__(self, entries, order, types):
+        self.entries = entries
+        self.order = order
+        self.ranges = {}
+        start = 0
+        for entityType, count in types:
+            self.ranges[entityType] = (start, start + count)
+            start += count
+
+    def __getitem__(self, entityType):
+        start, end = self.ranges[entityType]
+        return [self.entries.globalId(self.order[i]) for i in range(start, end)]
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def __len__(self):
+        return len(self.ranges)
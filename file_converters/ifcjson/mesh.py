@@ -1,3 +1,18 @@
+import array
+import itertools
+import ifcjson.obj as obj
+
+# NumPy is optional, without it meshes are stored in python arrays
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Python array typecodes for the supported vertex types, faces are always int32
+VERTEX_TYPES = {'float64': 'd', 'float32': 'f'}
+INDEX_TYPE = 'i'
+
+
 class ObjMesh:
     def __init__(self, *argv):
         self.globalId = ""
@@ -12,28 +27,201 @@ class ObjMesh:
             self.faces = argv[1]
     
     def splitObjString(self, objString):
-        lines = objString.splitlines()
-        for line in lines:
-            ent = line.split()
-            type = ent.pop(0)
-            if type == 'v':
-                self.vertices.append(list(map(float, ent)))
-            elif type == 'f':
-                self.faces.append(list(map(int, ent)))
-    
-    def toObjString(self):
-        vertsList = [' '.join(map(str, self.vertices[x:x+3]))
-                        for x in range(0, len(self.vertices), 3)]
-        vertString = 'v ' + '\nv '.join(vertsList) + '\n'
+        self.vertices, self.faces = obj.parseObj(objString)
 
-        facesList = [' '.join(map(str, self.faces[x:x+3]))
-                        for x in range(0, len(self.faces), 3)]
-        faceString = 'f ' + '\nf '.join(map(str, facesList)) + '\n'
+    def transformed(self, matrix):
+        """Returns a copy of the mesh with the vertices transformed by a placement matrix
+
+        Parameters:
+        matrix: column major 4x4 matrix as flat list of 16 numbers
+
+        Returns:
+        ObjMesh
+
+        """
+        vertices = transformVertices(flatten(self.vertices), matrix)
+        return ObjMesh([vertices[i:i+3] for i in range(0, len(vertices), 3)], self.faces)
+
+    def toObjString(self, precision=None):
+        faces = self.faces
+        if len(faces) and isinstance(faces[0], (list, tuple)):
+
+            # Faces that are not triangles are written one line at a time
+            if any(len(face) != 3 for face in faces):
+                return obj.formatVertices(flatten(self.vertices), precision) + ''.join(
+                    ['f ' + ' '.join([str(index + 1) for index in face]) + '\n' for face in faces])
+        return obj.formatObj(flatten(self.vertices), flatten(faces), precision)
 
-        return vertString + faceString
-    
     def toVertices(self):
         return self.vertices
     
     def toFaces(self):
-        return self.faces
\ No newline at end of file
+        return self.faces
+
+
+def flatten(values):
+    """Returns a flat iterable for a flat or nested (per vertex) list of numbers"""
+
+    if len(values) and isinstance(values[0], (list, tuple)):
+        return itertools.chain.from_iterable(values)
+    return values
+
+
+def transformVertices(vertices, matrix):
+    """Returns the flat list of vertex coordinates transformed by a column major 4x4 matrix"""
+
+    m = matrix
+    values = list(vertices)
+    result = []
+    for i in range(0, len(values), 3):
+        x, y, z = values[i:i+3]
+        result.extend((m[0] * x + m[4] * y + m[8] * z + m[12],
+                       m[1] * x + m[5] * y + m[9] * z + m[13],
+                       m[2] * x + m[6] * y + m[10] * z + m[14]))
+    return result
+
+
+def offsetIndices(faces, offset):
+    """Returns a copy of a flat or nested (per face) list or buffer of vertex indices
+    with offset added to every index, buffers are copied to an int32 python array"""
+
+    if isinstance(faces, (array.array, memoryview)):
+        return array.array(INDEX_TYPE, [index + offset for index in faces])
+    if len(faces) and isinstance(faces[0], (list, tuple)):
+        return [[index + offset for index in face] for face in faces]
+    return [index + offset for index in faces]
+
+
+def isBuffer(values, typecode):
+    """Checks if values is a flat python array or memoryview of the given type,
+    which can be used as mesh buffer without copying"""
+
+    if isinstance(values, array.array):
+        return values.typecode == typecode
+    if isinstance(values, memoryview):
+        return values.format == typecode and values.ndim == 1
+    return False
+
+
+class ArrayMesh:
+    def __init__(self, vertices, faces, dtype='float64'):
+        """Mesh stored in two contiguous buffers, a vertex buffer of 3 coordinates
+        per vertex and an int32 index buffer of 3 vertex indices per triangle.
+        The buffers are NumPy arrays when NumPy is installed, otherwise python arrays
+        or memoryviews of a binary buffer.
+
+        parameters:
+        vertices: flat or nested list of vertex coordinates, or a flat buffer
+        faces: flat or nested list of vertex indices, or a flat buffer
+        dtype (string): vertex coordinate type, 'float64' or 'float32'
+
+        """
+        if not dtype in VERTEX_TYPES:
+            raise ValueError('Unsupported vertex type "%s"' % dtype)
+        self.globalId = ""
+        self.dtype = dtype
+        if numpy is not None:
+            self.vertexBuffer = numpy.ascontiguousarray(
+                vertices, dtype=dtype).reshape(-1)
+            self.indexBuffer = numpy.ascontiguousarray(
+                faces, dtype='int32').reshape(-1)
+        else:
+            if isBuffer(vertices, VERTEX_TYPES[dtype]):
+                self.vertexBuffer = vertices
+            else:
+                self.vertexBuffer = array.array(
+                    VERTEX_TYPES[dtype], flatten(vertices))
+            if isBuffer(faces, INDEX_TYPE):
+                self.indexBuffer = faces
+            else:
+                self.indexBuffer = array.array(INDEX_TYPE, flatten(faces))
+
+    @classmethod
+    def fromObjString(cls, objString, dtype='float64'):
+        """Creates an array mesh from an OBJ string
+
+        Parameters:
+        objString (string): OBJ vertex and face lines
+        dtype (string): vertex coordinate type, 'float64' or 'float32'
+
+        Returns:
+        ArrayMesh
+
+        """
+        vertices, faces = obj.parseObj(objString, flat=True)
+        return cls(vertices, faces, dtype)
+
+    def transformed(self, matrix):
+        """Returns a copy of the mesh with the vertices transformed by a placement matrix,
+        the index buffer is shared
+
+        Parameters:
+        matrix: column major 4x4 matrix as flat list of 16 numbers
+
+        Returns:
+        ArrayMesh
+
+        """
+        if numpy is not None:
+            m = numpy.asarray(matrix, dtype='float64').reshape(4, 4)
+            vertices = self.vertexBuffer.reshape(-1, 3) @ m[:3, :3] + m[3, :3]
+        else:
+            vertices = transformVertices(self.vertexBuffer, matrix)
+        return ArrayMesh(vertices, self.indexBuffer, self.dtype)
+
+    def vertexCount(self):
+        return len(self.vertexBuffer) // 3
+
+    def faceCount(self):
+        return len(self.indexBuffer) // 3
+
+    def vertices(self):
+        """Returns the vertex buffer as array of vertices without copying
+
+        Returns:
+        NumPy array or memoryview with shape (vertex count, 3)
+
+        """
+        if numpy is not None:
+            return self.vertexBuffer.reshape(-1, 3)
+
+        # Memoryviews can not have a zero length dimension
+        if not self.vertexBuffer:
+            return memoryview(self.vertexBuffer)
+        return memoryview(self.vertexBuffer).cast('B').cast(
+            VERTEX_TYPES[self.dtype], (self.vertexCount(), 3))
+
+    def faces(self):
+        """Returns the index buffer as array of triangles without copying
+
+        Returns:
+        NumPy array or memoryview with shape (face count, 3)
+
+        """
+        if numpy is not None:
+            return self.indexBuffer.reshape(-1, 3)
+
+        # Memoryviews can not have a zero length dimension
+        if not self.indexBuffer:
+            return memoryview(self.indexBuffer)
+        return memoryview(self.indexBuffer).cast('B').cast(
+            INDEX_TYPE, (self.faceCount(), 3))
+
+    def vertexBytes(self):
+        """Returns the raw bytes of the vertex buffer without copying"""
+
+        return memoryview(self.vertexBuffer).cast('B')
+
+    def indexBytes(self):
+        """Returns the raw bytes of the index buffer without copying"""
+
+        return memoryview(self.indexBuffer).cast('B')
+
+    def toObjString(self, precision=None):
+        return obj.formatObj(self.vertexBuffer.tolist(), self.indexBuffer.tolist(), precision)
+
+    def toVertices(self):
+        return self.vertices().tolist()
+
+    def toFaces(self):
+        return self.faces().tolist()
@@ -0,0 +1,141 @@
+# IFCJSON_python - obj.py
+# Parsing and formatting of OBJ mesh strings
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""OBJ strings are formatted with a single string formatting operation per block
+of vertices or faces, and parsed by collecting all vertex or face lines and
+converting their values in one pass. Only 'v' and 'f' lines are used.
+OBJ vertex indices start at 1, the face lists used by the converters start at 0.
+"""
+
+import re
+
+VERTEX_LINES = re.compile(r'^v[ \t](.*)$', re.MULTILINE)
+FACE_LINES = re.compile(r'^f[ \t](.*)$', re.MULTILINE)
+
+
+def vertexFormat(precision=None):
+    """Returns the format string for a single vertex line
+
+    Parameters:
+    precision (int): number of decimals, None for the python string representation
+
+    Returns:
+    string
+
+    """
+    if precision is None:
+        return 'v %s %s %s\n'
+    coordinate = '%.' + str(int(precision)) + 'f'
+    return 'v ' + ' '.join([coordinate] * 3) + '\n'
+
+
+def formatVertices(verts, precision=None):
+    """Formats a flat list of vertex coordinates as OBJ vertex lines
+
+    Parameters:
+    verts: flat sequence of vertex coordinates, 3 per vertex
+    precision (int): number of decimals, None for the python string representation
+
+    Returns:
+    string
+
+    """
+    verts = tuple(verts)
+    return vertexFormat(precision) * (len(verts) // 3) % verts
+
+
+def formatFaces(faces):
+    """Formats a flat list of vertex indices as OBJ face lines
+
+    Parameters:
+    faces: flat sequence of 0-based vertex indices, 3 per triangle
+
+    Returns:
+    string
+
+    """
+    faces = tuple(index + 1 for index in faces)
+    return 'f %d %d %d\n' * (len(faces) // 3) % faces
+
+
+def formatObj(verts, faces, precision=None):
+    """Formats a triangle mesh as OBJ string
+
+    Parameters:
+    verts: flat sequence of vertex coordinates, 3 per vertex
+    faces: flat sequence of 0-based vertex indices, 3 per triangle
+    precision (int): number of decimals, None for the python string representation
+
+    Returns:
+    string: OBJ string
+
+    """
+    return formatVertices(verts, precision) + formatFaces(faces)
+
+
+def parseLines(lines, convert, flat):
+    """Converts the values of OBJ lines, all at once when every line has 3 values
+
+    Parameters:
+    lines (list): line contents without the line type
+    convert: conversion function of a single value, like float
+    flat (boolean): if True then a flat list of values is returned
+
+    Returns:
+    list
+
+    """
+    values = ' '.join(lines).split()
+    if len(values) == 3 * len(lines):
+        values = list(map(convert, values))
+        if flat:
+            return values
+        return [values[i:i + 3] for i in range(0, len(values), 3)]
+    if flat:
+        raise ValueError('Only triangle meshes can be read as flat lists')
+    return [list(map(convert, line.split())) for line in lines]
+
+
+def faceIndex(value):
+    """Returns the 0-based vertex index of an OBJ face value"""
+
+    return int(value) - 1
+
+
+def parseObj(objString, flat=False):
+    """Reads the vertices and faces from an OBJ string
+
+    Parameters:
+    objString (string): OBJ string
+    flat (boolean): if True then flat lists of values are returned instead of a list per line
+
+    Returns:
+    tuple: vertices and faces with 0-based vertex indices
+
+    """
+    vertices = parseLines(VERTEX_LINES.findall(objString), float, flat)
+    faces = parseLines(FACE_LINES.findall(objString), faceIndex, flat)
+    return vertices, faces
@@ -1,14 +1,33 @@
+import mmap
+import os
+import ifcjson.buffer as buffer
 import ifcjson.mesh as mesh
+import ifcjson.serialization as serialization
+from ifcjson.lazy import LazyDocument
+
+# Attributes that only contain numbers, these are not searched for nested objects
+LEAF_KEYS = frozenset(('coordList', 'coordIndex', 'normals',
+                       'pnIndex', 'texCoordIndex', 'texCoordList'))
+
+NUMBER_TYPES = frozenset((int, float))
 
 class IFCJSON:
-    def __init__(self, json):
+    def __init__(self, json, maxDepth=None, basePath=''):
         """ifcJSON data reader
 
         parameters:
-        ifcJSON data
+        ifcJSON data, or a LazyDocument
+        maxDepth (int): maximum number of nested dicts and lists below an entity in the
+            data list that are searched for objects with a globalId, None for no limit
+        basePath (string): folder of the ifcJSON file, binary buffer paths are relative to it
 
         """
         self.json = json
+        self.maxDepth = maxDepth
+        self.basePath = basePath
+
+        # Memory mapped binary buffers by uri
+        self.buffers = {}
 
         # Main object container
         self.index = {}
@@ -28,6 +47,15 @@ class IFCJSON:
         self.timeStamp = None
         self.application = None
         
+        # When entities are read from the file on request, only the index is available
+        if isinstance(json, LazyDocument):
+            self.parseHeader(json.header)
+            self.data = json.data
+            self.index = json.index
+            self.entityTypes = json.entityTypes
+            self.geometry = json.geometry
+            return
+
         # When ifcJson data is a complete filestructure including header
         if type(json) is dict:
             self.parseHeader(json)
@@ -44,6 +72,93 @@ class IFCJSON:
 
         self.parseData(self.data)
 
+    @classmethod
+    def from_file(cls, filePath, lazy=False, sidecar=False, maxDepth=None):
+        """Creates an ifcJSON data reader for an ifcJSON file
+
+        Parameters:
+        filePath (string): ifcJSON file path
+        lazy (boolean): if True then the file is only indexed and entities are
+            read from the file when they are requested. Returned entities are new
+            dicts on every request and nested objects are not indexed.
+        sidecar (boolean): if True then the lazy index is stored in a file next to
+            the ifcJSON file and reused when the file is opened again unchanged
+        maxDepth (int): maximum nesting depth that is searched for objects with a
+            globalId, None for no limit. Not used for lazy files.
+
+        Returns:
+        IFCJSON
+
+        """
+        basePath = os.path.dirname(filePath)
+        if lazy:
+            return cls(LazyDocument(filePath, sidecar), basePath=basePath)
+        with open(filePath, 'rb') as ifcJsonFile:
+            return cls(serialization.load(ifcJsonFile), maxDepth, basePath)
+
+    def close(self):
+        """Closes the ifcJSON file when it was opened lazily and all binary buffers,
+        meshes that use the buffers must be released first"""
+
+        if isinstance(self.json, LazyDocument):
+            self.json.close()
+        for bufferFile, bufferData in self.buffers.values():
+            if isinstance(bufferData, mmap.mmap):
+                bufferData.close()
+            bufferFile.close()
+        self.buffers = {}
+
+    def bufferData(self, uri):
+        """Returns the memory mapped contents of a binary buffer file
+
+        Parameters:
+        uri (string): binary file path relative to the ifcJSON file
+
+        Returns:
+        mmap
+
+        """
+        if not uri in self.buffers:
+            bufferFile = open(os.path.join(self.basePath, uri), 'rb')
+            try:
+                bufferData = mmap.mmap(
+                    bufferFile.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+
+                # Empty files can not be memory mapped
+                bufferData = b''
+            self.buffers[uri] = (bufferFile, bufferData)
+        return self.buffers[uri][1]
+
+    def accessorValues(self, accessor):
+        """Returns the flat list of values a buffer accessor refers to, read from the
+        memory mapped binary buffer without copying
+
+        Parameters:
+        accessor (dict): buffer accessor object
+
+        Returns:
+        memoryview
+
+        """
+        return buffer.accessorValues(self.bufferData(accessor['buffer']), accessor)
+
+    def numericList(self, value):
+        """Returns the values of a numeric list attribute that is either a JSON list
+        or a buffer accessor
+
+        Parameters:
+        value: list or buffer accessor
+
+        Returns:
+        list or memoryview, or None if the value is not a numeric list
+
+        """
+        if isinstance(value, list):
+            return value
+        if buffer.isAccessor(value):
+            return self.accessorValues(value)
+
     def parseHeader(self, json):
         
         # If no fileSchema available, assume it's ifcJSON-4
@@ -74,16 +189,40 @@ class IFCJSON:
             self.parseValue(entity)
 
     def parseValue(self, entity):
-        if type(entity) is dict:
-            if 'type' in entity:
-                if 'globalId' in entity:
-                    self.addToIndex(entity)
+        """Adds the entity and all nested objects with a globalId to the index,
+        in the same order as a recursive depth first traversal
+
+        Parameters:
+        entity: ifcJSON value
+
+        """
+        maxDepth = self.maxDepth
+        stack = [(entity, 0)]
+        while stack:
+            value, depth = stack.pop()
+            if type(value) is dict:
+                if 'type' in value:
+                    if 'globalId' in value:
+                        self.addToIndex(value)
+                children = [value[key] for key in value if not key in LEAF_KEYS]
+            elif type(value) is list:
+
+                # Lists of numbers can not contain objects, all element types are
+                # checked because lists can mix numbers with objects
+                if not value or NUMBER_TYPES.issuperset(map(type, value)):
+                    continue
+                children = value
+            else:
+                continue
+            if maxDepth is not None and depth >= maxDepth:
+                continue
 
-            for value in entity:
-                self.parseValue(entity[value])
-        elif type(entity) is list:
-            for listItem in entity:
-                self.parseValue(listItem)
+            # Children are pushed in reverse so they are visited in their original order
+            depth += 1
+            for child in reversed(children):
+                childType = type(child)
+                if childType is dict or childType is list:
+                    stack.append((child, depth))
 
     def addType(self, entity):
         entityType = entity['type']
@@ -207,8 +346,15 @@ class IFCJSON:
         return {x['globalId']:x for x in self.data}
 
 
-    def geometryAsMeshes(self):
+    def geometryAsMeshes(self, asArrays=False, dtype='float64'):
         """Returns the OBJ or Tessellation geometry as lists of globalIds, vertices per mesh and faces per mesh.
+        Face vertex indices start at 0.
+
+        Parameters:
+        asArrays (boolean): if True then meshes are returned as mesh.ArrayMesh with
+            contiguous vertex and index buffers instead of mesh.ObjMesh. Geometry in a
+            binary buffer is used without copying when the vertex type matches dtype.
+        dtype (string): vertex coordinate type of array meshes, 'float64' or 'float32'
 
         Returns:
         dict: mesh objects by globalId
@@ -222,9 +368,21 @@ class IFCJSON:
                     if value['representationType'] == 'OBJ':
                         meshes[globalId] = []
                         for item in value['items']:
-                            mesh2 = mesh.ObjMesh(item)
-                            print(type(mesh2))
-                            meshes[globalId].append(mesh2)
+
+                            # OBJ meshes that are written to a binary buffer
+                            if isinstance(item, dict):
+                                if 'vertices' in item and 'faces' in item:
+                                    vertices = self.numericList(item['vertices'])
+                                    faces = self.numericList(item['faces'])
+                                    if vertices is not None and faces is not None:
+                                        meshes[globalId].append(
+                                            self.createMesh(vertices, faces, asArrays, dtype))
+                            elif asArrays:
+                                mesh2 = mesh.ArrayMesh.fromObjString(item, dtype)
+                                meshes[globalId].append(mesh2)
+                            else:
+                                mesh2 = mesh.ObjMesh(item)
+                                meshes[globalId].append(mesh2)
                     elif value['representationType'] == 'Tessellation':
                         meshes[globalId] = []
                         for item in value['items']:
@@ -234,17 +392,64 @@ class IFCJSON:
                                         coordinates = item['coordinates']
                                         if 'type' in coordinates:
                                             if coordinates['type'] == 'IfcCartesianPointList3D':
-                                                if 'coordList' in coordinates:
-                                                    if isinstance(coordinates['coordList'], list):
-                                                        if 'coordIndex' in item:
-                                                            if isinstance(item['coordIndex'], list):
-                                                                vertices = coordinates['coordList']
-                                                                # print(vertices)
-                                                                faces = item['coordIndex']
-                                                                mesh1 = mesh.ObjMesh(vertices, faces)
-                                                                # print(type(mesh1))
-                                                                meshes[globalId].append(mesh1)
+                                                if 'coordList' in coordinates and 'coordIndex' in item:
+                                                    vertices = self.numericList(coordinates['coordList'])
+                                                    faces = self.numericList(item['coordIndex'])
+                                                    if vertices is not None and faces is not None:
+
+                                                        # IFC coordinate indices start at 1, mesh indices at 0
+                                                        faces = mesh.offsetIndices(faces, -1)
+                                                        mesh1 = self.createMesh(vertices, faces, asArrays, dtype)
+                                                        meshes[globalId].append(mesh1)
         return meshes
-            
 
+    def productMeshes(self, asArrays=False, dtype='float64'):
+        """Returns the OBJ meshes of every ifcJSON-5a product. Meshes that are written with
+        --share_meshes are in object coordinates and are shared by several products, these
+        are placed with the "transformation" of the product's representation reference.
+
+        Parameters:
+        asArrays (boolean): if True then meshes are returned as mesh.ArrayMesh instead of mesh.ObjMesh
+        dtype (string): vertex coordinate type of array meshes, 'float64' or 'float32'
+
+        Returns:
+        dict: lists of mesh objects by product globalId
+
+        """
+        meshes = self.geometryAsMeshes(asArrays, dtype)
+        products = {}
+        for globalId in self.index:
+            representations = self.index[globalId].get('representations')
+            if not isinstance(representations, list):
+                continue
+            for ref in representations:
+                if isinstance(ref, dict) and ref.get('ref') in meshes:
+                    matrix = ref.get('transformation')
+                    productMeshes = products.setdefault(globalId, [])
+                    for item in meshes[ref['ref']]:
+                        if matrix is not None:
+                            item = item.transformed(matrix)
+                        productMeshes.append(item)
+        return products
+
+    def createMesh(self, vertices, faces, asArrays=False, dtype='float64'):
+        """Returns a mesh object for a list of vertices and faces
+
+        Parameters:
+        vertices: nested list of vertex coordinates, or flat buffer
+        faces: nested list of vertex indices, or flat buffer
+        asArrays (boolean): if True then a mesh.ArrayMesh is returned instead of mesh.ObjMesh
+        dtype (string): vertex coordinate type of array meshes, 'float64' or 'float32'
 
+        Returns:
+        mesh.ObjMesh or mesh.ArrayMesh
+
+        """
+        if asArrays:
+            return mesh.ArrayMesh(vertices, faces, dtype)
+
+        # ObjMesh keeps the same nested lists as JSON geometry
+        if not isinstance(vertices, list) or not isinstance(faces, list):
+            arrayMesh = mesh.ArrayMesh(vertices, faces, dtype)
+            return mesh.ObjMesh(arrayMesh.toVertices(), arrayMesh.toFaces())
+        return mesh.ObjMesh(vertices, faces)
@@ -0,0 +1,166 @@
+# IFCJSON_python - serialization.py
+# JSON encoding and decoding using the fastest available backend
+# https://github.com/IFCJSON-Team
+
+# MIT License
+
+# Copyright (c) 2020 Jan Brouwer <jan@brewsky.nl>
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""The backend is selected on import in order of preference, the standard library
+json module is always available as fallback. Values that a backend can not encode,
+like integers that do not fit in 64 bits for orjson, are encoded with json.
+"""
+
+import importlib
+import json
+
+# Backends in order of preference
+ENCODERS = ('orjson', 'ujson', 'json')
+DECODERS = ('orjson', 'simdjson', 'ujson', 'json')
+
+encoder = None
+decoder = None
+
+
+def availableBackends():
+    """Returns the names of all installed backends
+
+    Returns:
+    list
+
+    """
+    backends = []
+    for name in ENCODERS + DECODERS:
+        if not name in backends:
+            try:
+                importlib.import_module(name)
+                backends.append(name)
+            except ImportError:
+                pass
+    return backends
+
+
+def setBackend(name=None):
+    """Selects the backend used for encoding and decoding
+
+    Parameters:
+    name (string): backend module name, or None to select the fastest installed backend
+
+    """
+    global encoder, decoder
+    backends = availableBackends()
+    if name is not None and not name in backends:
+        raise ValueError('JSON backend "%s" is not installed' % name)
+    encoder = None
+    decoder = None
+    for encoderName in ENCODERS:
+        if encoderName in backends and name in (None, encoderName):
+            encoder = importlib.import_module(encoderName)
+            break
+    for decoderName in DECODERS:
+        if decoderName in backends and name in (None, decoderName):
+            decoder = importlib.import_module(decoderName)
+            break
+
+    # simdjson only decodes
+    if encoder is None:
+        encoder = json
+
+
+def backendName():
+    """Returns the names of the selected encoder and decoder
+
+    Returns:
+    tuple: encoder and decoder module name
+
+    """
+    return encoder.__name__, decoder.__name__
+
+
+def dumps(obj, indent=None):
+    """Encodes a python object, including tuples, as JSON string
+
+    Parameters:
+    obj: python object
+    indent (int): json indentation, None for compact output
+
+    Returns:
+    string
+
+    """
+    if encoder.__name__ == 'orjson':
+
+        # orjson only supports an indentation of 2 spaces
+        if indent is None or indent == 2:
+            option = encoder.OPT_INDENT_2 if indent else 0
+            try:
+                return encoder.dumps(obj, option=option).decode()
+            except TypeError:
+                pass
+    elif encoder.__name__ == 'ujson':
+        try:
+            return encoder.dumps(obj, indent=indent or 0, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            pass
+    return json.dumps(obj, indent=indent)
+
+
+def dump(obj, fp, indent=None):
+    """Encodes a python object as JSON and writes it to a text file object
+
+    Parameters:
+    obj: python object
+    fp: writable text file object
+    indent (int): json indentation, None for compact output
+
+    """
+    fp.write(dumps(obj, indent))
+
+
+def loads(data):
+    """Decodes a JSON string or bytes object
+
+    Parameters:
+    data: str, bytes or memoryview containing JSON
+
+    Returns:
+    python object
+
+    """
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return decoder.loads(data)
+
+
+def load(fp):
+    """Reads and decodes a JSON file object
+
+    Parameters:
+    fp: readable text or binary file object
+
+    Returns:
+    python object
+
+    """
+    return loads(fp.read())
+
+
+setBackend()
@@ -1,11 +1,12 @@
-import json
-import pandas as pd
-import uuid
+import os
 
 import ifcopenshell
-import ifcopenshell.guid
 import ifcopenshell.template
 
+import ifcjson.buffer as buffer
+import ifcjson.globalid as globalid
+from ifcjson.instrumentation import Instrumentation
+import ifcjson.serialization as serialization
 from ifcjson.reader import IFCJSON
 
 # Specific JSON types that need mapping
@@ -17,7 +18,14 @@ EXCLUDE_ATTRIBUTES = ['id', 'type', 'dimensions']
 
 class JSON2IFC(IFCJSON):
 
-    def __init__(self, inFilePath):
+    def __init__(self, inFilePath, instrumentation=None):
+        """ifcJSON to ifcopenshell model converter
+
+        parameters:
+        inFilePath (string): ifcJSON file path
+        instrumentation (instrumentation.Instrumentation): collects phase timings and entity counters, a new one is created if not set
+
+        """
 
         self.fileSchema = None
         self.schemaIdentifier = None
@@ -28,8 +36,18 @@ class JSON2IFC(IFCJSON):
         self.timeStamp = None
         self.application = None
 
-        with open(inFilePath) as ifcJsonFile:
-            ifcJson = json.load(ifcJsonFile)
+        # Binary buffers are relative to the ifcJSON file
+        self.basePath = os.path.dirname(inFilePath)
+        self.buffers = {}
+
+        if instrumentation is None:
+            self.instrumentation = Instrumentation()
+        else:
+            self.instrumentation = instrumentation
+
+        with open(inFilePath, 'rb') as ifcJsonFile:
+            with self.instrumentation.phase('load'):
+                ifcJson = serialization.load(ifcJsonFile)
 
             # When ifcJson data is a complete filestructure including header
             if type(ifcJson) is dict:
@@ -63,44 +81,27 @@ class JSON2IFC(IFCJSON):
 
         return string[0].upper() + string[1:]
 
-    def isNaN(self, num):
-        return num != num
-
-    def uuidToGlobalId(self, uuidString):
-        if not self.isNaN(uuidString):
-            return ifcopenshell.guid.compress(uuid.UUID(uuidString).hex)
-        else:
-            return uuid
-
-    def readData(self, data):
-        self.data = pd.DataFrame()
-        self.data["data"] = data
-        self.data['type'] = self.data['data'].apply(pd.Series)['type']
-        self.data['uuid'] = self.data['data'].apply(pd.Series)['globalId']
-        return(self.data)
-
     def createNestedEntity(self, attributes):
         entityType = attributes['type']
         entity = self.model.create_entity(entityType)
+        self.instrumentation.count('nested')
         self.fillEntity(attributes, entity)
         return entity
 
-    def fillEntityFromDf(self, row):
-        data = row.data
-        entity = self.model.by_id(row.id)
-        self.fillEntity(data, entity)
-
-    def createEntity(self, row):
-        entityType = row.type
+    def createEntity(self, data):
+        entityType = data['type']
         entity = self.model.create_entity(entityType)
         return entity.id()
 
     def getAttributeObject(self, attributeValue):
         if type(attributeValue) is dict:
+            if buffer.isAccessor(attributeValue):
+                values = self.accessorValues(attributeValue).tolist()
+                itemSize = attributeValue['itemSize']
+                return [values[i:i + itemSize] for i in range(0, len(values), itemSize)]
             if 'ref' in attributeValue:
-                row = self.data.loc[self.data['uuid'] ==
-                                    attributeValue['ref']]['id'].values
-                return self.model.by_id(int(row[0]))
+                self.instrumentation.count('referenced')
+                return self.model.by_id(self.entityIds[attributeValue['ref']])
             else:
                 return self.createNestedEntity(attributeValue)
         elif type(attributeValue) is list:
@@ -120,8 +121,8 @@ class JSON2IFC(IFCJSON):
                 continue
             if attribute in EXCLUDE_ATTRIBUTES:
                 continue
-            if attribute == 'globalId':
-                data['globalId'] = self.uuidToGlobalId(data['globalId'])
+            if attribute == 'globalId' and data['globalId'] is not None:
+                data['globalId'] = globalid.toGlobalId(data['globalId'])
 
             attributeValue = data[attribute]
             attributeObject = self.getAttributeObject(attributeValue)
@@ -137,14 +138,23 @@ class JSON2IFC(IFCJSON):
                           (attributeName, entity.is_a()))
 
     def collect_objects(self, data):
-        self.data = self.readData(data)
-        project = self.data[self.data.type == 'IfcProject'].iloc[0].data
-        self.project_globalid = ifcopenshell.guid.compress(
-            uuid.UUID(project['globalId']).hex)
+        self.data = data
+        project = next(x for x in data if x['type'] == 'IfcProject')
+        self.project_globalid = globalid.toGlobalId(project['globalId'])
         self.project_name = project['name']
         self.model = ifcopenshell.file(None, self.schemaIdentifier)
-        self.data['id'] = self.data.apply(self.createEntity, axis=1)
-        self.data.apply(self.fillEntityFromDf, axis=1)
+
+        # First create all entities so references can be resolved while filling them,
+        # indexed by globalId
+        with self.instrumentation.phase('create'):
+            entityIds = [self.createEntity(x) for x in data]
+            self.entityIds = {x['globalId']: entityId for x, entityId in zip(
+                data, entityIds) if 'globalId' in x}
+        self.instrumentation.count('created', len(entityIds))
+
+        with self.instrumentation.phase('fill'):
+            for entityData, entityId in zip(data, entityIds):
+                self.fillEntity(entityData, self.model.by_id(entityId))
 
     def ifcModel(self):
         return self.model
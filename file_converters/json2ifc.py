@@ -7,8 +7,8 @@ https://github.com/IFCJSON-Team
 from time import perf_counter
 import os
 import argparse
-import json
 import ifcjson
+import ifcjson.cli as cli
 
 start_time = perf_counter()
 
@@ -17,6 +17,7 @@ if __name__ == '__main__':
         description='Convert ifcJSON to SPF')
     parser.add_argument('-i', type=str, help='input json file path')
     parser.add_argument('-o', type=str, help='output ifc file path')
+    cli.addProfileArguments(parser)
     args = parser.parse_args()
     if args.i:
         jsonFilePath = args.i
@@ -25,9 +26,12 @@ if __name__ == '__main__':
             ifcFilePath = args.o
         else:
             ifcFilePath = os.path.splitext(jsonFilePath)[0] + '.ifc'
-        ifc_json = ifcjson.JSON2IFC(jsonFilePath)
+        instrumentation = cli.startInstrumentation(args)
+        ifc_json = ifcjson.JSON2IFC(jsonFilePath, instrumentation)
         ifc_model = ifc_json.ifcModel()
-        ifc_model.write(ifcFilePath)
+        with instrumentation.phase('write'):
+            ifc_model.write(ifcFilePath)
+        cli.finishInstrumentation(instrumentation, args)
 
         print("Conversion took ", perf_counter()-start_time, " seconds")
     else:
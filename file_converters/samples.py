@@ -1,30 +1,26 @@
-import ifcopenshell
-import json
-import os
+from time import perf_counter
+import argparse
 
-from ifcjson import IFC2JSON4
+import batch
+import ifcjson.cli as cli
 # from ifcjson import JSON2IFC
 
-# traverse root directory, and list directories as dirs and files as files
-for root, dirs, files in os.walk("../Samples/"):
-    path = root.split(os.sep)
-    for file in files:
-        inFilePath = os.path.join(root, file)
-        filename, file_extension = os.path.splitext(inFilePath)
-        if file_extension.lower() == '.ifc':
-            if not filename.endswith('_roundtrip'):
+# Convert all sample files, using all processors
+if __name__ == '__main__':
+    start = perf_counter()
 
-                # # First create normalized ifcopenshell ifc for better comparison
-                # model = ifcopenshell.open(inFilePath)
-                # model.write(filename + '_ifcopenshell.ifc')
+    # Default writer options, the same as ifc2json.py without arguments
+    parser = argparse.ArgumentParser()
+    cli.addConversionArguments(parser)
+    args = parser.parse_args([])
 
-                jsonFilePath = filename + '.json'
-                with open(jsonFilePath, 'w') as outfile:
-                    json.dump(IFC2JSON4(inFilePath).spf2Json(), outfile, indent=2)
-                # with open(filename + '_python_5a.json', 'w') as outfile:
-                #     json.dump(ifcjson.IFC2JSON5a(inFilePath).spf2Json(), outfile, indent=2)
+    conversions = [(x, batch.jsonPath(x, "../Samples/"))
+                   for x in batch.findIfcFiles("../Samples/", exclude='_roundtrip')]
+    results = batch.convertFiles(conversions, args, force=True)
+    batch.printSummary(results, perf_counter() - start)
 
-                # # Convert back to SPF
-                # ifc_json = JSON2IFC(jsonFilePath)
-                # ifc_model = ifc_json.ifcModel()
-                # ifc_model.write(filename + '_roundtrip.ifc')
+    # # Convert back to SPF
+    # for ifcFilePath, jsonFilePath in conversions:
+    #     ifc_json = JSON2IFC(jsonFilePath)
+    #     ifc_model = ifc_json.ifcModel()
+    #     ifc_model.write(os.path.splitext(ifcFilePath)[0] + '_roundtrip.ifc')
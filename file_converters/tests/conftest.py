@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The ifcjson package is imported from the file_converters folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import shutil
+import pytest
+import batch
+import ifcjson.cli as cli
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       '..', '..', 'Samples', 'IFC_4.0', 'BuildingSMARTSpec')
+
+
+def parseArguments(arguments):
+    parser = argparse.ArgumentParser()
+    cli.addConversionArguments(parser)
+    return parser.parse_args(arguments)
+
+
+@pytest.mark.parametrize('arguments', [[], ['-b']])
+def test_outputs_are_replaced_only_on_success(tmp_path, arguments):
+    args = parseArguments(arguments)
+    inputFolder = tmp_path / 'input'
+    outputFolder = tmp_path / 'output'
+    inputFolder.mkdir()
+    outputFolder.mkdir()
+    shutil.copy(os.path.join(SAMPLES, 'wall-with-opening-and-window.ifc'),
+                str(inputFolder / 'good.ifc'))
+    (inputFolder / 'bad.ifc').write_text('ISO-10303-21;\nnot an ifc file\n')
+
+    # Earlier outputs of both files
+    conversions = []
+    for name in ('good', 'bad'):
+        jsonFilePath = str(outputFolder / (name + '.json'))
+        for filePath in cli.outputPaths(jsonFilePath, args):
+            with open(filePath, 'w') as outputFile:
+                outputFile.write('old')
+        conversions.append((str(inputFolder / (name + '.ifc')), jsonFilePath))
+
+    results = batch.convertFiles(conversions, args, workers=1, force=True)
+    assert isinstance(results[conversions[0][0]], float)
+    assert isinstance(results[conversions[1][0]], str)
+
+    with open(conversions[0][1]) as jsonFile:
+        assert json.load(jsonFile)['type'] == 'ifcJSON'
+    for filePath in cli.outputPaths(conversions[0][1], args):
+        with open(filePath, 'rb') as outputFile:
+            assert outputFile.read() != b'old'
+    for filePath in cli.outputPaths(conversions[1][1], args):
+        with open(filePath) as outputFile:
+            assert outputFile.read() == 'old'
+
+    # No temporary files are left behind
+    assert sorted(os.listdir(str(outputFolder))) == sorted(
+        os.path.basename(filePath) for ifcFilePath, jsonFilePath in conversions
+        for filePath in cli.outputPaths(jsonFilePath, args))
+
+
+def test_up_to_date_files_are_skipped(tmp_path):
+    args = parseArguments([])
+    ifcFilePath = str(tmp_path / 'model.ifc')
+    shutil.copy(os.path.join(SAMPLES, 'wall-with-opening-and-window.ifc'),
+                ifcFilePath)
+    jsonFilePath = str(tmp_path / 'model.json')
+    assert not batch.isUpToDate(ifcFilePath, jsonFilePath, args)
+    batch.convertFiles([(ifcFilePath, jsonFilePath)], args, workers=1)
+    assert batch.isUpToDate(ifcFilePath, jsonFilePath, args)
+    assert batch.convertFiles([(ifcFilePath, jsonFilePath)], args, workers=1) == {}
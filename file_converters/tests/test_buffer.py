@@ -0,0 +1,94 @@
+import json
+import os
+import re
+import ifcjson
+import ifcjson.buffer as buffer
+from ifcjson.reader import IFCJSON
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       '..', '..', 'Samples', 'IFC_4.0', 'BuildingSMARTSpec')
+
+POINTS = [[0.0, 0.0, 0.0], [1.5, 0.0, 0.0], [1.5, 2.25, -3.0]]
+INDICES = [[1, 2, 3]]
+VALUES = [0.5, 1.0, 1.5, 2.0, 2.5]
+
+UUID = re.compile(
+    r'"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"')
+
+
+def normalize(data):
+    """Returns the json text with random uuids numbered in order of appearance"""
+
+    uuids = {}
+    return UUID.sub(lambda m: uuids.setdefault(m.group(), '"%d"' % len(uuids)),
+                    json.dumps(data, sort_keys=True))
+
+
+def addAccessors(binaryBuffer):
+    return [binaryBuffer.addAccessor(POINTS, 'float64'),
+            binaryBuffer.addAccessor(INDICES, 'int32'),
+            binaryBuffer.addAccessor(VALUES, 'float32', 1),
+            binaryBuffer.addAccessor(POINTS, 'float32')]
+
+
+def checkAccessors(data, accessors):
+    expected = [POINTS, INDICES, [VALUES], POINTS]
+    for accessor, values in zip(accessors, expected):
+        assert accessor['byteOffset'] % buffer.ALIGNMENT == 0
+        flat = [value for item in values for value in item]
+        assert buffer.accessorValues(data, accessor).tolist() == flat
+        assert accessor['count'] * accessor['itemSize'] == len(flat)
+
+
+def test_file_round_trip(tmp_path):
+    filePath = str(tmp_path / 'model.bin')
+    binaryBuffer = buffer.BinaryBuffer('model.bin', filePath)
+    accessors = addAccessors(binaryBuffer)
+    binaryBuffer.save()
+    with open(filePath, 'rb') as bufferFile:
+        checkAccessors(bufferFile.read(), accessors)
+
+
+def test_temporary_file_round_trip(tmp_path):
+    filePath = str(tmp_path / 'model.bin')
+    binaryBuffer = buffer.BinaryBuffer('model.bin')
+    accessors = addAccessors(binaryBuffer)
+    binaryBuffer.save(filePath)
+    with open(filePath, 'rb') as bufferFile:
+        checkAccessors(bufferFile.read(), accessors)
+
+
+def resolve(value, reader):
+    """Returns the value with buffer accessors replaced by nested lists of values"""
+
+    if buffer.isAccessor(value):
+        values = reader.accessorValues(value).tolist()
+        itemSize = value['itemSize']
+        return [values[i:i + itemSize] for i in range(0, len(values), itemSize)]
+    if isinstance(value, dict):
+        return {key: resolve(item, reader) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve(item, reader) for item in value]
+    return value
+
+
+def test_tessellation_round_trip(tmp_path):
+    filePath = os.path.join(SAMPLES, 'wall-with-opening-and-window.ifc')
+    jsonFilePath = str(tmp_path / 'model.json')
+    binaryBuffer = buffer.BinaryBuffer('model.bin', str(tmp_path / 'model.bin'))
+    writer = ifcjson.IFC2JSON4(filePath, GEOMETRY='tessellate',
+                               BINARY_BUFFER=binaryBuffer)
+    with open(jsonFilePath, 'w') as jsonFile:
+        writer.spf2JsonStream(jsonFile)
+    binaryBuffer.save()
+    expected = ifcjson.IFC2JSON4(filePath, GEOMETRY='tessellate').spf2Json()
+
+    reader = IFCJSON.from_file(jsonFilePath)
+    try:
+        assert 'bufferAccessor' in json.dumps(reader.data)
+        data = resolve(reader.data, reader)
+    finally:
+        reader.close()
+
+    assert normalize(data) == normalize(expected['data'])
+
@@ -0,0 +1,97 @@
+import itertools
+import json
+import os
+import uuid
+import pytest
+import ifcopenshell
+import ifcjson
+from ifcjson.cache import TessellationCache
+from ifcjson.reader import IFCJSON
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       '..', '..', 'Samples', 'IFC_4.0', 'BuildingSMARTSpec')
+
+
+def convert(filePath, cache):
+    data = ifcjson.IFC2JSON4(filePath, GEOMETRY='tessellate', CACHE=cache).spf2Json()
+    return json.dumps(data['data'], sort_keys=True)
+
+
+def test_warm_cache_equals_cold(tmp_path, monkeypatch):
+
+    # Entities without GlobalId get a random uuid, number them instead
+    counter = itertools.count()
+    monkeypatch.setattr(uuid, 'uuid4', lambda: uuid.UUID(int=next(counter)))
+
+    filePath = os.path.join(SAMPLES, 'wall-with-opening-and-window.ifc')
+    cache = TessellationCache(str(tmp_path))
+    cold = convert(filePath, cache)
+    assert cache.hits == 0 and cache.misses > 0
+
+    counter = itertools.count()
+    cache = TessellationCache(str(tmp_path))
+    warm = convert(filePath, cache)
+    assert cache.misses == 0 and cache.hits > 0
+    assert warm == cold
+
+
+def test_prune_removes_oldest_first(tmp_path):
+    cache = TessellationCache(str(tmp_path))
+    keys = ['%02x' % i * 20 for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.put(key, (0.0, 0.0, 0.0) * 3, (0, 1, 2), (0.0,) * 16)
+        os.utime(cache.path(key), ns=(i * 10 ** 9, i * 10 ** 9))
+
+    # Reading a mesh marks it as recently used
+    assert cache.get(keys[0]) is not None
+    size = os.path.getsize(cache.path(keys[0]))
+    cache.maxSize = 2.5 * size
+    cache.prune()
+    assert [os.path.exists(cache.path(key)) for key in keys] == \
+        [True, False, False, True]
+
+
+def moveProduct(ifcModel):
+    """Moves the window of the wall sample and returns it"""
+
+    window = ifcModel.by_type('IfcWindow')[0]
+    window.ObjectPlacement.RelativePlacement = ifcModel.createIfcAxis2Placement3D(
+        ifcModel.createIfcCartesianPoint((2500., 100., 300.)),
+        ifcModel.createIfcDirection((0., 0., 1.)), ifcModel.createIfcDirection((0., 1., 0.)))
+    return window
+
+
+@pytest.mark.parametrize('shareMeshes', [False, True])
+def test_placement_is_only_in_the_key_in_world_coordinates(tmp_path, shareMeshes):
+    ifcModel = ifcopenshell.open(os.path.join(
+        SAMPLES, 'wall-with-opening-and-window.ifc'))
+    cache = TessellationCache(str(tmp_path))
+    key = ifcjson.IFC2JSON5a(ifcModel, SHARE_MESHES=shareMeshes, CACHE=cache).cacheKey(
+        ifcModel.by_type('IfcWindow')[0])
+    window = moveProduct(ifcModel)
+    movedKey = ifcjson.IFC2JSON5a(ifcModel, SHARE_MESHES=shareMeshes, CACHE=cache).cacheKey(
+        window)
+    assert (movedKey == key) == shareMeshes
+
+
+def test_cached_meshes_are_placed_at_the_new_placement(tmp_path):
+    filePath = os.path.join(SAMPLES, 'wall-with-opening-and-window.ifc')
+    cache = TessellationCache(str(tmp_path))
+    ifcjson.IFC2JSON5a(filePath, SHARE_MESHES=True, CACHE=cache).spf2Json()
+
+    ifcModel = ifcopenshell.open(filePath)
+    window = moveProduct(ifcModel)
+    cache = TessellationCache(str(tmp_path))
+    warm = IFCJSON(ifcjson.IFC2JSON5a(
+        ifcModel, SHARE_MESHES=True, CACHE=cache).spf2Json()).productMeshes()
+    assert cache.misses == 0 and cache.hits > 0
+
+    expected = IFCJSON(ifcjson.IFC2JSON5a(ifcModel).spf2Json()).productMeshes()
+    assert set(warm) == set(expected)
+    for globalId in expected:
+        vertices = [vertex for item in warm[globalId] for vertex in item.vertices]
+        expectedVertices = [
+            vertex for item in expected[globalId] for vertex in item.vertices]
+        assert len(vertices) == len(expectedVertices)
+        for vertex, expectedVertex in zip(vertices, expectedVertices):
+            assert vertex == pytest.approx(expectedVertex, abs=1e-6)
@@ -0,0 +1,28 @@
+import uuid
+import pytest
+import ifcopenshell.guid as guid
+import ifcjson.globalid as globalid
+
+GLOBAL_IDS = ['0' * 22, '3' + '$' * 21, '3v1174zor6w9secwnbuYk1',
+              '0lIJEMoxL8yP0B7vq1iIiM'] + [guid.new() for i in range(1000)]
+
+
+@pytest.mark.parametrize('globalId', GLOBAL_IDS[:4])
+def test_to_uuid_matches_ifcopenshell(globalId):
+    assert globalid.toUuid(globalId) == str(uuid.UUID(guid.expand(globalId)))
+
+
+def test_round_trip():
+    uuids = globalid.toUuids(GLOBAL_IDS)
+    for globalId, uuidString in zip(GLOBAL_IDS, uuids):
+        assert uuidString == str(uuid.UUID(guid.expand(globalId)))
+        assert globalid.toUuid(globalId) == uuidString
+        assert globalid.toGlobalId(uuidString) == globalId
+        assert globalid.toGlobalId(uuidString) == guid.compress(
+            uuid.UUID(uuidString).hex)
+
+
+@pytest.mark.parametrize('globalId', ['', '0' * 21, '0' * 23, '0' * 21 + '!'])
+def test_invalid_global_id(globalId):
+    with pytest.raises(ValueError):
+        globalid.toUuid(globalId)
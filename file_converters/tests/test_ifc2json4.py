@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import pytest
+import ifcopenshell
+import ifcjson
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       '..', '..', 'Samples', 'IFC_4.0', 'BuildingSMARTSpec')
+
+# Expected output with random uuids numbered, see normalize
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+SAMPLE_FILES = ['wall-with-opening-and-window.ifc', 'basin-tessellation.ifc',
+                'column-straight-rectangle-tessellation.ifc']
+
+UUID = re.compile(
+    r'"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"')
+
+
+def normalize(data):
+    """Returns the data with random uuids numbered in order of appearance"""
+
+    uuids = {}
+    return json.loads(UUID.sub(lambda m: uuids.setdefault(m.group(), '"%d"' % len(uuids)),
+                               json.dumps(data, sort_keys=True)))
+
+
+def expand(value, sharedObjects):
+    """Returns the value with references to shared objects replaced by the objects"""
+
+    if isinstance(value, dict):
+        if value.get('ref') in sharedObjects:
+            return expand(sharedObjects[value['ref']], sharedObjects)
+        return {key: expand(item, sharedObjects) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [expand(item, sharedObjects) for item in value]
+    return value
+
+
+@pytest.mark.parametrize('fileName', SAMPLE_FILES)
+def test_deduplicate_writes_shared_objects_once(fileName):
+    filePath = os.path.join(SAMPLES, fileName)
+    nested = ifcjson.IFC2JSON4(filePath).spf2Json()['data']
+    deduplicated = ifcjson.IFC2JSON4(
+        filePath, DEDUPLICATE=True).spf2Json()['data']
+
+    # Shared objects are added after all other objects
+    sharedObjects = {}
+    for entity in deduplicated[len(nested):]:
+        entity = dict(entity)
+        sharedObjects[entity.pop('globalId')] = entity
+    assert sharedObjects
+
+    text = json.dumps(deduplicated)
+    for globalId in sharedObjects:
+        assert text.count('"ref": "%s"' % globalId) > 1
+
+    expanded = expand(deduplicated[:len(nested)], sharedObjects)
+    assert normalize(expanded) == normalize(nested)
+
+
+def expectedData(name):
+    with open(os.path.join(DATA, name)) as expectedFile:
+        return json.load(expectedFile)
+
+
+@pytest.mark.parametrize('shareObjects', [False, True])
+def test_output_equals_stored_sample(shareObjects):
+    filePath = os.path.join(SAMPLES, 'wall-with-opening-and-window.ifc')
+    data = ifcjson.IFC2JSON4(filePath, NO_INVERSE=True,
+                             SHARE_OBJECTS=shareObjects).spf2Json()['data']
+    assert normalize(data) == expectedData(
+        'wall-with-opening-and-window_no_inverse.json')
+
+
+@pytest.mark.parametrize('shareObjects', [False, True])
+def test_object_cache_counts_down_references(shareObjects):
+    ifcModel = ifcopenshell.file(schema='IFC4')
+    point = ifcModel.createIfcCartesianPoint((1.0, 2.0, 3.0))
+    for i in range(3):
+        ifcModel.createIfcAxis2Placement3D(point, None, None)
+    writer = ifcjson.IFC2JSON4(ifcModel, SHARE_OBJECTS=shareObjects)
+
+    first = writer.getAttributeValue(point)
+    assert writer.objectCache[point.id()] == [first, 2]
+    second = writer.getAttributeValue(point)
+    assert writer.objectCache[point.id()][1] == 1
+    third = writer.getAttributeValue(point)
+
+    # The entry is removed after the last reference
+    assert not point.id() in writer.objectCache
+    assert first == second == third == {
+        'type': 'IfcCartesianPoint', 'coordinates': (1.0, 2.0, 3.0)}
+    assert (second is first) == shareObjects
+    assert (third is first) == shareObjects
+
+
+def test_output_with_inverses_equals_stored_sample():
+    filePath = os.path.join(SAMPLES, 'wall-with-opening-and-window.ifc')
+    data = ifcjson.IFC2JSON4(filePath).spf2Json()['data']
+    assert normalize(data) == expectedData('wall-with-opening-and-window.json')
+
+
+@pytest.mark.parametrize('fileName', SAMPLE_FILES)
+def test_inverses_equal_getattr(fileName):
+    writer = ifcjson.IFC2JSON4(os.path.join(SAMPLES, fileName))
+    for entity in writer.entities():
+        pass
+    inverseCount = 0
+    for entity in writer.ifcModel.by_type('IfcRoot'):
+        plan = writer.conversionPlan(entity)
+        for attr in plan['inverseAttributes']:
+            expected = sorted(x.id() for x in getattr(entity, attr))
+            inverses = writer.getInverseAttribute(entity, plan, attr)
+            assert sorted(x.id() for x in inverses) == expected
+            inverseCount += len(expected)
+    assert inverseCount
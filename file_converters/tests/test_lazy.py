@@ -0,0 +1,37 @@
+import json
+from ifcjson.lazy import LazyDocument
+
+DOCUMENT = {
+    'type': 'ifcJSON',
+    'version': '0.0.1',
+    'data': [
+        {'type': 'IfcProject', 'globalId': 'b', 'name': 'Project'},
+        {'type': 'IfcWall', 'globalId': 'a', 'name': 'Wall "1"'},
+        {'type': 'IfcWall', 'globalId': 'c', 'representations': [{'ref': 'd'}]},
+        {'type': 'shapeRepresentation', 'globalId': 'd',
+         'representationType': 'OBJ', 'items': ['v 0 0 0\n']},
+        [1, 2, 3]
+    ]
+}
+
+
+def test_sidecar_index_equals_scanned_index(tmp_path):
+    filePath = str(tmp_path / 'model.json')
+    with open(filePath, 'w') as jsonFile:
+        json.dump(DOCUMENT, jsonFile, indent=2)
+
+    scanned = LazyDocument(filePath)
+    LazyDocument(filePath, sidecar=True).close()
+    mapped = LazyDocument(filePath, sidecar=True)
+    try:
+        assert mapped.sidecar is not None
+        assert mapped.header == scanned.header
+        assert list(mapped.data) == DOCUMENT['data']
+        assert list(mapped.index) == ['b', 'a', 'c']
+        assert mapped.index['a'] == DOCUMENT['data'][1]
+        assert 'd' not in mapped.index and 'x' not in mapped.index
+        assert mapped.geometry['d'] == DOCUMENT['data'][3]
+        assert dict(mapped.entityTypes) == scanned.entityTypes
+    finally:
+        mapped.close()
+        scanned.close()
@@ -0,0 +1,40 @@
+import pytest
+import ifcjson.obj as obj
+from ifcjson.mesh import ObjMesh
+
+VERTS = [0.0, 0.0, 0.0, 1.5, 0.0, 0.0, 1.5, 2.25, 0.0, 0.1, 0.2, 3.0]
+FACES = [0, 1, 2, 0, 2, 3]
+
+
+def test_indices_start_at_one():
+    objString = obj.formatObj(VERTS, FACES)
+    assert 'f 1 2 3\nf 1 3 4\n' in objString
+    assert not 'f 0' in objString
+
+
+@pytest.mark.parametrize('flat', [True, False])
+def test_round_trip_full_precision(flat):
+    vertices, faces = obj.parseObj(obj.formatObj(VERTS, FACES), flat)
+    if not flat:
+        assert vertices[1] == VERTS[3:6]
+        vertices = [value for vertex in vertices for value in vertex]
+        faces = [index for face in faces for index in face]
+    assert vertices == VERTS
+    assert faces == FACES
+
+
+@pytest.mark.parametrize('precision', [0, 1, 3])
+def test_round_trip_precision(precision):
+    objString = obj.formatObj(VERTS, FACES, precision)
+    vertices, faces = obj.parseObj(objString, flat=True)
+    assert vertices == [round(value, precision) for value in VERTS]
+    assert faces == FACES
+
+
+def test_polygon_faces():
+    objString = 'v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nf 1 2 3 4\n'
+    mesh = ObjMesh(objString)
+    assert mesh.faces == [[0, 1, 2, 3]]
+    assert mesh.toObjString().endswith('f 1 2 3 4\n')
+    with pytest.raises(ValueError):
+        obj.parseObj(objString, flat=True)
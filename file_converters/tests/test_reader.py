@@ -0,0 +1,11 @@
+from ifcjson.reader import IFCJSON
+
+
+def test_objects_in_mixed_lists_are_indexed():
+    reader = IFCJSON([{
+        'type': 'IfcPropertyListValue',
+        'globalId': 'a',
+        'listValues': [1, 2.5, {'type': 'IfcLabel', 'globalId': 'b'}],
+        'coordinates': [0.0, 1.0, 2.0]
+    }])
+    assert reader.entityById('b') == {'type': 'IfcLabel', 'globalId': 'b'}
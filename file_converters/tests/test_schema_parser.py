@@ -0,0 +1,134 @@
+import os
+import sys
+import pytest
+
+SCHEMA_CONVERTERS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '..', '..', 'schema_converters')
+EXPRESS_PATH = os.path.join(SCHEMA_CONVERTERS, 'reference_schemas', 'IFC4.exp')
+SCHEMA_PATH = os.path.join(SCHEMA_CONVERTERS, '..', 'Schema', 'IFC4.json')
+
+# schema_parser is a script in the schema_converters folder
+sys.path.insert(0, os.path.join(SCHEMA_CONVERTERS, 'ifcexpress2jsonschema'))
+import schema_parser
+
+EXPRESS = '''SCHEMA IFC4;
+
+(* A comment that contains END_ENTITY; and TYPE *)
+TYPE IfcLabel = STRING;
+END_TYPE;
+
+TYPE IfcKind = ENUMERATION OF
+\t(FIRST
+\t,SECOND);
+END_TYPE;
+
+ENTITY IfcRoot
+ ABSTRACT SUPERTYPE OF (ONEOF
+\t(IfcObject));
+\tGlobalId : IfcLabel;
+\tName : OPTIONAL IfcLabel;
+END_ENTITY;
+
+FUNCTION IfcDummy
+  (Value : IfcLabel) : LOGICAL;
+  RETURN (TRUE);
+END_FUNCTION;
+
+END_SCHEMA;
+'''
+
+
+def write_express(tmp_path, text, newline='\n'):
+    express_path = str(tmp_path / 'schema.exp')
+    with open(express_path, 'w', newline=newline) as express_file:
+        express_file.write(text)
+    return express_path
+
+
+def test_read_express(tmp_path):
+    expected = [
+        ('SCHEMA', ['SCHEMA IFC4;']),
+        ('TYPE', ['TYPE IfcLabel = STRING;']),
+        ('TYPE', ['TYPE IfcKind = ENUMERATION OF\r\n\t(FIRST\r\n\t,SECOND);']),
+        ('ENTITY', ['ENTITY IfcRoot\r\n ABSTRACT SUPERTYPE OF (ONEOF\r\n\t(IfcObject));',
+                    'GlobalId : IfcLabel;', 'Name : OPTIONAL IfcLabel;']),
+        ('FUNCTION', ['FUNCTION IfcDummy\r\n  (Value : IfcLabel) : LOGICAL;',
+                      'RETURN (TRUE);'])]
+    for newline in ('\n', '\r\n'):
+        express_path = write_express(tmp_path, EXPRESS, newline)
+        assert list(schema_parser.read_express(express_path)) == expected
+
+
+def test_schema_equals_stored_schema(tmp_path):
+    json_file_path = str(tmp_path / 'IFC4.json')
+    json_schema = schema_parser.JsonSchema(EXPRESS_PATH)
+    assert json_schema.schema_version == 'IFC4'
+    json_schema.to_file(json_file_path)
+    with open(json_file_path, 'rb') as json_file, open(SCHEMA_PATH, 'rb') as schema_file:
+        assert json_file.read() == schema_file.read()
+
+
+INHERITANCE_EXPRESS = '''SCHEMA IFC4;
+
+TYPE IfcLabel = STRING;
+END_TYPE;
+
+ENTITY IfcWall
+ SUBTYPE OF (IfcObject);
+\tHeight : IfcLabel;
+END_ENTITY;
+
+ENTITY IfcObject
+ SUBTYPE OF (IfcRoot);
+\tObjectType : OPTIONAL IfcLabel;
+END_ENTITY;
+
+ENTITY IfcRoot;
+\tGlobalId : IfcLabel;
+\tName : OPTIONAL IfcLabel;
+END_ENTITY;
+
+END_SCHEMA;
+'''
+
+
+def inherited(entity, ifc_objects):
+    """Returns the properties and required attributes of an entity by walking
+    up the inheritance chain"""
+
+    if not entity.subtype:
+        return dict(entity.properties), entity.required
+    properties, required = inherited(ifc_objects[entity.subtype], ifc_objects)
+    properties = dict(properties)
+    properties.update(entity.properties)
+    return properties, entity.required + required
+
+
+def test_inheritance_with_subtypes_before_supertypes(tmp_path):
+    json_schema = schema_parser.JsonSchema(
+        write_express(tmp_path, INHERITANCE_EXPRESS))
+    wall = json_schema.ifc_objects['IfcWall']
+    assert list(wall.get_properties(json_schema.ifc_objects)) == [
+        'type', 'globalId', 'name', 'objectType', 'height']
+    assert wall.get_properties(json_schema.ifc_objects)['type'] == {
+        'const': 'IfcWall'}
+    assert wall.get_required(json_schema.ifc_objects) == ['height', 'globalId']
+
+
+def test_inheritance_equals_walking_the_chain():
+    json_schema = schema_parser.JsonSchema(EXPRESS_PATH)
+    ifc_objects = json_schema.ifc_objects
+    entities = [x for x in ifc_objects.values() if type(x) is schema_parser.Entity]
+    assert len(entities) > 700
+    for entity in entities:
+        properties, required = inherited(entity, ifc_objects)
+        assert entity.get_properties(ifc_objects) == properties
+        assert list(entity.get_properties(ifc_objects)) == list(properties)
+        assert entity.get_required(ifc_objects) == required
+
+
+def test_circular_inheritance(tmp_path):
+    express = INHERITANCE_EXPRESS.replace(
+        'ENTITY IfcRoot;', 'ENTITY IfcRoot\r\n SUBTYPE OF (IfcWall);')
+    with pytest.raises(ValueError):
+        schema_parser.JsonSchema(write_express(tmp_path, express))
@@ -0,0 +1,41 @@
+import json
+import os
+import pytest
+import ifcjson
+import ifcjson.serialization as serialization
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       '..', '..', 'Samples', 'IFC_4.0', 'BuildingSMARTSpec')
+
+
+@pytest.fixture(scope='module')
+def data():
+    filePath = os.path.join(SAMPLES, 'wall-with-opening-and-window.ifc')
+    return ifcjson.IFC2JSON4(filePath).spf2Json()
+
+
+@pytest.fixture(params=[name for name in serialization.ENCODERS
+                        if name in serialization.availableBackends()])
+def backend(request):
+    serialization.setBackend(request.param)
+    yield request.param
+    serialization.setBackend()
+
+
+@pytest.mark.parametrize('indent', [None, 2, 4])
+def test_dumps_equals_json(data, backend, indent):
+
+    # Attribute values are tuples, which json writes as lists
+    assert any(isinstance(value, tuple)
+               for entity in data['data'] for value in entity.values())
+    assert serialization.backendName()[0] == backend
+    text = serialization.dumps(data, indent)
+    assert json.loads(text) == json.loads(json.dumps(data, indent=indent))
+    if indent is None:
+        assert not '\n' in text
+
+
+def test_loads_equals_json(data, backend):
+    text = json.dumps(data)
+    assert serialization.loads(text) == json.loads(text)
+    assert serialization.loads(text.encode()) == json.loads(text)
@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import pytest
+import ifcopenshell
+import ifcjson
+from ifcjson.reader import IFCJSON
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       '..', '..', 'Samples', 'IFC_4.0', 'BuildingSMARTSpec')
+
+# Products with an Axis representation before their Body representation
+SAMPLE_FILES = ['beam-extruded-solid.ifc', 'column-extruded-solid.ifc',
+                'wall-with-opening-and-window.ifc', 'basin-tessellation.ifc']
+
+UUID = re.compile(
+    r'"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"')
+
+
+def normalize(data):
+    """Returns the json text with random uuids numbered in order of appearance"""
+
+    uuids = {}
+    return UUID.sub(lambda m: uuids.setdefault(m.group(), '"%d"' % len(uuids)),
+                    json.dumps(data, sort_keys=True))
+
+
+@pytest.mark.parametrize('fileName', SAMPLE_FILES)
+def test_parallel_tessellation_equals_serial(fileName):
+    filePath = os.path.join(SAMPLES, fileName)
+    serial = ifcjson.IFC2JSON4(filePath, GEOMETRY='tessellate').spf2Json()
+    parallel = ifcjson.IFC2JSON4(
+        filePath, GEOMETRY='tessellate', JOBS=4).spf2Json()
+    assert 'IfcTriangulatedFaceSet' in json.dumps(serial)
+    assert normalize(serial['data']) == normalize(parallel['data'])
+
+
+@pytest.mark.parametrize('fileName', SAMPLE_FILES)
+def test_parallel_obj_equals_serial(fileName):
+    filePath = os.path.join(SAMPLES, fileName)
+    serial = ifcjson.IFC2JSON5a(filePath).spf2Json()
+    parallel = ifcjson.IFC2JSON5a(filePath, JOBS=4).spf2Json()
+    assert any(entity.get('representationType') == 'OBJ'
+               for entity in serial['data'])
+    assert normalize(serial['data']) == normalize(parallel['data'])
+
+
+def faceSets(value):
+    """Yields all IfcTriangulatedFaceSet objects in a json value"""
+
+    if isinstance(value, dict):
+        if value.get('type') == 'IfcTriangulatedFaceSet':
+            yield value
+        for item in value.values():
+            yield from faceSets(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from faceSets(item)
+
+
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_coordinate_indices_start_at_one(jobs):
+    filePath = os.path.join(SAMPLES, 'wall-with-opening-and-window.ifc')
+    data = ifcjson.IFC2JSON4(
+        filePath, GEOMETRY='tessellate', JOBS=jobs).spf2Json()
+    shapes = list(faceSets(data['data']))
+    assert shapes
+    for shape in shapes:
+        pointCount = len(shape['coordinates']['coordList'])
+        indices = [index for face in shape['coordIndex'] for index in face]
+        assert min(indices) >= 1
+        assert max(indices) <= pointCount
+
+
+def mappedShapeModel():
+    """Returns a model with four products that share a mapped representation,
+    rotated and placed relative to each other"""
+
+    ifcModel = ifcopenshell.open(os.path.join(
+        SAMPLES, 'mapped-shape-with-transformation.ifc'))
+    product = ifcModel.by_type('IfcBuildingElementProxy')[0]
+    parent = product.ObjectPlacement
+    for i, (axis, refDirection) in enumerate([(None, None), ((0., 0., 1.), (0., 1., 0.)),
+                                              ((1., 0., 0.), (0., 1., 1.))]):
+        placement = ifcModel.createIfcAxis2Placement3D(
+            ifcModel.createIfcCartesianPoint((1000. * (i + 1), 500., 250. * i)),
+            axis and ifcModel.createIfcDirection(axis),
+            refDirection and ifcModel.createIfcDirection(refDirection))
+        parent = ifcModel.createIfcLocalPlacement(parent, placement)
+        ifcModel.create_entity('IfcBuildingElementProxy', GlobalId=ifcopenshell.guid.new(),
+                               ObjectPlacement=parent, Representation=product.Representation)
+    return ifcModel
+
+
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_shared_mapped_geometry_is_tessellated_once(jobs):
+    ifcModel = mappedShapeModel()
+    writer = ifcjson.IFC2JSON5a(ifcModel, SHARE_MESHES=True, JOBS=jobs)
+    createShape = writer.createShape
+    productShapes = writer.productShapes
+    tessellated = []
+
+    def countShape(product):
+        tessellated.append(product)
+        return createShape(product)
+
+    def countShapes(products):
+        tessellated.extend(products)
+        return productShapes(products)
+    writer.createShape = countShape
+    writer.productShapes = countShapes
+    shared = IFCJSON(writer.spf2Json()).productMeshes()
+    assert len(tessellated) == 1
+
+    # Shared meshes placed with the calculated transformation equal the meshes in world coordinates
+    world = IFCJSON(ifcjson.IFC2JSON5a(ifcModel).spf2Json()).productMeshes()
+    assert len(shared) == len(world) == 4
+    for globalId in world:
+        expected = [vertex for item in world[globalId] for vertex in item.vertices]
+        vertices = [vertex for item in shared[globalId] for vertex in item.vertices]
+        assert len(vertices) == len(expected)
+        for vertex, expectedVertex in zip(vertices, expected):
+            assert vertex == pytest.approx(expectedVertex, abs=1e-6)
@@ -5,17 +5,51 @@ target file: "../../Schema/IFC4x2-from-express.json"
 status file(processed lines are prepended with --): "./IFC4x2-status.exp"
 """
 
-import copy
 import json
 import logging
 import os
 import re
 
-logging.basicConfig(level=logging.DEBUG,
-                    filename='schema_parser.log', filemode='w')
-
 JSONSCHEMA_CORE_TYPES = ["number", "integer", "string", "boolean"]
 
+# Comments, the SCHEMA declaration and complete TYPE, ENTITY, FUNCTION and RULE blocks
+EXPRESS_BLOCKS = re.compile(
+    r'\(\*.*?\*\)'
+    r'|^SCHEMA\b[^;]*;'
+    r'|^(?P<keyword>TYPE|ENTITY|FUNCTION|RULE)\b.*?^END_(?P=keyword)\s*;',
+    flags=re.MULTILINE | re.DOTALL)
+
+# Statements within a block are terminated by a semicolon
+EXPRESS_STATEMENTS = re.compile(r'[^;]*;')
+
+
+def read_express(express_path):
+    """ Reads an EXPRESS schema file in a single pass
+
+    The line endings are normalized to CRLF, as expected by the Type and Entity parsers
+
+    Parameters:
+    express_path (str): EXPRESS schema file path
+
+    Yields:
+    tuple: keyword (SCHEMA, TYPE, ENTITY, FUNCTION or RULE) and the list of
+        stripped statements of the block, without the closing END_ statement
+
+    """
+
+    with open(express_path, "rb") as f:
+        text = f.read().decode()
+    text = text.replace("\r\n", "\n").replace("\n", "\r\n")
+    for match in EXPRESS_BLOCKS.finditer(text):
+        keyword = match.group('keyword')
+        if keyword is None:
+            if match.group().startswith('SCHEMA'):
+                yield 'SCHEMA', [match.group()]
+            continue
+        statements = [x.strip() for x in EXPRESS_STATEMENTS.findall(
+            match.group())]
+        yield keyword, statements[:-1]
+
 
 class IfcBaseObject:
 
@@ -185,6 +219,11 @@ class Entity(IfcBaseObject):
 
         self.properties = {'type': {"const": self.objectName}}
 
+        # Properties and required attributes including those of all supertypes,
+        # set by resolve_inheritance
+        self.inherited_properties = None
+        self.inherited_required = None
+
     def add_property(self, property_line, ifc_objects, inverse):
         property_parts = property_line.split(" : ")
         name = property_parts[0].strip()
@@ -238,22 +277,14 @@ class Entity(IfcBaseObject):
             i += 1
 
     def get_required(self, ifc_objects):
-        if self.subtype:
-            return self.required + ifc_objects[self.subtype].get_required(ifc_objects)
-        else:
-            return self.required
+        if self.inherited_required is None:
+            resolve_inheritance(ifc_objects)
+        return self.inherited_required
 
     def get_properties(self, ifc_objects):
-        if self.subtype:
-            subtype_properties = ifc_objects[self.subtype].get_properties(
-                ifc_objects)
-            if subtype_properties:
-                subtype_properties.update(self.properties)
-                return copy.deepcopy(subtype_properties)
-            else:
-                return copy.deepcopy(self.properties)
-        else:
-            return copy.deepcopy(self.properties)
+        if self.inherited_properties is None:
+            resolve_inheritance(ifc_objects)
+        return dict(self.inherited_properties)
 
     def entity_inheritance_reference(self, name):
         return {
@@ -264,9 +295,10 @@ class Entity(IfcBaseObject):
         return self.definition_reference(self.objectName)
 
     def definition(self, ifc_objects):
+        properties = self.get_properties(ifc_objects)
         definition = {
             'type': 'object',
-            'properties': self.get_properties(ifc_objects)
+            'properties': properties
         }
 
         # Set required attributes
@@ -281,7 +313,7 @@ class Entity(IfcBaseObject):
                 map(lambda x: self.definition_reference(x), self.supertypes))
             definitionlist.append({
                 'type': 'object',
-                'properties': self.get_properties(ifc_objects)
+                'properties': properties
             })
             definition = {"anyOf": definitionlist}
 
@@ -298,13 +330,66 @@ class Entity(IfcBaseObject):
                 self.entity_inheritance_reference(self.subtype)]
         required = self.get_required(ifc_objects)
         if required:
-            definition['required'] = self.get_required(ifc_objects)
+            definition['required'] = required
 
         # # Prevent use of custom properties
         # definition['additionalProperties'] = False
         return definition
 
 
+def inheritance_order(ifc_objects):
+    """ Sort all entities so every entity comes after the entity it is a subtype of
+
+    Parameters:
+    ifc_objects (dict): dictionary containing all IFC objects in the schema
+
+    Returns:
+    list: Entity objects
+
+    """
+
+    ordered = []
+    visited = set()
+    for ifc_object in ifc_objects.values():
+        if type(ifc_object) is not Entity:
+            continue
+
+        # Walk up the inheritance chain until an entity that is already ordered
+        chain = []
+        entity = ifc_object
+        while entity is not None and entity.objectName not in visited:
+            if entity in chain:
+                raise ValueError(
+                    f"Circular inheritance for entity {entity.objectName}")
+            chain.append(entity)
+            entity = ifc_objects[entity.subtype] if entity.subtype else None
+        for entity in reversed(chain):
+            visited.add(entity.objectName)
+            ordered.append(entity)
+    return ordered
+
+
+def resolve_inheritance(ifc_objects):
+    """ Sets the properties and required attributes including those of all supertypes
+    for all entities, every entity is resolved once using the result of its supertype
+
+    Parameters:
+    ifc_objects (dict): dictionary containing all IFC objects in the schema
+
+    """
+
+    for entity in inheritance_order(ifc_objects):
+        if entity.subtype:
+            supertype = ifc_objects[entity.subtype]
+            properties = dict(supertype.inherited_properties)
+            properties.update(entity.properties)
+            entity.inherited_properties = properties
+            entity.inherited_required = entity.required + supertype.inherited_required
+        else:
+            entity.inherited_properties = dict(entity.properties)
+            entity.inherited_required = entity.required
+
+
 class JsonSchema:
     def __init__(self, express_path):
         self.schema_version = "None"
@@ -315,6 +400,7 @@ class JsonSchema:
 
         # Set properties can only be done after all entities are present in the list
         self.set_properties()
+        resolve_inheritance(self.ifc_objects)
 
     def to_file(self, json_file_path):
         with open(json_file_path, 'w') as json_file:
@@ -387,70 +473,25 @@ class JsonSchema:
 
     def parse_file(self, express_path):
         ifc_objects = {}
-        object_lines = []
-        ifc_object = None
-        f = open(express_path, "rb")
-        byte = f.read(1)
-        i = 0
-
-        # Mark end of header section
-        while byte:
-            byte = f.read(1)
-            i += 1
-            if byte == b')':
-
-                # Assume there is an empty line between header and SCHEMA
-                byte = f.read(4)
-                i += 4
-                break
-
-        blocks = [i]
-        j = i
-
-        while byte:
-            byte = f.read(1)
-            j += 1
-            if byte == b';':
-                blocks.append(j+2)  # Add end of line
-
-        # Reset read pointer
-        f.seek(i+1)
-
-        i = 0
-        while i < len(blocks)-1:
-            line = f.read(blocks[i+1] - blocks[i]).decode().strip()
-            if line.startswith('SCHEMA'):
-                self.schema_version = line.split(" ")[1].strip().rstrip(";")
-
-            # Group all lines that belong to a single TYPE or ENTITY
-            elif line.startswith('TYPE'):
-                object_lines = [line]
-            elif line.startswith('END_TYPE'):
-                object = Type(object_lines)
+        for keyword, statements in read_express(express_path):
+            if keyword == 'SCHEMA':
+                self.schema_version = statements[0].split(" ")[
+                    1].strip().rstrip(";")
+            elif keyword == 'TYPE':
+                object = Type(statements)
                 ifc_objects[object.objectName] = object
-            elif line.startswith('ENTITY'):
-                object_lines = [line]
-            elif line.startswith('END_ENTITY'):
-                object = Entity(object_lines)
+            elif keyword == 'ENTITY':
+                object = Entity(statements)
                 ifc_objects[object.objectName] = object
 
-            # No support for FUNCTION and RULE for now
-            elif line.startswith('FUNCTION'):
-                break
-            elif line.startswith('END_FUNCTION'):
-                break
-            elif line.startswith('RULE'):
-                break
-            elif line.startswith('END_RULE'):
-                break
-            else:
-                object_lines.append(line)
-            i += 1
-        f.close()
+            # No support for FUNCTION and RULE for now, they are skipped
+
         return ifc_objects
 
 
 def main():
+    logging.basicConfig(level=logging.DEBUG,
+                        filename='schema_parser.log', filemode='w')
     express_file_path = "./reference_schemas/IFC4.exp"
     json_schema = JsonSchema(express_file_path)
     json_file_path = f"./../Schema/{json_schema.schema_version}.json"